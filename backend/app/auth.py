@@ -1,5 +1,10 @@
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+import hashlib
+import threading
+import time
 import jwt
 import os
 from dotenv import load_dotenv
@@ -9,45 +14,90 @@ load_dotenv()
 security = HTTPBearer()
 DEFAULT_SECRET = "dev-nextauth-secret-change-me"
 NEXTAUTH_SECRET = os.getenv("NEXTAUTH_SECRET", DEFAULT_SECRET)
+JWT_ALGORITHM = "HS256"
+# Verified tokens kept (LRU); each entry is dropped once its token expires
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
 
 if NEXTAUTH_SECRET == DEFAULT_SECRET:
     print("Warning: NEXTAUTH_SECRET not set. Using insecure development default; set NEXTAUTH_SECRET in production.")
 
 
-async def verify_token(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-):
+class VerifiedTokenCache:
     """
-    Verify JWT token from NextAuth.
-    In production, you should verify the token signature properly.
-    For now, we'll decode and extract user info.
+    LRU cache of verified tokens, keyed by the SHA-256 of the token.
+
+    A token is only stored after its signature and expiry check out, and is served until
+    its own `exp`, so a hit skips parsing and the HMAC without extending the token's life.
     """
-    token = credentials.credentials
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats_counts = {"hits": 0, "misses": 0}
+
+    def get(self, digest: bytes) -> Dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry and entry[1] > time.time():
+                self._entries.move_to_end(digest)
+                self.stats_counts["hits"] += 1
+                return entry[0]
+            if entry:
+                del self._entries[digest]
+            self.stats_counts["misses"] += 1
+            return None
+
+    def put(self, digest: bytes, user: Dict[str, Any], expires_at: float):
+        with self._lock:
+            self._entries[digest] = (user, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+token_cache = VerifiedTokenCache()
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Verify an HS256 token signed with NEXTAUTH_SECRET (by the login route or the frontend's
+    API routes) and return {"user_id", "email", "token"}. Raises a 401 HTTPException.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return dict(cached)
 
     try:
-        # Decode the JWT token
-        # Note: In production, verify=True and check the secret
-        payload = jwt.decode(
-            token, NEXTAUTH_SECRET, algorithms=["HS256"], options={"verify_signature": False}
-        )
-        user_id = payload.get("sub") or payload.get("user_id")
-        email = payload.get("email")
-
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token: missing user ID",
-            )
-
-        return {"user_id": user_id, "email": email, "token": token}
+        payload = jwt.decode(token, NEXTAUTH_SECRET, algorithms=[JWT_ALGORITHM], options={"require": ["exp"]})
+    except jwt.ExpiredSignatureError:
+        raise _unauthorized("Token expired")
+    except jwt.InvalidSignatureError:
+        raise _unauthorized("Invalid token signature")
     except jwt.DecodeError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token format",
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Token verification failed: {str(e)}",
-        )
+        raise _unauthorized("Invalid token format")
+    except jwt.InvalidTokenError as e:
+        raise _unauthorized(f"Token verification failed: {str(e)}")
+
+    user_id = payload.get("sub") or payload.get("user_id")
+    if not user_id:
+        raise _unauthorized("Invalid token: missing user ID")
+
+    user = {"user_id": user_id, "email": payload.get("email"), "token": token}
+    token_cache.put(digest, user, float(payload["exp"]))
+    return dict(user)
+
 
+async def verify_token(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """
+    Verify the bearer token (signature and expiry) and extract user info.
+    Verified tokens are cached until they expire, so repeat requests skip the HMAC.
+    """
+    return decode_token(credentials.credentials)
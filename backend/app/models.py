@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float, Boolean, Index, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -30,6 +30,11 @@ class UserSettings(Base):
     # Default model will be handled by LLM service if model_preference is None
     api_key = Column(String, nullable=True)
     model_preference = Column(String, nullable=True)
+    # Optional secondary provider used for failover and (if hedge_requests) hedged requests
+    fallback_provider = Column(String, nullable=True)
+    fallback_api_key = Column(String, nullable=True)
+    fallback_model = Column(String, nullable=True)
+    hedge_requests = Column(Boolean, default=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     user = relationship("User", back_populates="settings")
@@ -43,12 +48,17 @@ class Resume(Base):
     file_path = Column(String, nullable=False)
     parsed_json = Column(JSONB, nullable=True)
     text_content = Column(Text, nullable=True)
+    content_sha256 = Column(String(64), nullable=True, index=True)  # Fingerprint of the uploaded file
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="resumes")
     bullets = relationship("Bullet", back_populates="resume")
     resume_embeddings = relationship("ResumeEmbedding", back_populates="resume")
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "content_sha256", name="uq_resumes_user_content_sha256"),
+    )
+
 
 class Bullet(Base):
     __tablename__ = "bullets"
@@ -112,6 +122,67 @@ class Recommendation(Base):
     improved_resume_json = Column(JSONB, nullable=True)
     recruiter_message_text = Column(Text, nullable=True)
     referral_message_text = Column(Text, nullable=True)
+    # Idempotency key: one result per (job, resume, kind, inputs)
+    kind = Column(String, nullable=False, default="initial")
+    input_hash = Column(String(64), nullable=True)  # SHA-256 of the generation inputs
+    status = Column(String, nullable=False, default="complete")  # generating, complete, failed
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "resume_id", "kind", "input_hash", name="uq_recommendations_idempotency"),
+    )
+
+
+class ResumeJobScore(Base):
+    """Semantic fit of one of a user's resumes against one of their jobs (batch rescoring)."""
+    __tablename__ = "resume_job_scores"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    resume_id = Column(Integer, ForeignKey("resumes.resume_id"), nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.job_id"), nullable=False)
+    score = Column(Float, nullable=False)  # 0-100, cosine similarity of the "full" embeddings
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("resume_id", "job_id", name="uq_resume_job_scores_resume_job"),
+        Index("idx_resume_job_scores_job_score", "job_id", "score"),
+    )
+
+
+class QueuedTask(Base):
+    """Durable background task, claimed by workers with FOR UPDATE SKIP LOCKED."""
+    __tablename__ = "task_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # e.g., "generate_recommendations"
+    payload = Column(JSONB, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_by = Column(String, nullable=True)  # worker id holding the task
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # visibility timeout
+    last_error = Column(Text, nullable=True)
+    dedup_key = Column(String, nullable=True)  # at most one queued/running task per key
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("idx_task_queue_status_run_after", "status", "run_after"),
+        Index(
+            "uq_task_queue_active_dedup_key", "dedup_key", unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
 
+class StorageOutbox(Base):
+    """A staged file waiting to be written to object storage by the worker (see storage_outbox.py)."""
+    __tablename__ = "storage_outbox"
 
+    id = Column(Integer, primary_key=True, index=True)
+    resume_id = Column(Integer, ForeignKey("resumes.resume_id", ondelete="CASCADE"), nullable=False, index=True)
+    object_key = Column(String, nullable=False)  # Path in the bucket
+    staging_path = Column(String, nullable=False)  # File in STORAGE_STAGING_DIR
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
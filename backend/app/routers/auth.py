@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
 import jwt
 from datetime import datetime, timedelta
 import os
@@ -9,11 +8,11 @@ from dotenv import load_dotenv
 
 from app.database import get_db
 from app.models import User
+from app.services.password_hasher import password_hasher
 
 load_dotenv()
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 DEFAULT_SECRET = "dev-nextauth-secret-change-me"
 JWT_SECRET = os.getenv("NEXTAUTH_SECRET", DEFAULT_SECRET)
 if JWT_SECRET == DEFAULT_SECRET:
@@ -37,16 +36,6 @@ class AuthResponse(BaseModel):
     user: dict
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    return pwd_context.hash(password)
-
-
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """Create a JWT token."""
     to_encode = data.copy()
@@ -90,7 +79,7 @@ async def register(
         
         # Create new user
         print(f"Hashing password of length: {len(user_data.password)}")
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
         user = User(
             email=user_data.email.strip().lower(),
             name=user_data.name.strip() if user_data.name else None,
@@ -156,12 +145,22 @@ async def login(
             )
         
         # Verify password (stored in auth_provider_id for custom auth)
-        if not verify_password(login_data.password, user.auth_provider_id):
+        valid, new_hash = await password_hasher.verify_and_update(login_data.password, user.auth_provider_id)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password",
             )
         
+        # The hash uses an outdated bcrypt cost (BCRYPT_ROUNDS changed); store it with the current one
+        if new_hash:
+            try:
+                user.auth_provider_id = new_hash
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Failed to rehash password for user {user.user_id}: {str(e)}")
+        
         # Create JWT token
         token_data = {
             "sub": str(user.user_id),
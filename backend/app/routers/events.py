@@ -0,0 +1,56 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.auth import verify_token
+from app.models import User
+from app.services.event_bus import event_bus
+from app.utils.sse import format_sse, SSE_HEADERS
+
+router = APIRouter()
+
+# Comment frames keep idle connections open through proxies and detect disconnects
+KEEPALIVE_SECONDS = 15.0
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_user: dict = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    """
+    Server-Sent Events stream of the current user's job events
+    (embedding_stored, score_computed, recruiter_message_ready, improvements_ready,
+    recommendations_failed) and resume rescoring progress (rescore_progress,
+    rescore_complete). Each event is sent with its type as the SSE event name.
+    """
+    user = db.query(User).filter(User.email == current_user["email"]).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user_id = user.user_id
+    # Don't hold a pooled DB connection for the lifetime of the stream
+    db.close()
+
+    return StreamingResponse(
+        _sse_event_stream(request, user_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+async def _sse_event_stream(request: Request, user_id: int):
+    queue = event_bus.subscribe(user_id)
+    try:
+        yield format_sse({"user_id": user_id}, event="ready")
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event, event=event.get("type"))
+    finally:
+        event_bus.unsubscribe(user_id, queue)
@@ -1,126 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.auth import verify_token
-from app.models import User, Job, JobEmbedding, Recommendation, Resume, UserSettings, Bullet
+from app.models import User, Job, JobEmbedding, Recommendation, Resume
 from app.services.embedding_service import embedding_service
-from app.services.llm_service import llm_service
+from app.services.event_bus import publish_event, EVENT_EMBEDDING_STORED, EVENT_SCORE_COMPUTED
+from app.services.recommendation_service import schedule_initial_recommendations, RECOMMENDATION_KIND_INITIAL
+from app.services.rescoring_service import best_resumes_for_jobs
+from app.utils.single_flight import SingleFlight
 
 router = APIRouter()
 
-
-async def generate_initial_recommendations(
-    db: Session,
-    user_id: int,
-    job_id: int,
-    resume_id: int,
-    job_title: str,
-    job_company: str | None,
-    job_description: str
-):
-    """Generate initial recommendations when job is created with linked resume."""
-    try:
-        # Get fresh DB session for background task
-        from app.database import SessionLocal
-        local_db = SessionLocal()
-        
-        try:
-            # Get resume
-            resume = local_db.query(Resume).filter(
-                Resume.resume_id == resume_id,
-                Resume.user_id == user_id
-            ).first()
-            
-            if not resume:
-                return
-            
-            # Get user settings for API keys
-            settings = local_db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
-            provider = settings.ai_provider if settings else None
-            api_key = settings.api_key if settings else None
-            model = settings.model_preference if settings else None
-            
-            if not api_key:
-                # Skip if no API key configured
-                return
-            
-            # Generate recruiter message
-            parsed_data = resume.parsed_json or {}
-            candidate_summary = f"Professional with experience in {parsed_data.get('sections', {}).get('experience', 'various roles')[:200]}"
-            if parsed_data.get("experience_count"):
-                candidate_summary += f" ({parsed_data['experience_count']} positions)"
-            
-            recruiter_msg = None
-            try:
-                recruiter_msg = await llm_service.generate_recruiter_message(
-                    candidate_summary=candidate_summary,
-                    job_title=job_title,
-                    company=job_company or "the company",
-                    recipient_name=None,
-                    provider=provider,
-                    api_key=api_key,
-                    model=model
-                )
-            except Exception as e:
-                print(f"Failed to generate recruiter message: {str(e)}")
-            
-            # Generate resume improvements
-            improvements = []
-            try:
-                bullets = local_db.query(Bullet).filter(
-                    Bullet.resume_id == resume_id,
-                    Bullet.section == "Work Experience"
-                ).all()
-                
-                if bullets:
-                    job_text = job_description.lower()
-                    job_requirements = []
-                    common_skills = ["python", "javascript", "java", "react", "aws", "docker", "kubernetes", "sql", "machine learning", "data science"]
-                    for skill in common_skills:
-                        if skill in job_text:
-                            job_requirements.append(skill.title())
-                    
-                    num_to_improve = max(1, min(3, len(bullets)))
-                    for bullet in bullets[:num_to_improve]:
-                        try:
-                            improved_text = await llm_service.improve_resume_bullet(
-                                bullet.text,
-                                job_requirements,
-                                job_title,
-                                provider=provider,
-                                api_key=api_key,
-                                model=model
-                            )
-                            improvements.append({
-                                "original_bullet": bullet.text,
-                                "improved_bullet": improved_text,
-                            })
-                        except:
-                            improvements.append({
-                                "original_bullet": bullet.text,
-                                "improved_bullet": bullet.text,
-                            })
-            except Exception as e:
-                print(f"Failed to generate improvements: {str(e)}")
-            
-            # Save to Recommendation table
-            if recruiter_msg or improvements:
-                recommendation = Recommendation(
-                    user_id=user_id,
-                    job_id=job_id,
-                    resume_id=resume_id,
-                    recruiter_message_text=recruiter_msg,
-                    improved_resume_json={"improvements": improvements} if improvements else None,
-                )
-                local_db.add(recommendation)
-                local_db.commit()
-        finally:
-            local_db.close()
-    except Exception as e:
-        print(f"Error in background recommendation generation: {str(e)}")
+# Tabs and double-fired requests ask for the same score at once; compute it once per user/pair
+match_score_flight = SingleFlight(
+    "match_score",
+    key_func=lambda current_user, resume_id, job_id: (current_user["email"], resume_id, job_id),
+)
 
 
 class JobSubmitRequest(BaseModel):
@@ -147,6 +46,9 @@ class JobListItem(BaseModel):
     resume_id: Optional[int]
     posted_at: str
     match_score: Optional[float] = None
+    # Best-fitting of the user's resumes, from batch rescoring
+    suggested_resume_id: Optional[int] = None
+    suggested_resume_score: Optional[float] = None
 
 
 class JobDetail(BaseModel):
@@ -161,12 +63,13 @@ class JobDetail(BaseModel):
     recruiter_message: Optional[str] = None
     referral_message: Optional[str] = None
     resume_suggestions: Optional[dict] = None
+    suggested_resume_id: Optional[int] = None
+    suggested_resume_score: Optional[float] = None
 
 
 @router.post("/submit", response_model=JobSubmitResponse)
 async def submit_job(
     job_data: JobSubmitRequest,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(verify_token),
     db: Session = Depends(get_db),
 ):
@@ -209,12 +112,28 @@ async def submit_job(
         )
         db.add(job_embedding)
         db.commit()
+        publish_event(user.user_id, EVENT_EMBEDDING_STORED, job.job_id)
+
+        # With a linked resume the semantic match score is available right away
+        if job_data.resume_id:
+            from app.models import ResumeEmbedding
+            resume_embedding = db.query(ResumeEmbedding).join(
+                Resume, Resume.resume_id == ResumeEmbedding.resume_id
+            ).filter(
+                ResumeEmbedding.resume_id == job_data.resume_id,
+                ResumeEmbedding.section == "full",
+                Resume.user_id == user.user_id
+            ).first()
+            if resume_embedding and resume_embedding.embedding:
+                semantic_score = embedding_service.cosine_similarity(resume_embedding.embedding, embedding)
+                match_score = round(max(0, min(100, semantic_score * 100)), 1)
+                publish_event(user.user_id, EVENT_SCORE_COMPUTED, job.job_id, match_score=match_score)
     except Exception as e:
         print(f"Failed to create job embedding: {str(e)}")
         # Continue without embedding
     
-    # If resume is linked, generate initial recommendations (messages and suggestions) in background
-    # We'll do this asynchronously so job creation doesn't block
+    # If resume is linked, generate initial recommendations (messages and suggestions)
+    # on the durable task queue so job creation doesn't block and work survives restarts
     if job_data.resume_id:
         try:
             # Verify resume belongs to user
@@ -224,17 +143,7 @@ async def submit_job(
             ).first()
             
             if resume:
-                # Schedule background task to generate recommendations
-                background_tasks.add_task(
-                    generate_initial_recommendations,
-                    db,
-                    user.user_id,
-                    job.job_id,
-                    job_data.resume_id,
-                    job.title,
-                    job.company,
-                    job.description_text
-                )
+                schedule_initial_recommendations(db, user.user_id, job.job_id, job_data.resume_id)
         except Exception as e:
             print(f"Error scheduling recommendation generation: {str(e)}")
             # Continue without recommendations
@@ -247,9 +156,33 @@ async def get_match_score(
     resume_id: int,
     job_id: int,
     current_user: dict = Depends(verify_token),
-    db: Session = Depends(get_db),
 ):
-    """Calculate job fit score between resume and job description."""
+    """
+    Calculate job fit score between resume and job description.
+    Concurrent identical requests share one computation.
+    """
+    return await match_score_flight.do(
+        match_score_flight.key(current_user, resume_id, job_id),
+        lambda: _compute_match_score(resume_id, job_id, current_user),
+    )
+
+
+async def _compute_match_score(resume_id: int, job_id: int, current_user: dict) -> dict:
+    # DB and numpy work are blocking: run them in a thread so the shared computation stays
+    # pending (and joinable by identical requests) without stalling the event loop
+    return await asyncio.to_thread(_match_score_in_session, resume_id, job_id, current_user)
+
+
+def _match_score_in_session(resume_id: int, job_id: int, current_user: dict) -> dict:
+    # Own session: the shared computation can outlive the request that started it
+    db = SessionLocal()
+    try:
+        return _match_score(db, resume_id, job_id, current_user)
+    finally:
+        db.close()
+
+
+def _match_score(db: Session, resume_id: int, job_id: int, current_user: dict) -> dict:
     from app.models import Resume, ResumeEmbedding
     from sqlalchemy import func
     import numpy as np
@@ -368,6 +301,7 @@ async def get_jobs(
         raise HTTPException(status_code=404, detail="User not found")
     
     jobs = db.query(Job).filter(Job.user_id == user.user_id).order_by(Job.posted_at.desc()).all()
+    best_resumes = best_resumes_for_jobs(db, user.user_id, [job.job_id for job in jobs])
     
     result = []
     for job in jobs:
@@ -393,6 +327,7 @@ async def get_jobs(
             except:
                 pass
         
+        best = best_resumes.get(job.job_id)
         result.append(JobListItem(
             job_id=job.job_id,
             title=job.title,
@@ -401,6 +336,8 @@ async def get_jobs(
             resume_id=job.resume_id,
             posted_at=job.posted_at.isoformat() if job.posted_at else "",
             match_score=match_score,
+            suggested_resume_id=best.resume_id if best else None,
+            suggested_resume_score=best.score if best else None,
         ))
     
     return result
@@ -513,16 +450,20 @@ async def get_job_details(
     resume_suggestions = None
     
     if job.resume_id:
+        # Latest generation for the current inputs (older input hashes are superseded)
         recommendation = db.query(Recommendation).filter(
             Recommendation.job_id == job_id,
-            Recommendation.resume_id == job.resume_id
-        ).first()
+            Recommendation.resume_id == job.resume_id,
+            Recommendation.kind == RECOMMENDATION_KIND_INITIAL
+        ).order_by(Recommendation.created_at.desc(), Recommendation.id.desc()).first()
         
         if recommendation:
             recruiter_message = recommendation.recruiter_message_text
             referral_message = recommendation.referral_message_text
             resume_suggestions = recommendation.improved_resume_json
     
+    best = best_resumes_for_jobs(db, user.user_id, [job.job_id]).get(job.job_id)
+    
     return JobDetail(
         job_id=job.job_id,
         title=job.title,
@@ -535,5 +476,7 @@ async def get_job_details(
         recruiter_message=recruiter_message,
         referral_message=referral_message,
         resume_suggestions=resume_suggestions,
+        suggested_resume_id=best.resume_id if best else None,
+        suggested_resume_score=best.score if best else None,
     )
 
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.database import get_db
 from app.auth import verify_token
-from app.models import User, Resume, Job, UserSettings
+from app.models import User, Resume, Job
 from app.services.llm_service import llm_service
+from app.services.settings_cache import get_llm_options
+from app.utils.sse import format_sse, SSE_HEADERS
+from app.utils.disconnect import run_until_disconnect, work_scope, disconnect_metrics
 
 router = APIRouter()
 
@@ -30,13 +36,8 @@ class MessageResponse(BaseModel):
     email_sent: bool = False
 
 
-@router.post("/recruiter", response_model=MessageResponse)
-async def generate_recruiter_message(
-    request: RecruiterMessageRequest,
-    current_user: dict = Depends(verify_token),
-    db: Session = Depends(get_db),
-):
-    """Generate a LinkedIn message for a recruiter."""
+def _get_message_context(db: Session, current_user: dict, resume_id: int, job_id: int) -> dict:
+    """Load the user, resume, job and LLM settings needed to draft a message."""
     # Get user
     user = db.query(User).filter(User.email == current_user["email"]).first()
     if not user:
@@ -44,14 +45,14 @@ async def generate_recruiter_message(
     
     # Get resume and job
     resume = db.query(Resume).filter(
-        Resume.resume_id == request.resume_id,
+        Resume.resume_id == resume_id,
         Resume.user_id == user.user_id
     ).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
     job = db.query(Job).filter(
-        Job.job_id == request.job_id,
+        Job.job_id == job_id,
         Job.user_id == user.user_id
     ).first()
     if not job:
@@ -64,28 +65,45 @@ async def generate_recruiter_message(
     if parsed_data.get("experience_count"):
         candidate_summary += f" ({parsed_data['experience_count']} positions)"
     
-    # Get user settings
-    settings = db.query(UserSettings).filter(UserSettings.user_id == user.user_id).first()
-    provider = settings.ai_provider if settings else None
-    api_key = settings.api_key if settings else None
-    model = settings.model_preference if settings else None
+    return {
+        "user": user,
+        "job": job,
+        "candidate_summary": candidate_summary,
+        "llm_options": get_llm_options(db, user.user_id),  # Cached (see settings_cache)
+    }
 
-    try:
+
+@router.post("/recruiter", response_model=MessageResponse)
+async def generate_recruiter_message(
+    request: RecruiterMessageRequest,
+    http_request: Request,
+    background: bool = False,
+    current_user: dict = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    """
+    Generate a LinkedIn message for a recruiter.
+    The LLM call is cancelled if the client disconnects, unless `background` is set.
+    """
+    context = _get_message_context(db, current_user, request.resume_id, request.job_id)
+    user = context["user"]
+    job = context["job"]
+
+    async def generate() -> MessageResponse:
         message = await llm_service.generate_recruiter_message(
-            candidate_summary=candidate_summary,
+            candidate_summary=context["candidate_summary"],
             job_title=job.title,
             company=job.company or "the company",
             recipient_name=request.recipient_name,
-            provider=provider,
-            api_key=api_key,
-            model=model
+            **context["llm_options"]
         )
         
         # Send email if recipient email is provided
         email_sent = False
         if request.recipient_email:
             subject = f"Application for {job.title} at {job.company or 'your company'}"
-            email_sent = send_email(
+            email_sent = await asyncio.to_thread(
+                send_email,
                 to_email=request.recipient_email,
                 subject=subject,
                 body=message,
@@ -93,6 +111,11 @@ async def generate_recruiter_message(
             )
         
         return MessageResponse(message=message, email_sent=email_sent)
+
+    try:
+        return await run_until_disconnect(http_request, generate(), "message.recruiter", continue_in_background=background)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -100,6 +123,77 @@ async def generate_recruiter_message(
         )
 
 
+@router.post("/recruiter/stream")
+async def stream_recruiter_message(
+    request: RecruiterMessageRequest,
+    current_user: dict = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream a LinkedIn message for a recruiter as Server-Sent Events.
+    Emits `token` events as text arrives, then a final `done` event with the full message.
+    """
+    context = _get_message_context(db, current_user, request.resume_id, request.job_id)
+    user = context["user"]
+    job = context["job"]
+
+    chunks = llm_service.stream_recruiter_message(
+        candidate_summary=context["candidate_summary"],
+        job_title=job.title,
+        company=job.company or "the company",
+        recipient_name=request.recipient_name,
+        **context["llm_options"]
+    )
+
+    async def on_complete(message: str) -> dict:
+        # Send email once the full message is available (smtplib blocks: keep it off the event loop)
+        email_sent = False
+        if request.recipient_email:
+            subject = f"Application for {job.title} at {job.company or 'your company'}"
+            email_sent = await asyncio.to_thread(
+                send_email,
+                to_email=request.recipient_email,
+                subject=subject,
+                body=message,
+                from_email=user.email,
+            )
+        return {"message": message, "email_sent": email_sent}
+
+    return StreamingResponse(
+        _sse_message_stream(chunks, "message.recruiter.stream", on_complete),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+async def _sse_message_stream(chunks, endpoint: str, on_complete=None):
+    """
+    Relay message chunks as SSE `token` events followed by `done` (or `error`).
+    Starlette cancels the stream when the client disconnects, which closes the provider stream.
+    """
+    parts = []
+    scope = {"llm_calls_cancelled": 0, "estimated_cost_avoided_usd": 0.0}
+    work_scope.set(scope)
+    started = time.monotonic()
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield format_sse({"text": chunk}, event="token")
+    except (asyncio.CancelledError, GeneratorExit):
+        # Close the provider stream now (not at garbage collection) so the cancellation is counted
+        await chunks.aclose()
+        disconnect_metrics.record(endpoint, "cancelled", scope, time.monotonic() - started)
+        raise
+    except Exception as e:
+        yield format_sse({"detail": f"Failed to generate message: {str(e)}"}, event="error")
+        return
+    
+    disconnect_metrics.record(endpoint, "completed")
+    message = "".join(parts)
+    result = await on_complete(message) if on_complete else {"message": message, "email_sent": False}
+    yield format_sse(result, event="done")
+
+
 def send_email(to_email: str, subject: str, body: str, from_email: str = None) -> bool:
     """Send email using SMTP or email service."""
     import smtplib
@@ -142,60 +236,66 @@ def send_email(to_email: str, subject: str, body: str, from_email: str = None) -
 @router.post("/referral", response_model=MessageResponse)
 async def generate_referral_message(
     request: ReferralMessageRequest,
+    http_request: Request,
+    background: bool = False,
     current_user: dict = Depends(verify_token),
     db: Session = Depends(get_db),
 ):
-    """Generate a LinkedIn message asking for a referral."""
-    # Get user
-    user = db.query(User).filter(User.email == current_user["email"]).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Get resume and job
-    resume = db.query(Resume).filter(
-        Resume.resume_id == request.resume_id,
-        Resume.user_id == user.user_id
-    ).first()
-    if not resume:
-        raise HTTPException(status_code=404, detail="Resume not found")
-    
-    job = db.query(Job).filter(
-        Job.job_id == request.job_id,
-        Job.user_id == user.user_id
-    ).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    # Create candidate summary from resume
-    parsed_data = resume.parsed_json or {}
-    candidate_summary = f"Professional with experience in {parsed_data.get('sections', {}).get('experience', 'various roles')[:200]}"
-    
-    if parsed_data.get("experience_count"):
-        candidate_summary += f" ({parsed_data['experience_count']} positions)"
-    
-    # Get user settings
-    settings = db.query(UserSettings).filter(UserSettings.user_id == user.user_id).first()
-    provider = settings.ai_provider if settings else None
-    api_key = settings.api_key if settings else None
-    model = settings.model_preference if settings else None
+    """
+    Generate a LinkedIn message asking for a referral.
+    The LLM call is cancelled if the client disconnects, unless `background` is set.
+    """
+    context = _get_message_context(db, current_user, request.resume_id, request.job_id)
+    job = context["job"]
 
     try:
-        message = await llm_service.generate_referral_message(
-            candidate_summary=candidate_summary,
-            job_title=job.title,
-            company=job.company or "the company",
-            contact_name=request.contact_name,
-            contact_role=request.contact_role,
-            connection=request.connection,
-            provider=provider,
-            api_key=api_key,
-            model=model
+        message = await run_until_disconnect(
+            http_request,
+            llm_service.generate_referral_message(
+                candidate_summary=context["candidate_summary"],
+                job_title=job.title,
+                company=job.company or "the company",
+                contact_name=request.contact_name,
+                contact_role=request.contact_role,
+                connection=request.connection,
+                **context["llm_options"]
+            ),
+            "message.referral",
+            continue_in_background=background,
         )
         
         return MessageResponse(message=message, email_sent=False)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate message: {str(e)}"
         )
 
+
+@router.post("/referral/stream")
+async def stream_referral_message(
+    request: ReferralMessageRequest,
+    current_user: dict = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    """Stream a LinkedIn referral request message as Server-Sent Events."""
+    context = _get_message_context(db, current_user, request.resume_id, request.job_id)
+    job = context["job"]
+
+    chunks = llm_service.stream_referral_message(
+        candidate_summary=context["candidate_summary"],
+        job_title=job.title,
+        company=job.company or "the company",
+        contact_name=request.contact_name,
+        contact_role=request.contact_role,
+        connection=request.connection,
+        **context["llm_options"]
+    )
+
+    return StreamingResponse(
+        _sse_message_stream(chunks, "message.referral.stream"),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
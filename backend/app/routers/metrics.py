@@ -0,0 +1,82 @@
+import hmac
+import os
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.auth import decode_token, security
+from app.services.llm_service import llm_service
+from app.utils.disconnect import disconnect_metrics
+from app.utils.single_flight import single_flight_stats
+from app.services.parsing_pool import resume_parsing_pool
+from app.services.request_rate_limiter import request_rate_limiter
+from app.services.settings_cache import settings_cache
+
+load_dotenv()
+
+# Comma-separated emails allowed to read /api/metrics/*
+METRICS_ADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("METRICS_ADMIN_EMAILS", "").split(",") if email.strip()
+}
+# Static bearer token for scrapers (e.g. Prometheus), which can't log in; unset disables it
+METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN", "")
+
+
+async def verify_metrics_access(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Metrics expose per-key limiter state, user model choices and costs: admins and scrapers only."""
+    token = credentials.credentials
+    if METRICS_SCRAPE_TOKEN and hmac.compare_digest(token.encode(), METRICS_SCRAPE_TOKEN.encode()):
+        return
+    email = decode_token(token).get("email")
+    if not email or email.lower() not in METRICS_ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Metrics are not enabled for this account")
+
+
+router = APIRouter(dependencies=[Depends(verify_metrics_access)])
+
+
+@router.get("/llm")
+async def get_llm_metrics():
+    """LLM provider metrics: rate limiting, hedging, routing, latency, per-call telemetry and disconnects."""
+    return {
+        "rate_limits": llm_service.rate_limiter.stats(),
+        "hedging": llm_service.hedge_stats(),
+        "routing": llm_service.router.stats(),
+        "latency": llm_service.latency.summary(),
+        "calls": llm_service.telemetry.snapshot(),
+        "disconnects": disconnect_metrics.stats(),
+    }
+
+
+@router.get("/llm/prometheus", response_class=PlainTextResponse)
+async def get_llm_metrics_prometheus():
+    """Per-call LLM telemetry histograms and counters in Prometheus text format."""
+    return PlainTextResponse(
+        llm_service.telemetry.prometheus_text(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@router.get("/coalescing")
+async def get_coalescing_metrics():
+    """Single-flight request coalescing: executed, coalesced and reused computations per route."""
+    return single_flight_stats()
+
+
+@router.get("/parsing")
+async def get_parsing_metrics():
+    """Resume parsing pool: parses completed, failed, timed out and crashed."""
+    return resume_parsing_pool.stats()
+
+
+@router.get("/rate-limits")
+async def get_rate_limit_metrics():
+    """Per-route request rate limiting: limits, allowed and limited (429) requests."""
+    return request_rate_limiter.stats()
+
+
+@router.get("/settings-cache")
+async def get_settings_cache_metrics():
+    """UserSettings cache: hits, misses, invalidations and size."""
+    return settings_cache.stats()
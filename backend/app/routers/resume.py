@@ -1,23 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
+import asyncio
 import uuid
 from datetime import datetime
 
 from app.database import get_db
 from app.auth import verify_token
-from app.models import User, Resume, Bullet, ResumeEmbedding, UserSettings
-from app.utils.resume_parser import parse_resume
+from app.models import User, Resume, Bullet, ResumeEmbedding
+from app.services.parsing_pool import resume_parsing_pool
+from app.services.bulk_import import bulk_import_pipeline, is_bulk_import_admin, BULK_IMPORT_MAX_BYTES, BULK_IMPORT_MAX_FILES
+from app.services.storage_outbox import add_resume_upload, discard_staged, stage_file
 from app.services.storage_service import storage_service
 from app.services.embedding_service import embedding_service
+from app.services.rescoring_service import schedule_rescore
+from app.services.resume_service import copy_resume_artifacts, find_cached_resume
+from app.services.settings_cache import get_llm_options
+from app.utils.disconnect import run_until_disconnect
+from app.utils.upload_stream import receive_upload, receive_uploads, StreamedUpload, MAX_RESUME_BYTES
+from app.utils.sse import format_sse, SSE_HEADERS
+from app.utils.single_flight import SingleFlight
 from pydantic import BaseModel
 
 router = APIRouter()
 
+# Identical concurrent /improve calls (double-fired requests, several tabs) share one set of LLM calls
+improve_flight = SingleFlight(
+    "resume_improve",
+    key_func=lambda email, resume_id, job_id, ai_content_percentage: (email, resume_id, job_id, ai_content_percentage),
+)
+
 
 class ResumeUploadResponse(BaseModel):
     resume_id: int
     parse_summary: dict
+    from_cache: bool = False  # True if an identical file was already parsed and embedded
 
 
 class ResumeListItem(BaseModel):
@@ -25,6 +44,7 @@ class ResumeListItem(BaseModel):
     file_path: str
     uploaded_at: str
     name: str | None = None
+    download_url: str | None = None  # Signed, valid for at least SIGNED_URL_MIN_REMAINING_SECONDS
 
 
 @router.get("/list", response_model=List[ResumeListItem])
@@ -39,6 +59,13 @@ async def list_resumes(
     
     resumes = db.query(Resume).filter(Resume.user_id == user.user_id).order_by(Resume.uploaded_at.desc()).all()
     
+    # One signing call for the whole list (cached URLs are reused)
+    try:
+        download_urls = await asyncio.to_thread(storage_service.get_file_urls, [resume.file_path for resume in resumes])
+    except Exception as e:
+        print(f"Failed to sign resume download URLs: {str(e)}")
+        download_urls = {}
+    
     result = []
     for resume in resumes:
         parsed_data = resume.parsed_json or {}
@@ -47,37 +74,108 @@ async def list_resumes(
             file_path=resume.file_path,
             uploaded_at=resume.uploaded_at.isoformat() if resume.uploaded_at else "",
             name=parsed_data.get("name") or f"Resume {resume.resume_id}",
+            download_url=download_urls.get(resume.file_path),
         ))
     
     return result
 
 
-@router.post("/upload", response_model=ResumeUploadResponse)
+# The body is streamed by hand (see receive_upload), so describe the form for the docs
+RESUME_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["resume"],
+                    "properties": {"resume": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/upload", response_model=ResumeUploadResponse, openapi_extra=RESUME_UPLOAD_OPENAPI)
 async def upload_resume(
-    resume: UploadFile = File(...),
+    request: Request,
     current_user: dict = Depends(verify_token),
     db: Session = Depends(get_db),
 ):
-    """Upload and parse a resume file. Maximum 5 resumes per user."""
+    """
+    Upload and parse a resume file (multipart field `resume`). Maximum 5 resumes per user.
+    The file is streamed to disk and rejected with 413 as soon as it exceeds 5MB.
+    """
+    # Stream the body to a temp file, enforcing the size limit and hashing as it arrives
+    upload = await receive_upload(request, "resume", MAX_RESUME_BYTES)
+    try:
+        return await _process_resume_upload(upload, current_user, db)
+    finally:
+        upload.cleanup()
+
+
+def _upload_response(resume: Resume, from_cache: bool) -> ResumeUploadResponse:
+    parsed_data = resume.parsed_json or {}
+    return ResumeUploadResponse(
+        resume_id=resume.resume_id,
+        parse_summary={
+            "name": parsed_data.get("name"),
+            "email": parsed_data.get("email"),
+            "education_count": parsed_data.get("education_count", 0),
+            "experience_count": parsed_data.get("experience_count", 0),
+        },
+        from_cache=from_cache,
+    )
+
+
+def _create_bullets_and_embeddings(db: Session, resume_record: Resume, parsed_data: dict) -> bool:
+    """Embed the experience bullets and the full text of a freshly parsed resume. Returns True if the full embedding was stored."""
+    if parsed_data.get("experience_bullets"):
+        for idx, bullet_text in enumerate(parsed_data["experience_bullets"][:20]):
+            try:
+                embedding = embedding_service.encode_single(bullet_text)
+                bullet = Bullet(
+                    resume_id=resume_record.resume_id,
+                    section="Work Experience",
+                    text=bullet_text,
+                    embedding=embedding,
+                )
+                db.add(bullet)
+            except Exception as e:
+                print(f"Failed to create embedding for bullet {idx}: {str(e)}")
+                # Create bullet without embedding
+                bullet = Bullet(
+                    resume_id=resume_record.resume_id,
+                    section="Work Experience",
+                    text=bullet_text,
+                )
+                db.add(bullet)
+
+    # Create full resume embedding
+    if parsed_data.get("text_content"):
+        try:
+            full_embedding = embedding_service.encode_single(parsed_data["text_content"][:5000])  # Limit to 5000 chars
+            resume_embedding = ResumeEmbedding(
+                resume_id=resume_record.resume_id,
+                section="full",
+                embedding=full_embedding,
+            )
+            db.add(resume_embedding)
+            return True
+        except Exception as e:
+            print(f"Failed to create full resume embedding: {str(e)}")
+    return False
+
+
+async def _process_resume_upload(upload: StreamedUpload, current_user: dict, db: Session) -> ResumeUploadResponse:
     # Verify file type
-    if not resume.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
-    
-    if not (resume.filename.endswith(".pdf") or resume.filename.endswith(".docx")):
+    if not (upload.filename.endswith(".pdf") or upload.filename.endswith(".docx")):
         raise HTTPException(
             status_code=400, detail="Only PDF and DOCX files are supported"
         )
     
-    # Read file content
-    file_content = await resume.read()
-    
-    if len(file_content) > 5 * 1024 * 1024:  # 5MB limit
-        raise HTTPException(status_code=400, detail="File too large (max 5MB)")
-    
     try:
-        # Parse resume
-        parsed_data = parse_resume(file_content, resume.filename)
-        
         # Get or create user
         user = db.query(User).filter(User.email == current_user["email"]).first()
         if not user:
@@ -89,6 +187,13 @@ async def upload_resume(
             db.add(user)
             db.commit()
             db.refresh(user)
+
+        # Same file uploaded again (under any filename): return the existing resume as-is
+        existing = db.query(Resume).filter(
+            Resume.user_id == user.user_id, Resume.content_sha256 == upload.sha256
+        ).first()
+        if existing:
+            return _upload_response(existing, from_cache=True)
         
         # Check resume limit (max 5)
         existing_resumes_count = db.query(Resume).filter(Resume.user_id == user.user_id).count()
@@ -97,76 +202,70 @@ async def upload_resume(
                 status_code=400,
                 detail="Maximum 5 resumes allowed. Please delete an existing resume before uploading a new one."
             )
+
+        # Global parse cache: any processed resume with the same bytes has the same parse and embeddings
+        cached = find_cached_resume(db, upload.sha256)
+        if cached:
+            parsed_data = cached.parsed_json
+        else:
+            # Parse resume in a child process (bounded time and memory) so the event loop stays free.
+            # The parser opens the temp file by path; no copy of the document is held here.
+            parsed_data = await resume_parsing_pool.parse(upload.path, upload.filename)
         
-        # Generate unique file path
-        file_path = f"{user.user_id}/{uuid.uuid4()}_{resume.filename}"
-        
-        # Upload to storage
-        try:
-            storage_url = storage_service.upload_file(file_content, file_path)
-        except Exception as e:
-            # If storage fails, we can still proceed with database storage
-            print(f"Storage upload failed: {str(e)}")
-            storage_url = file_path
+        # Generate unique file path (the storage worker swaps in the storage URL once uploaded)
+        file_path = f"{user.user_id}/{uuid.uuid4()}_{upload.filename}"
         
         # Create resume record
         resume_record = Resume(
             user_id=user.user_id,
-            file_path=storage_url,
+            file_path=file_path,
             parsed_json=parsed_data,
             text_content=parsed_data.get("text_content", ""),
+            content_sha256=upload.sha256,
         )
         db.add(resume_record)
-        db.commit()
+        try:
+            db.flush()
+        except IntegrityError:
+            # A concurrent upload of the same file won the race; serve its resume
+            db.rollback()
+            existing = db.query(Resume).filter(
+                Resume.user_id == user.user_id, Resume.content_sha256 == upload.sha256
+            ).first()
+            if not existing:
+                raise
+            return _upload_response(existing, from_cache=True)
+
+        # The storage upload (worker, off the request path) commits with the resume or not at all
+        staging_path = await asyncio.to_thread(stage_file, upload.path)
+        try:
+            add_resume_upload(db, resume_record.resume_id, file_path, staging_path)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            discard_staged(staging_path)
+            raise
         db.refresh(resume_record)
         
-        # Create bullet records and generate embeddings
-        if parsed_data.get("experience_bullets"):
-            for idx, bullet_text in enumerate(parsed_data["experience_bullets"][:20]):
-                try:
-                    embedding = embedding_service.encode_single(bullet_text)
-                    bullet = Bullet(
-                        resume_id=resume_record.resume_id,
-                        section="Work Experience",
-                        text=bullet_text,
-                        embedding=embedding,
-                    )
-                    db.add(bullet)
-                except Exception as e:
-                    print(f"Failed to create embedding for bullet {idx}: {str(e)}")
-                    # Create bullet without embedding
-                    bullet = Bullet(
-                        resume_id=resume_record.resume_id,
-                        section="Work Experience",
-                        text=bullet_text,
-                    )
-                    db.add(bullet)
+        # Create bullet records and embeddings (copied from the cached resume when there is one)
+        if cached:
+            has_full_embedding = copy_resume_artifacts(db, cached, resume_record)
+        else:
+            has_full_embedding = _create_bullets_and_embeddings(db, resume_record, parsed_data)
         
-        # Create full resume embedding
-        if parsed_data.get("text_content"):
+        db.commit()
+
+        # Score the new resume against all existing jobs in the worker (progress via /api/events)
+        if has_full_embedding:
             try:
-                full_embedding = embedding_service.encode_single(parsed_data["text_content"][:5000])  # Limit to 5000 chars
-                resume_embedding = ResumeEmbedding(
-                    resume_id=resume_record.resume_id,
-                    section="full",
-                    embedding=full_embedding,
-                )
-                db.add(resume_embedding)
+                schedule_rescore(db, user.user_id, resume_record.resume_id)
             except Exception as e:
-                print(f"Failed to create full resume embedding: {str(e)}")
-        
-        db.commit()
+                print(f"Failed to schedule resume rescoring: {str(e)}")
         
-        return ResumeUploadResponse(
-            resume_id=resume_record.resume_id,
-            parse_summary={
-                "name": parsed_data.get("name"),
-                "email": parsed_data.get("email"),
-                "education_count": parsed_data.get("education_count", 0),
-                "experience_count": parsed_data.get("experience_count", 0),
-            },
-        )
+        return _upload_response(resume_record, from_cache=cached is not None)
     
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -174,17 +273,109 @@ async def upload_resume(
         raise HTTPException(status_code=500, detail=f"Failed to process resume: {str(e)}")
 
 
+BULK_IMPORT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/bulk-import", openapi_extra=BULK_IMPORT_OPENAPI)
+async def bulk_import_resumes(
+    request: Request,
+    current_user: dict = Depends(verify_token),
+):
+    """
+    Import a cohort of resumes (multipart field `files`: PDF/DOCX files and/or ZIP archives).
+    Each resume is assigned to the existing account matching the first email it contains
+    (no accounts are created; unmatched resumes fail). Progress is streamed as
+    SSE: `started`, one `file` event per resume as it finishes, then `complete`.
+    Restricted to BULK_IMPORT_ADMIN_EMAILS.
+    """
+    if not is_bulk_import_admin(current_user.get("email")):
+        raise HTTPException(status_code=403, detail="Bulk import is not enabled for this account")
+
+    uploads = await receive_uploads(
+        request, "files",
+        max_bytes=BULK_IMPORT_MAX_BYTES,
+        max_files=BULK_IMPORT_MAX_FILES,
+        max_total_bytes=BULK_IMPORT_MAX_BYTES,
+    )
+    files, rejected = await bulk_import_pipeline.extract(uploads)
+
+    return StreamingResponse(
+        _bulk_import_stream(files, rejected),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+async def _bulk_import_stream(files: List[StreamedUpload], rejected: List[dict]):
+    counts = {"imported": 0, "duplicate": 0, "failed": 0}
+    try:
+        yield format_sse({"total": len(files) + len(rejected), "accepted": len(files)}, event="started")
+        for result in rejected:
+            counts[result["status"]] += 1
+            yield format_sse(result, event="file")
+        async for result in bulk_import_pipeline.run(files):
+            counts[result["status"]] += 1
+            yield format_sse(result, event="file")
+    except Exception as e:
+        print(f"Bulk import failed: {str(e)}")
+        yield format_sse({"detail": f"Bulk import failed: {str(e)}", **counts}, event="error")
+        return
+    finally:
+        for upload in files:
+            upload.cleanup()
+    yield format_sse(counts, event="complete")
+
+
+@router.post("/{resume_id}/rescore")
+async def rescore_resume(
+    resume_id: int,
+    current_user: dict = Depends(verify_token),
+    db: Session = Depends(get_db),
+):
+    """Re-run batch scoring of a resume against all of the user's jobs (e.g. after relinking)."""
+    user = db.query(User).filter(User.email == current_user["email"]).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    resume = db.query(Resume).filter(
+        Resume.resume_id == resume_id, Resume.user_id == user.user_id
+    ).first()
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    task = schedule_rescore(db, user.user_id, resume_id)
+    return {"resume_id": resume_id, "task_id": task.id, "status": task.status}
+
+
 @router.post("/improve")
 async def improve_resume(
+    request: Request,
     resume_id: int,
     job_id: int,
     ai_content_percentage: int = 50,
+    background: bool = False,
     current_user: dict = Depends(verify_token),
     db: Session = Depends(get_db),
 ):
-    """Generate improved resume suggestions."""
+    """
+    Generate improved resume suggestions.
+    LLM calls are cancelled if the client disconnects, unless `background` is set.
+    Concurrent identical requests share one generation.
+    """
     from app.models import Job
-    from app.services.llm_service import llm_service
     
     # Get resume and job
     user = db.query(User).filter(User.email == current_user["email"]).first()
@@ -225,33 +416,51 @@ async def improve_resume(
     num_to_improve = max(1, int(len(bullets) * (ai_content_percentage / 100)))
     bullets_to_improve = bullets[:num_to_improve]
     
-    # Get user settings
-    settings = db.query(UserSettings).filter(UserSettings.user_id == user.user_id).first()
-    provider = settings.ai_provider if settings else None
-    api_key = settings.api_key if settings else None
-    model = settings.model_preference if settings else None
+    # Get user settings (cached, see settings_cache)
+    llm_options = get_llm_options(db, user.user_id)
+
+    bullet_texts = [bullet.text for bullet in bullets_to_improve]
+    return await run_until_disconnect(
+        request,
+        improve_flight.do(
+            improve_flight.key(user.email, resume_id, job_id, ai_content_percentage),
+            lambda: _generate_improvements(resume_id, bullet_texts, job_requirements, job.title, ai_content_percentage, llm_options),
+        ),
+        "resume.improve",
+        continue_in_background=background,
+    )
+
+
+async def _generate_improvements(
+    resume_id: int,
+    bullet_texts: List[str],
+    job_requirements: List[str],
+    job_title: str,
+    ai_content_percentage: int,
+    llm_options: dict,
+) -> dict:
+    """Rewrite bullets (and optionally draft new ones) for /improve."""
+    from app.services.llm_service import llm_service, TASK_NEW_BULLET
 
     improvements = []
-    for bullet in bullets_to_improve:
+    for bullet_text in bullet_texts:
         try:
             improved_text = await llm_service.improve_resume_bullet(
-                bullet.text,
+                bullet_text,
                 job_requirements,
-                job.title,
-                provider=provider,
-                api_key=api_key,
-                model=model
+                job_title,
+                **llm_options
             )
             improvements.append({
-                "original_bullet": bullet.text,
+                "original_bullet": bullet_text,
                 "improved_bullet": improved_text,
             })
         except Exception as e:
             print(f"Error improving bullet: {str(e)}")
             # Include original if improvement fails
             improvements.append({
-                "original_bullet": bullet.text,
-                "improved_bullet": bullet.text,
+                "original_bullet": bullet_text,
+                "improved_bullet": bullet_text,
             })
     
     # Optionally generate new bullets if percentage is high
@@ -264,9 +473,8 @@ async def improve_resume(
             new_bullet = await llm_service.generate_text(
                 new_bullet_prompt, 
                 max_tokens=100,
-                provider=provider,
-                api_key=api_key,
-                model=model
+                task=TASK_NEW_BULLET,
+                **llm_options
             )
             if new_bullet:
                 new_bullets.append(new_bullet.strip())
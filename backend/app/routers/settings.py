@@ -6,7 +6,8 @@ from typing import Optional
 from app.database import get_db
 from app.auth import verify_token
 from app.models import User, UserSettings
-from app.services.llm_service import llm_service
+from app.services.llm_service import llm_service, LLMProviderError, LLMRateLimitError, TASK_CONNECTION_TEST
+from app.services.settings_cache import settings_cache, get_user_settings, DEFAULT_AI_PROVIDER, DEFAULT_MODEL_PREFERENCE
 
 router = APIRouter()
 
@@ -15,6 +16,10 @@ class SettingsUpdate(BaseModel):
     ai_provider: str
     api_key: Optional[str] = None
     model_preference: Optional[str] = None
+    fallback_provider: Optional[str] = None
+    fallback_api_key: Optional[str] = None
+    fallback_model: Optional[str] = None
+    hedge_requests: Optional[bool] = None
 
 
 class TestConnectionRequest(BaseModel):
@@ -27,6 +32,31 @@ class SettingsResponse(BaseModel):
     ai_provider: str
     api_key_masked: Optional[str] = None
     model_preference: Optional[str] = None
+    fallback_provider: Optional[str] = None
+    fallback_api_key_masked: Optional[str] = None
+    fallback_model: Optional[str] = None
+    hedge_requests: bool = False
+
+
+def _mask_api_key(api_key: Optional[str]) -> Optional[str]:
+    """Mask an API key for display."""
+    if not api_key:
+        return None
+    if len(api_key) > 8:
+        return f"{api_key[:4]}...{api_key[-4:]}"
+    return "********"
+
+
+def _settings_response(settings) -> SettingsResponse:
+    return SettingsResponse(
+        ai_provider=settings.ai_provider,
+        api_key_masked=_mask_api_key(settings.api_key),
+        model_preference=settings.model_preference,
+        fallback_provider=settings.fallback_provider,
+        fallback_api_key_masked=_mask_api_key(settings.fallback_api_key),
+        fallback_model=settings.fallback_model,
+        hedge_requests=bool(settings.hedge_requests),
+    )
 
 
 @router.get("/", response_model=SettingsResponse)
@@ -39,28 +69,17 @@ async def get_settings(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    settings = db.query(UserSettings).filter(UserSettings.user_id == user.user_id).first()
+    settings = get_user_settings(db, user.user_id)
     
     if not settings:
         # Return defaults with best models
         return SettingsResponse(
-            ai_provider="openai",
-            model_preference="gpt-4-turbo-preview"
+            ai_provider=DEFAULT_AI_PROVIDER,
+            model_preference=DEFAULT_MODEL_PREFERENCE,
         )
     
-    # Mask API key for security
-    masked_key = None
-    if settings.api_key:
-        if len(settings.api_key) > 8:
-            masked_key = f"{settings.api_key[:4]}...{settings.api_key[-4:]}"
-        else:
-            masked_key = "********"
-            
-    return SettingsResponse(
-        ai_provider=settings.ai_provider,
-        api_key_masked=masked_key,
-        model_preference=settings.model_preference,
-    )
+    # Mask API keys for security
+    return _settings_response(settings)
 
 
 @router.put("/", response_model=SettingsResponse)
@@ -85,23 +104,22 @@ async def update_settings(
         settings.api_key = settings_update.api_key
     if settings_update.model_preference:
         settings.model_preference = settings_update.model_preference
+    if settings_update.fallback_provider is not None:
+        # An empty string clears the secondary provider
+        settings.fallback_provider = settings_update.fallback_provider or None
+        settings.fallback_model = settings_update.fallback_model or None
+    if settings_update.fallback_api_key:
+        settings.fallback_api_key = settings_update.fallback_api_key
+    if settings_update.hedge_requests is not None:
+        settings.hedge_requests = settings_update.hedge_requests
         
     db.commit()
     db.refresh(settings)
+    # Write through to the settings cache (and invalidate it on other replicas)
+    settings_cache.put(settings)
     
-    # Mask API key for response
-    masked_key = None
-    if settings.api_key:
-        if len(settings.api_key) > 8:
-            masked_key = f"{settings.api_key[:4]}...{settings.api_key[-4:]}"
-        else:
-            masked_key = "********"
-            
-    return SettingsResponse(
-        ai_provider=settings.ai_provider,
-        api_key_masked=masked_key,
-        model_preference=settings.model_preference,
-    )
+    # Mask API keys for response
+    return _settings_response(settings)
 
 
 @router.post("/test")
@@ -120,6 +138,9 @@ async def test_connection(
             provider=test_request.ai_provider,
             api_key=test_request.api_key,
             model=test_request.model_preference,
+            # Test exactly these credentials, without failing over to another provider
+            fallback=False,
+            task=TASK_CONNECTION_TEST,
         )
         
         if response and len(response.strip()) > 0:
@@ -135,18 +156,26 @@ async def test_connection(
     except ValueError as e:
         # Missing API key or invalid provider
         raise HTTPException(status_code=400, detail=str(e))
-    except RuntimeError as e:
+    except LLMRateLimitError as e:
+        # Still throttled after the service's own retries
+        headers = {"Retry-After": str(int(e.retry_after + 0.5))} if e.retry_after is not None else None
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded. Please try again later.",
+            headers=headers,
+        )
+    except LLMProviderError as e:
         # API error (invalid key, network issue, etc.)
         error_msg = str(e)
-        if "API key" in error_msg or "authentication" in error_msg.lower() or "unauthorized" in error_msg.lower():
+        if e.status_code in (401, 403) or "API key" in error_msg or "authentication" in error_msg.lower() or "unauthorized" in error_msg.lower():
             raise HTTPException(
                 status_code=401,
                 detail="Invalid API key. Please check your credentials."
             )
-        elif "rate limit" in error_msg.lower() or "quota" in error_msg.lower():
+        elif e.is_timeout:
             raise HTTPException(
-                status_code=429,
-                detail="Rate limit exceeded. Please try again later."
+                status_code=504,
+                detail=f"Connection timed out: {error_msg}"
             )
         else:
             raise HTTPException(
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.services.storage_backends import LocalStorageBackend, content_type
+from app.services.storage_service import storage_service
+
+router = APIRouter()
+
+
+@router.get("/{bucket}/{key:path}")
+async def download_file(bucket: str, key: str, expires: int, signature: str):
+    """
+    Serve a file from the local storage backend (STORAGE_BACKEND=local).
+    The link itself is the credential: it comes from the resume list's signed download_url
+    and is only valid until `expires`.
+    """
+    try:
+        backend = storage_service.backend
+    except RuntimeError:
+        backend = None
+    if not isinstance(backend, LocalStorageBackend):
+        raise HTTPException(status_code=404, detail="Not found")
+    try:
+        path = backend.signed_file(bucket, key, expires, signature)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="File not found")
+    # Keys are "<user_id>/<uuid>_<original filename>"
+    filename = key.rsplit("/", 1)[-1].split("_", 1)[-1]
+    return FileResponse(path, media_type=content_type(key), filename=filename)
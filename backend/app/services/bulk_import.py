@@ -0,0 +1,405 @@
+"""
+Bulk resume import (career-services cohort onboarding).
+
+Files flow through a staged pipeline connected by bounded queues:
+
+    extract (ZIP members / multipart files) -> parse (process pool) -> embed (batched)
+        -> insert (bulk, one transaction per batch)
+
+Each stage has its own concurrency limit. Parsing uses at most BULK_PARSE_CONCURRENCY of the
+shared parser pool's slots (default: half), so interactive uploads are never starved, and
+embeddings are computed for a whole batch of resumes in one model call. Every file yields a
+status as soon as it finishes (or fails) instead of waiting for the whole import. Files are
+staged on disk and written to storage afterwards by the worker, through the storage outbox
+(storage_outbox.py), whose rows and tasks commit with the batch.
+
+Imported resumes belong to the student whose email address is found in the resume (the
+first one, i.e. the contact line). Only existing accounts receive resumes: students sign in
+with a password, so an account created here would be locked out, and the email could belong
+to someone else named in the resume. Resumes without a matching account are reported as
+failed; the student registers and the file is imported again. The usual per-user rules
+apply: 5 resumes max, and a file the student already has is reported as a duplicate.
+"""
+import asyncio
+import os
+import tempfile
+import uuid
+import hashlib
+import zipfile
+from typing import AsyncIterator, Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Bullet, Resume, ResumeEmbedding, User
+from app.services.embedding_service import embedding_service
+from app.services.parsing_pool import resume_parsing_pool, PARSER_WORKERS
+from app.services.rescoring_service import schedule_rescore
+from app.services.resume_service import copy_resume_artifacts, find_cached_resume, with_embedding
+from app.services.storage_outbox import add_resume_upload, discard_staged, stage_file
+from app.utils.upload_stream import StreamedUpload, MAX_RESUME_BYTES, UPLOAD_TMP_DIR
+
+load_dotenv()
+
+BULK_IMPORT_MAX_FILES = int(os.getenv("BULK_IMPORT_MAX_FILES", "500"))
+BULK_IMPORT_MAX_BYTES = int(os.getenv("BULK_IMPORT_MAX_MB", "500")) * 1024 * 1024
+BULK_PARSE_CONCURRENCY = int(os.getenv("BULK_PARSE_CONCURRENCY", str(max(1, PARSER_WORKERS // 2))))
+BULK_EMBED_BATCH_SIZE = int(os.getenv("BULK_EMBED_BATCH_SIZE", "16"))  # Resumes per model call
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "50"))
+# Comma-separated emails allowed to run bulk imports
+BULK_IMPORT_ADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("BULK_IMPORT_ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
+MAX_RESUMES_PER_USER = 5
+RESUME_EXTENSIONS = (".pdf", ".docx")
+
+STATUS_IMPORTED = "imported"
+STATUS_DUPLICATE = "duplicate"
+STATUS_FAILED = "failed"
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+
+def is_bulk_import_admin(email: str) -> bool:
+    return bool(email) and email.lower() in BULK_IMPORT_ADMIN_EMAILS
+
+
+class BulkImportItem:
+    """One resume file moving through the pipeline."""
+
+    def __init__(self, upload: StreamedUpload):
+        self.upload = upload
+        self.parsed: Optional[dict] = None
+        self.cached_resume_id: Optional[int] = None  # Identical file already processed (see resume_service)
+        self.bullet_embeddings: List[Optional[List[float]]] = []
+        self.full_embedding: Optional[List[float]] = None
+        self.resume_id: Optional[int] = None
+        self.user_id: Optional[int] = None
+        self.staging_path: Optional[str] = None  # Staged copy for the storage outbox (see storage_outbox.py)
+
+    def result(self, status: str, error: str = None, **fields) -> dict:
+        result = {"filename": self.upload.filename, "status": status, "resume_id": self.resume_id}
+        if self.parsed is not None:
+            result["email"] = self.parsed.get("email")
+        if error:
+            result["error"] = error
+        result.update(fields)
+        return result
+
+
+def _extract_zip_members(archive: StreamedUpload, max_files: int) -> tuple[List[StreamedUpload], List[dict]]:
+    """Blocking: write each resume in a ZIP to its own temp file. Returns (files, rejected results)."""
+    files: List[StreamedUpload] = []
+    rejected: List[dict] = []
+    try:
+        with zipfile.ZipFile(archive.path) as zip_file:
+            for info in zip_file.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or name.startswith(".") or "__MACOSX/" in info.filename:
+                    continue
+                if not name.lower().endswith(RESUME_EXTENSIONS):
+                    rejected.append({"filename": name, "status": STATUS_FAILED, "error": "Only PDF and DOCX files are supported"})
+                    continue
+                if len(files) >= max_files:
+                    rejected.append({"filename": name, "status": STATUS_FAILED, "error": f"Import is limited to {max_files} files"})
+                    continue
+                if info.file_size > MAX_RESUME_BYTES:
+                    rejected.append({"filename": name, "status": STATUS_FAILED, "error": "File too large (max 5MB)"})
+                    continue
+                # The header size can lie (zip bombs); enforce the limit on the bytes actually inflated
+                digest = hashlib.sha256()
+                size = 0
+                with zip_file.open(info) as member, tempfile.NamedTemporaryFile(prefix="upload_", dir=UPLOAD_TMP_DIR, delete=False) as temp_file:
+                    while size <= MAX_RESUME_BYTES:
+                        chunk = member.read(64 * 1024)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                        digest.update(chunk)
+                        temp_file.write(chunk)
+                upload = StreamedUpload(name, temp_file.name, size, digest.hexdigest(), None)
+                if size > MAX_RESUME_BYTES:
+                    upload.cleanup()
+                    rejected.append({"filename": name, "status": STATUS_FAILED, "error": "File too large (max 5MB)"})
+                    continue
+                files.append(upload)
+    except zipfile.BadZipFile:
+        rejected.append({"filename": archive.filename, "status": STATUS_FAILED, "error": "Not a valid ZIP archive"})
+    except BaseException:
+        for upload in files:
+            upload.cleanup()
+        raise
+    return files, rejected
+
+
+def _find_cached(sha256: str) -> tuple[Optional[int], Optional[dict]]:
+    db = SessionLocal()
+    try:
+        cached = find_cached_resume(db, sha256)
+        return (cached.resume_id, cached.parsed_json) if cached else (None, None)
+    finally:
+        db.close()
+
+
+def _embed_batch(items: List[BulkImportItem]):
+    """Blocking: embed the bullets and full text of every resume in the batch with one model call."""
+    texts: List[str] = []
+    spans = []
+    for item in items:
+        bullets = item.parsed.get("experience_bullets", [])[:20]
+        text_content = item.parsed.get("text_content")
+        start = len(texts)
+        texts.extend(bullets)
+        if text_content:
+            texts.append(text_content[:5000])  # Limit to 5000 chars
+        spans.append((item, start, len(bullets), bool(text_content)))
+
+    if not texts:
+        return
+    try:
+        embeddings = embedding_service.encode(texts)
+    except Exception as e:
+        # Same as the single upload: resumes are still imported, just without embeddings
+        print(f"[bulk_import] Failed to embed batch of {len(items)} resumes: {str(e)}")
+        return
+    for item, start, bullet_count, has_text in spans:
+        item.bullet_embeddings = [embeddings[i].tolist() for i in range(start, start + bullet_count)]
+        if has_text:
+            item.full_embedding = embeddings[start + bullet_count].tolist()
+
+
+def _get_user(db: Session, users: Dict[str, Optional[User]], email: str) -> Optional[User]:
+    if email not in users:
+        users[email] = db.query(User).filter(User.email == email).first()
+    return users[email]
+
+
+def _insert_item(db: Session, users: Dict[str, Optional[User]], item: BulkImportItem) -> tuple[Optional[dict], bool]:
+    """Add one resume to the batch transaction. Returns (result if it ends here, has full embedding)."""
+    email = (item.parsed.get("email") or "").strip().lower()
+    if not email:
+        return item.result(STATUS_FAILED, "No email address found in resume"), False
+    user = _get_user(db, users, email)
+    if user is None:
+        return item.result(STATUS_FAILED, f"No account for {email}; the student must register before import"), False
+    item.user_id = user.user_id
+
+    existing = db.query(Resume).filter(
+        Resume.user_id == user.user_id, Resume.content_sha256 == item.upload.sha256
+    ).first()
+    if existing:
+        item.resume_id = existing.resume_id
+        return item.result(STATUS_DUPLICATE), False
+    if db.query(Resume).filter(Resume.user_id == user.user_id).count() >= MAX_RESUMES_PER_USER:
+        return item.result(STATUS_FAILED, f"{email} already has {MAX_RESUMES_PER_USER} resumes"), False
+
+    # Stored under the key until the storage worker swaps in the storage URL
+    storage_key = f"{user.user_id}/{uuid.uuid4()}_{item.upload.filename}"
+    resume_record = Resume(
+        user_id=user.user_id,
+        file_path=storage_key,
+        parsed_json=item.parsed,
+        text_content=item.parsed.get("text_content", ""),
+        content_sha256=item.upload.sha256,
+    )
+    db.add(resume_record)
+    db.flush()
+    item.resume_id = resume_record.resume_id
+    item.staging_path = stage_file(item.upload.path)
+    add_resume_upload(db, resume_record.resume_id, storage_key, item.staging_path)
+
+    if item.cached_resume_id:
+        source = db.query(Resume).filter(Resume.resume_id == item.cached_resume_id).first()
+        return None, copy_resume_artifacts(db, source, resume_record) if source else False
+
+    bullets = item.parsed.get("experience_bullets", [])[:20]
+    embeddings = item.bullet_embeddings or [None] * len(bullets)
+    db.add_all([
+        with_embedding(Bullet, embedding, resume_id=resume_record.resume_id, section="Work Experience", text=bullet_text)
+        for bullet_text, embedding in zip(bullets, embeddings)
+    ])
+    if item.full_embedding is not None:
+        db.add(with_embedding(ResumeEmbedding, item.full_embedding, resume_id=resume_record.resume_id, section="full"))
+        return None, True
+    return None, False
+
+
+def _discard_staged(item: BulkImportItem):
+    if item.staging_path:
+        discard_staged(item.staging_path)
+        item.staging_path = None
+
+
+def _insert_batch(items: List[BulkImportItem]) -> List[tuple[BulkImportItem, Optional[dict]]]:
+    """Blocking: insert a batch of resumes in one transaction (a savepoint per file)."""
+    db = SessionLocal()
+    try:
+        users: Dict[str, Optional[User]] = {}
+        outcomes = []
+        to_rescore = []
+        for item in items:
+            savepoint = db.begin_nested()
+            try:
+                result, has_full_embedding = _insert_item(db, users, item)
+                savepoint.commit()
+            except Exception as e:
+                savepoint.rollback()
+                users.clear()  # Rows flushed inside the savepoint are gone
+                item.resume_id = None
+                _discard_staged(item)
+                result, has_full_embedding = item.result(STATUS_FAILED, f"Failed to save resume: {str(e)}"), False
+            outcomes.append((item, result))
+            if result is None and has_full_embedding:
+                to_rescore.append(item)
+        # Resumes, their outbox rows and upload tasks commit together
+        db.commit()
+
+        for item in to_rescore:
+            try:
+                schedule_rescore(db, item.user_id, item.resume_id)
+            except Exception as e:
+                print(f"[bulk_import] Failed to schedule rescoring for resume {item.resume_id}: {str(e)}")
+        return outcomes
+    except Exception as e:
+        db.rollback()
+        for item in items:
+            _discard_staged(item)
+        return [(item, item.result(STATUS_FAILED, f"Failed to save resume: {str(e)}")) for item in items]
+    finally:
+        db.close()
+
+
+async def _take_batch(queue: asyncio.Queue, size: int) -> tuple[List[BulkImportItem], bool]:
+    """Wait for one item, then take whatever else is already queued (up to `size`). Returns (batch, finished)."""
+    first = await queue.get()
+    if first is _DONE:
+        return [], True
+    batch = [first]
+    while len(batch) < size:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if item is _DONE:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+class BulkImportPipeline:
+    def __init__(
+        self,
+        parse_concurrency: int = BULK_PARSE_CONCURRENCY,
+        embed_batch_size: int = BULK_EMBED_BATCH_SIZE,
+        insert_batch_size: int = BULK_INSERT_BATCH_SIZE,
+    ):
+        self.parse_concurrency = max(1, parse_concurrency)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.insert_batch_size = max(1, insert_batch_size)
+
+    async def extract(self, uploads: List[StreamedUpload], max_files: int = BULK_IMPORT_MAX_FILES) -> tuple[List[StreamedUpload], List[dict]]:
+        """Expand ZIP archives into their resume files. Returns (files to import, rejected results)."""
+        files: List[StreamedUpload] = []
+        rejected: List[dict] = []
+        try:
+            for upload in uploads:
+                if upload.filename.lower().endswith(".zip"):
+                    members, member_rejects = await asyncio.to_thread(_extract_zip_members, upload, max_files - len(files))
+                    upload.cleanup()
+                    files.extend(members)
+                    rejected.extend(member_rejects)
+                elif not upload.filename.lower().endswith(RESUME_EXTENSIONS):
+                    upload.cleanup()
+                    rejected.append({"filename": upload.filename, "status": STATUS_FAILED, "error": "Only PDF and DOCX files are supported"})
+                elif upload.size > MAX_RESUME_BYTES:
+                    upload.cleanup()
+                    rejected.append({"filename": upload.filename, "status": STATUS_FAILED, "error": "File too large (max 5MB)"})
+                elif len(files) >= max_files:
+                    upload.cleanup()
+                    rejected.append({"filename": upload.filename, "status": STATUS_FAILED, "error": f"Import is limited to {max_files} files"})
+                else:
+                    files.append(upload)
+        except BaseException:
+            for upload in uploads + files:
+                upload.cleanup()
+            raise
+        return files, rejected
+
+    async def run(self, files: List[StreamedUpload]) -> AsyncIterator[dict]:
+        """Import the files, yielding each file's result as soon as it is known."""
+        results: asyncio.Queue = asyncio.Queue()
+        parse_queue: asyncio.Queue = asyncio.Queue(maxsize=self.parse_concurrency * 2)
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.embed_batch_size * 2)
+        insert_queue: asyncio.Queue = asyncio.Queue(maxsize=self.insert_batch_size * 2)
+
+        async def finish(item: BulkImportItem, result: dict):
+            item.upload.cleanup()
+            await results.put(result)
+
+        async def feed():
+            for upload in files:
+                await parse_queue.put(BulkImportItem(upload))
+            for _ in range(self.parse_concurrency):
+                await parse_queue.put(_DONE)
+
+        async def parse_worker():
+            while (item := await parse_queue.get()) is not _DONE:
+                try:
+                    item.cached_resume_id, item.parsed = await asyncio.to_thread(_find_cached, item.upload.sha256)
+                    if item.parsed is None:
+                        item.parsed = await resume_parsing_pool.parse(item.upload.path, item.upload.filename)
+                except Exception as e:
+                    await finish(item, item.result(STATUS_FAILED, str(e)))
+                    continue
+                await embed_queue.put(item)
+
+        async def parse_stage():
+            await asyncio.gather(*(parse_worker() for _ in range(self.parse_concurrency)))
+            await embed_queue.put(_DONE)
+
+        async def embed_stage():
+            finished = False
+            while not finished:
+                batch, finished = await _take_batch(embed_queue, self.embed_batch_size)
+                # Cache hits reuse the stored embeddings; only new resumes go to the model
+                to_embed = [item for item in batch if item.cached_resume_id is None]
+                if to_embed:
+                    await asyncio.to_thread(_embed_batch, to_embed)
+                for item in batch:
+                    await insert_queue.put(item)
+            await insert_queue.put(_DONE)
+
+        async def insert_stage():
+            finished = False
+            while not finished:
+                batch, finished = await _take_batch(insert_queue, self.insert_batch_size)
+                if not batch:
+                    continue
+                for item, result in await asyncio.to_thread(_insert_batch, batch):
+                    if result is None:
+                        result = item.result(STATUS_IMPORTED, from_cache=item.cached_resume_id is not None)
+                    await finish(item, result)
+
+        async def pipeline():
+            stages = [asyncio.create_task(stage) for stage in (feed(), parse_stage(), embed_stage(), insert_stage())]
+            try:
+                await asyncio.gather(*stages)
+            finally:
+                # On failure or cancellation, stop every stage (they may be blocked on a queue)
+                for stage in stages:
+                    stage.cancel()
+                results.put_nowait(_DONE)
+
+        runner = asyncio.create_task(pipeline())
+        try:
+            while (result := await results.get()) is not _DONE:
+                yield result
+            await runner  # Surface a pipeline crash to the caller
+        finally:
+            runner.cancel()
+            for upload in files:
+                upload.cleanup()
+
+
+bulk_import_pipeline = BulkImportPipeline()
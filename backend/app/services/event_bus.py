@@ -0,0 +1,193 @@
+"""
+Per-user job event fan-out.
+
+Producers (API requests, the task queue worker) call `publish_event`; API replicas hold
+SSE subscribers and receive events via Postgres LISTEN/NOTIFY, so an event raised in the
+worker reaches whichever replica the user's browser is connected to. With
+EVENT_BUS_BACKEND=memory, events stay in-process (single-process development only).
+
+NOTIFY payloads are limited to 8000 bytes, so events carry ids and small fields only;
+clients re-fetch job details when an event arrives.
+
+The same channel carries replica-to-replica broadcasts (e.g. cache invalidations): handlers
+registered with `on_broadcast` run on every process, the API and workers alike.
+"""
+import asyncio
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Set
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from app.database import engine
+
+load_dotenv()
+
+EVENT_CHANNEL = "nextstep_user_events"
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "postgres").lower()
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", "100"))
+
+# Job-level event types
+EVENT_EMBEDDING_STORED = "embedding_stored"
+EVENT_SCORE_COMPUTED = "score_computed"
+EVENT_RECRUITER_MESSAGE_READY = "recruiter_message_ready"
+EVENT_IMPROVEMENTS_READY = "improvements_ready"
+EVENT_RECOMMENDATIONS_FAILED = "recommendations_failed"
+
+# Resume-level event types (job_id is None)
+EVENT_RESCORE_PROGRESS = "rescore_progress"
+EVENT_RESCORE_COMPLETE = "rescore_complete"
+
+
+class EventBus:
+    """
+    In-process subscriber registry fed by a background LISTEN thread.
+    Each subscriber is an asyncio.Queue bound to the event loop that created it.
+    """
+
+    def __init__(self, backend: str = EVENT_BUS_BACKEND):
+        self.backend = backend
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loops: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+        self._broadcast_handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._origin = uuid.uuid4().hex  # Lets a process skip its own broadcasts
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(queue)
+            self._loops[queue] = asyncio.get_running_loop()
+        if self.backend == "postgres":
+            self._ensure_listener()
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+            self._loops.pop(queue, None)
+
+    def publish(self, user_id: int, event: Dict[str, Any]):
+        """Publish an event to every subscriber of `user_id`, on every replica."""
+        if self.backend == "postgres":
+            message = json.dumps({"user_id": user_id, "event": event})
+            with engine.begin() as connection:
+                connection.execute(text("SELECT pg_notify(:channel, :payload)"), {
+                    "channel": EVENT_CHANNEL,
+                    "payload": message,
+                })
+        else:
+            self._dispatch(user_id, event)
+
+    def on_broadcast(self, kind: str, handler: Callable[[Dict[str, Any]], None]):
+        """Run `handler(data)` whenever another process broadcasts `kind`."""
+        with self._lock:
+            self._broadcast_handlers.setdefault(kind, []).append(handler)
+        if self.backend == "postgres":
+            self._ensure_listener()
+
+    def broadcast(self, kind: str, data: Dict[str, Any]):
+        """Send `data` to the `kind` handlers of every other process (no-op with the memory backend)."""
+        if self.backend != "postgres":
+            return
+        message = json.dumps({"broadcast": kind, "origin": self._origin, "data": data})
+        with engine.begin() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"), {
+                "channel": EVENT_CHANNEL,
+                "payload": message,
+            })
+
+    def _run_broadcast_handlers(self, message: Dict[str, Any]):
+        if message.get("origin") == self._origin:
+            return
+        with self._lock:
+            handlers = list(self._broadcast_handlers.get(message["broadcast"], ()))
+        for handler in handlers:
+            try:
+                handler(message["data"])
+            except Exception as e:
+                print(f"Broadcast handler for {message['broadcast']} failed: {str(e)}")
+
+    def _dispatch(self, user_id: int, event: Dict[str, Any]):
+        with self._lock:
+            targets = [(queue, self._loops[queue]) for queue in self._subscribers.get(user_id, ())]
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Subscriber's loop already closed; it will be unsubscribed on disconnect
+                pass
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: drop the event rather than buffer without bound.
+            # Events are hints to re-fetch, so a later one supersedes it.
+            pass
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen_forever, name="event-bus-listener", daemon=True)
+            self._listener.start()
+
+    def _listen_forever(self):
+        while True:
+            connection = None
+            try:
+                # Dedicated connection, detached from the pool since it stays in autocommit/LISTEN
+                connection = engine.raw_connection()
+                connection.detach()
+                connection.set_session(autocommit=True)
+                cursor = connection.cursor()
+                cursor.execute(f"LISTEN {EVENT_CHANNEL}")
+                while True:
+                    if select.select([connection], [], [], 30.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        try:
+                            message = json.loads(notify.payload)
+                            if "broadcast" in message:
+                                self._run_broadcast_handlers(message)
+                            else:
+                                self._dispatch(int(message["user_id"]), message["event"])
+                        except (ValueError, KeyError, TypeError) as e:
+                            print(f"Ignoring malformed event notification: {str(e)}")
+            except Exception as e:
+                print(f"Event listener error, reconnecting: {str(e)}")
+                time.sleep(2)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+event_bus = EventBus()
+
+
+def publish_event(user_id: int, event_type: str, job_id: int = None, **fields):
+    """
+    Publish a job event for a user. Never raises: notifications are best effort and
+    must not fail the work that produced them.
+    """
+    event = {"type": event_type, "job_id": job_id, **fields}
+    try:
+        event_bus.publish(user_id, event)
+    except Exception as e:
+        print(f"Failed to publish {event_type} event: {str(e)}")
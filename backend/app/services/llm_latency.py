@@ -0,0 +1,43 @@
+import os
+from collections import deque
+from typing import Dict, Deque, Any
+
+
+class LatencyTracker:
+    """
+    Rolling window of observed call latencies per key (e.g. "openai:gpt-4-turbo-preview").
+    Used to derive hedge delays and routing decisions from recent percentiles.
+    """
+
+    def __init__(self, window: int = None):
+        self.window = window or int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._samples[key] = samples
+        samples.append(seconds)
+
+    def count(self, key: str) -> int:
+        return len(self._samples.get(key, ()))
+
+    def percentile(self, key: str, q: float) -> float | None:
+        """Nearest-rank percentile (q in 0-100) of recent samples, or None if there are none."""
+        samples = self._samples.get(key)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            key: {
+                "samples": len(samples),
+                "p50_seconds": self.percentile(key, 50),
+                "p95_seconds": self.percentile(key, 95),
+            }
+            for key, samples in self._samples.items()
+        }
@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Tuple, AsyncIterator
+from dotenv import load_dotenv
+
+from app.utils.token_bucket import TokenBucket
+
+load_dotenv()
+
+# Conservative defaults (entry-tier account limits). Override with LLM_RATE_LIMITS, e.g.
+# LLM_RATE_LIMITS='{"openai": {"rpm": 3500, "tpm": 90000}}'
+DEFAULT_PROVIDER_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 30000},
+    "anthropic": {"rpm": 50, "tpm": 40000},
+    "groq": {"rpm": 30, "tpm": 6000},
+    "gemini": {"rpm": 60, "tpm": 32000},
+    "huggingface": {"rpm": 60, "tpm": 100000},
+}
+
+
+def _load_provider_limits() -> Dict[str, Dict[str, float]]:
+    limits = {provider: dict(values) for provider, values in DEFAULT_PROVIDER_LIMITS.items()}
+    overrides = os.getenv("LLM_RATE_LIMITS")
+    if overrides:
+        try:
+            for provider, values in json.loads(overrides).items():
+                limits.setdefault(provider.lower(), {"rpm": 60, "tpm": 100000}).update(values)
+        except (ValueError, AttributeError) as e:
+            print(f"Warning: ignoring invalid LLM_RATE_LIMITS: {str(e)}")
+    return limits
+
+
+class _KeyLimiter:
+    """Request and token buckets plus a concurrency cap for one (provider, api_key)."""
+
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int):
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+        self.lock = asyncio.Lock()
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.blocked_until = 0.0
+
+
+class ProviderRateLimiter:
+    """
+    Client-side rate limiter for LLM providers.
+    Callers queue (FIFO per key) until both the requests/minute and tokens/minute buckets
+    have capacity, so bursts are smoothed out instead of turning into provider 429s.
+    """
+
+    def __init__(self):
+        self.limits = _load_provider_limits()
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self._limiters: Dict[Tuple[str, str], _KeyLimiter] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _key_fingerprint(api_key: str | None) -> str:
+        # Never keep raw API keys around as dictionary keys
+        return hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+    def _get_limiter(self, provider: str, api_key: str | None) -> _KeyLimiter:
+        key = (provider, self._key_fingerprint(api_key))
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limits = self.limits.get(provider, {"rpm": 60, "tpm": 100000})
+            limiter = _KeyLimiter(limits["rpm"], limits["tpm"], self.max_concurrency)
+            self._limiters[key] = limiter
+        return limiter
+
+    def _provider_stats(self, provider: str) -> Dict[str, float]:
+        if provider not in self._stats:
+            self._stats[provider] = {
+                "requests": 0,
+                "waiting": 0,
+                "in_flight": 0,
+                "queue_wait_total_seconds": 0.0,
+                "queue_wait_max_seconds": 0.0,
+                "last_queue_wait_seconds": 0.0,
+                "throttled": 0,
+                "retries": 0,
+            }
+        return self._stats[provider]
+
+    async def acquire(self, provider: str, api_key: str | None, estimated_tokens: int) -> float:
+        """Wait for rate capacity. Returns the time spent queueing, in seconds."""
+        limiter = self._get_limiter(provider, api_key)
+        stats = self._provider_stats(provider)
+        started = time.monotonic()
+        stats["waiting"] += 1
+        try:
+            # Holding the lock while sleeping keeps waiters in arrival order
+            async with limiter.lock:
+                while True:
+                    wait = max(
+                        limiter.blocked_until - time.monotonic(),
+                        limiter.requests.time_until(1),
+                        limiter.tokens.time_until(estimated_tokens),
+                    )
+                    if wait <= 0:
+                        limiter.requests.consume(1)
+                        limiter.tokens.consume(estimated_tokens)
+                        break
+                    await asyncio.sleep(wait)
+        finally:
+            stats["waiting"] -= 1
+
+        waited = time.monotonic() - started
+        stats["requests"] += 1
+        stats["queue_wait_total_seconds"] += waited
+        stats["queue_wait_max_seconds"] = max(stats["queue_wait_max_seconds"], waited)
+        stats["last_queue_wait_seconds"] = waited
+        return waited
+
+    @asynccontextmanager
+    async def slot(self, provider: str, api_key: str | None, estimated_tokens: int) -> AsyncIterator[float]:
+        """Acquire rate capacity and a concurrency slot for the duration of one provider call."""
+        limiter = self._get_limiter(provider, api_key)
+        stats = self._provider_stats(provider)
+        async with limiter.slots:
+            waited = await self.acquire(provider, api_key, estimated_tokens)
+            stats["in_flight"] += 1
+            try:
+                yield waited
+            finally:
+                stats["in_flight"] -= 1
+
+    def penalize(self, provider: str, api_key: str | None, retry_after: float):
+        """Block a key after a provider 429 until its Retry-After has elapsed."""
+        limiter = self._get_limiter(provider, api_key)
+        limiter.blocked_until = max(limiter.blocked_until, time.monotonic() + retry_after)
+        self._provider_stats(provider)["throttled"] += 1
+
+    def record_retry(self, provider: str):
+        self._provider_stats(provider)["retries"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider counters, including queue-wait time."""
+        result = {}
+        for provider, stats in self._stats.items():
+            result[provider] = {
+                **stats,
+                "queue_wait_avg_seconds": (
+                    stats["queue_wait_total_seconds"] / stats["requests"] if stats["requests"] else 0.0
+                ),
+                "limits": self.limits.get(provider),
+            }
+        return result
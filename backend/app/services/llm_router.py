@@ -0,0 +1,175 @@
+import json
+import os
+from typing import Dict, List, Any
+from dotenv import load_dotenv
+
+from app.services.llm_latency import LatencyTracker
+
+load_dotenv()
+
+# Task types routed by ModelRouter
+TASK_BULLET_REWRITE = "bullet_rewrite"
+TASK_NEW_BULLET = "new_bullet"
+TASK_RECRUITER_MESSAGE = "recruiter_message"
+TASK_REFERRAL_MESSAGE = "referral_message"
+TASK_CONNECTION_TEST = "connection_test"
+
+# Tiers, cheapest/fastest first. "preferred" is the user's model_preference (or provider default).
+TIER_FAST = "fast"
+TIER_BALANCED = "balanced"
+TIER_PREFERRED = "preferred"
+
+# Cheaper models within each provider. Override with LLM_MODEL_TIERS (same JSON shape).
+DEFAULT_MODEL_TIERS = {
+    "openai": {TIER_FAST: "gpt-3.5-turbo", TIER_BALANCED: "gpt-4-turbo-preview"},
+    "anthropic": {TIER_FAST: "claude-3-haiku-20240307", TIER_BALANCED: "claude-3-sonnet-20240229"},
+    "groq": {TIER_FAST: "llama3-8b-8192", TIER_BALANCED: "llama-3-70b-8192"},
+    "gemini": {TIER_FAST: "gemini-pro", TIER_BALANCED: "gemini-pro"},
+    "huggingface": {TIER_FAST: "mistralai/Mistral-7B-Instruct-v0.2", TIER_BALANCED: "mistralai/Mixtral-8x7B-Instruct-v0.1"},
+}
+
+# Relative cost per provider (lower is cheaper; equal ranks cost about the same). A tier model
+# is only used for a user whose preferred model ranks strictly higher; a preferred model that
+# isn't listed is never routed away from. Override/extend with LLM_MODEL_RANKS (same JSON shape).
+DEFAULT_MODEL_RANKS = {
+    "openai": {
+        "gpt-4o-mini": 1, "gpt-3.5-turbo": 2, "o1-mini": 3, "gpt-4o": 4,
+        "gpt-4-turbo": 5, "gpt-4-turbo-preview": 5, "gpt-4-0125-preview": 5, "gpt-4-1106-preview": 5,
+        "gpt-4": 6, "o1-preview": 7,
+    },
+    "anthropic": {
+        "claude-3-haiku-20240307": 1, "claude-3-5-haiku-20241022": 2,
+        "claude-3-sonnet-20240229": 3, "claude-3-5-sonnet-20240620": 3, "claude-3-5-sonnet-20241022": 3,
+        "claude-3-opus-20240229": 4,
+    },
+    "groq": {"llama3-8b-8192": 1, "llama-3-70b-8192": 2, "llama3-70b-8192": 2},
+    "gemini": {
+        "gemini-1.5-flash": 1, "gemini-1.5-flash-latest": 1, "gemini-2.0-flash-exp": 1,
+        "gemini-pro": 2, "gemini-1.5-pro": 3, "gemini-1.5-pro-latest": 3,
+    },
+    "huggingface": {"mistralai/Mistral-7B-Instruct-v0.2": 1, "mistralai/Mixtral-8x7B-Instruct-v0.1": 2},
+}
+
+# High-volume, short outputs go to fast models; the connection test must exercise the chosen model.
+# Override with LLM_TASK_TIERS, e.g. '{"recruiter_message": "preferred"}'
+DEFAULT_TASK_TIERS = {
+    TASK_BULLET_REWRITE: TIER_FAST,
+    TASK_NEW_BULLET: TIER_FAST,
+    TASK_RECRUITER_MESSAGE: TIER_BALANCED,
+    TASK_REFERRAL_MESSAGE: TIER_BALANCED,
+    TASK_CONNECTION_TEST: TIER_PREFERRED,
+}
+
+# Latency SLOs (seconds, p95 of end-to-end call time). Override with LLM_TASK_SLOS.
+DEFAULT_TASK_SLOS = {
+    TASK_BULLET_REWRITE: 4.0,
+    TASK_NEW_BULLET: 4.0,
+    TASK_RECRUITER_MESSAGE: 10.0,
+    TASK_REFERRAL_MESSAGE: 10.0,
+    TASK_CONNECTION_TEST: 15.0,
+}
+
+
+def _load_json_env(name: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    values = {key: (dict(value) if isinstance(value, dict) else value) for key, value in defaults.items()}
+    raw = os.getenv(name)
+    if raw:
+        try:
+            for key, value in json.loads(raw).items():
+                if isinstance(value, dict) and isinstance(values.get(key), dict):
+                    values[key].update(value)
+                else:
+                    values[key] = value
+        except (ValueError, AttributeError) as e:
+            print(f"Warning: ignoring invalid {name}: {str(e)}")
+    return values
+
+
+class ModelRouter:
+    """
+    Maps task types to model tiers within the user's provider.
+    A task starts at its configured tier and steps down to cheaper tiers while the observed
+    p95 latency of the candidate model exceeds the task's SLO. Routing never picks a model
+    above the user's own preference: tier models are only used when they rank cheaper than it
+    in the cost table (model_ranks).
+    """
+
+    def __init__(self, latency: LatencyTracker):
+        self.enabled = os.getenv("LLM_ROUTING", "true").lower() == "true"
+        self.model_tiers = _load_json_env("LLM_MODEL_TIERS", DEFAULT_MODEL_TIERS)
+        self.model_ranks = _load_json_env("LLM_MODEL_RANKS", DEFAULT_MODEL_RANKS)
+        self.task_tiers = _load_json_env("LLM_TASK_TIERS", DEFAULT_TASK_TIERS)
+        self.task_slos = {task: float(slo) for task, slo in _load_json_env("LLM_TASK_SLOS", DEFAULT_TASK_SLOS).items()}
+        self.min_samples = int(os.getenv("LLM_ROUTING_MIN_SAMPLES", "10"))
+        self.latency = latency
+        self._selections: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def latency_key(task: str, provider: str, model: str) -> str:
+        return f"{task}:{provider}:{model}"
+
+    def _ladder(self, provider: str, preferred_model: str) -> List[str]:
+        """Models for a provider from fastest to the user's preference (inclusive)."""
+        tiers = self.model_tiers.get(provider, {})
+        ladder = []
+        for tier in (TIER_FAST, TIER_BALANCED):
+            model = tiers.get(tier)
+            if model and model not in ladder:
+                ladder.append(model)
+        if preferred_model in ladder:
+            # Never route above what the user chose
+            return ladder[:ladder.index(preferred_model) + 1]
+        # Not a tier model: only step down to tiers known to cost less than it
+        ranks = self.model_ranks.get(provider, {})
+        preferred_rank = ranks.get(preferred_model)
+        if preferred_rank is None:
+            return [preferred_model]
+        cheaper = [model for model in ladder if model in ranks and ranks[model] < preferred_rank]
+        return cheaper + [preferred_model]
+
+    def _p95(self, task: str, provider: str, model: str) -> float | None:
+        key = self.latency_key(task, provider, model)
+        if self.latency.count(key) >= self.min_samples:
+            return self.latency.percentile(key, 95)
+        key = f"{provider}:{model}"
+        if self.latency.count(key) >= self.min_samples:
+            return self.latency.percentile(key, 95)
+        return None
+
+    def select_model(self, task: str, provider: str, preferred_model: str) -> str:
+        """Pick the model for `task`, given the user's provider and preferred model."""
+        if not self.enabled or task not in self.task_tiers:
+            return preferred_model
+
+        ladder = self._ladder(provider, preferred_model)
+        tier = self.task_tiers[task]
+        if tier == TIER_PREFERRED:
+            start = len(ladder) - 1
+        elif tier == TIER_BALANCED:
+            start = min(1, len(ladder) - 1)
+        else:
+            start = 0
+        candidates = ladder[start::-1]
+
+        slo = self.task_slos.get(task)
+        chosen = candidates[0]
+        if slo is not None and tier != TIER_PREFERRED:
+            observed = [(self._p95(task, provider, model), model) for model in candidates]
+            within_slo = [model for p95, model in observed if p95 is None or p95 <= slo]
+            if within_slo:
+                chosen = within_slo[0]
+            else:
+                # Everything is over budget: take the fastest we have seen
+                chosen = min(observed, key=lambda item: item[0])[1]
+
+        task_selections = self._selections.setdefault(task, {})
+        task_selections[f"{provider}:{chosen}"] = task_selections.get(f"{provider}:{chosen}", 0) + 1
+        return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "task_tiers": self.task_tiers,
+            "task_slos_seconds": self.task_slos,
+            "selections": self._selections,
+        }
@@ -1,10 +1,172 @@
 import os
-from typing import List, Dict, Any, Optional
+import time
+import asyncio
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, AsyncIterator
 from dotenv import load_dotenv
 import json
 
+from app.services.llm_rate_limiter import ProviderRateLimiter
+from app.services.llm_latency import LatencyTracker
+from app.services.llm_telemetry import LLMTelemetry
+from app.services.llm_router import (
+    ModelRouter,
+    TASK_BULLET_REWRITE,
+    TASK_NEW_BULLET,
+    TASK_RECRUITER_MESSAGE,
+    TASK_REFERRAL_MESSAGE,
+    TASK_CONNECTION_TEST,
+)
+
 load_dotenv()
 
+PROVIDERS = ("groq", "openai", "anthropic", "gemini", "huggingface")
+DEFAULT_MODELS = {
+    "groq": "llama-3-70b-8192",
+    "openai": "gpt-4-turbo-preview",
+    "anthropic": "claude-3-opus-20240229",
+    "gemini": "gemini-pro",
+    "huggingface": "mistralai/Mixtral-8x7B-Instruct-v0.1",
+}
+PROVIDER_LABELS = {
+    "groq": "Groq",
+    "openai": "OpenAI",
+    "anthropic": "Anthropic",
+    "gemini": "Gemini",
+    "huggingface": "HuggingFace",
+}
+
+
+class LLMProviderError(RuntimeError):
+    """
+    Error from an LLM provider call. Subclasses RuntimeError so existing handlers keep working,
+    but carries the HTTP status, Retry-After hint and original error class when known.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        provider: str = None,
+        status_code: int = None,
+        retry_after: float = None,
+        error_type: str = None,
+    ):
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.error_type = error_type or type(self).__name__
+
+    @property
+    def is_timeout(self) -> bool:
+        return self.status_code == 408 or "timeout" in self.error_type.lower()
+
+    @property
+    def retryable(self) -> bool:
+        if self.status_code is not None:
+            return self.status_code in (408, 409, 429) or self.status_code >= 500
+        return self.is_timeout or "connection" in self.error_type.lower()
+
+
+class LLMRateLimitError(LLMProviderError):
+    """The provider rejected the call with 429 / quota exhausted."""
+
+
+def parse_retry_after(headers) -> float | None:
+    """Parse Retry-After (seconds or HTTP date) or retry-after-ms from response headers."""
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def provider_error(provider: str, exc: Exception) -> LLMProviderError:
+    """Convert an SDK/HTTP exception into an LLMProviderError, keeping status and Retry-After."""
+    if isinstance(exc, LLMProviderError):
+        return exc
+
+    response = getattr(exc, "response", None)
+    status_code = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status_code is None and isinstance(getattr(exc, "code", None), int):
+        # google.api_core errors expose the HTTP status as `code`
+        status_code = exc.code
+    retry_after = parse_retry_after(getattr(response, "headers", None))
+
+    message = f"{PROVIDER_LABELS.get(provider, provider)} API error: {str(exc)}"
+    lowered = str(exc).lower()
+    error_class = LLMProviderError
+    if status_code == 429 or (status_code is None and ("rate limit" in lowered or "quota" in lowered)):
+        error_class = LLMRateLimitError
+        status_code = status_code or 429
+
+    return error_class(
+        message,
+        provider=provider,
+        status_code=status_code,
+        retry_after=retry_after,
+        error_type=type(exc).__name__,
+    )
+
+
+def _fill_usage(usage: Dict[str, int], source, prompt_field: str, completion_field: str):
+    """Copy provider-reported token counts (if any) into `usage`."""
+    if usage is None or source is None:
+        return
+    prompt_tokens = getattr(source, prompt_field, None)
+    completion_tokens = getattr(source, completion_field, None)
+    if prompt_tokens is not None:
+        usage["prompt_tokens"] = prompt_tokens
+    if completion_tokens is not None:
+        usage["completion_tokens"] = completion_tokens
+
+
+def llm_options_from_settings(settings) -> Dict[str, Any]:
+    """
+    Keyword arguments for LLMService calls derived from a UserSettings row (or None).
+    Includes the optional secondary provider used for hedging and failover.
+    """
+    if not settings:
+        return {"provider": None, "api_key": None, "model": None}
+    
+    fallback = None
+    if settings.fallback_provider:
+        fallback_key = settings.fallback_api_key
+        if not fallback_key and settings.fallback_provider == settings.ai_provider:
+            # Same provider, different model: reuse the primary key
+            fallback_key = settings.api_key
+        fallback = {
+            "provider": settings.fallback_provider,
+            "api_key": fallback_key,
+            "model": settings.fallback_model,
+        }
+    
+    return {
+        "provider": settings.ai_provider,
+        "api_key": settings.api_key,
+        "model": settings.model_preference,
+        "fallback": fallback,
+        "hedge": settings.hedge_requests,
+    }
+
+
 class LLMService:
     def __init__(self):
         # Keep env vars as fallbacks
@@ -14,6 +176,63 @@ class LLMService:
         self.default_anthropic_key = os.getenv("ANTHROPIC_API_KEY")
         self.default_gemini_key = os.getenv("GEMINI_API_KEY")
         self.default_huggingface_key = os.getenv("HUGGINGFACE_API_KEY")
+        
+        # Retry policy for throttling, 5xx and timeouts
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.retry_base_delay = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+        self.retry_max_delay = float(os.getenv("LLM_RETRY_MAX_DELAY", "20.0"))
+        # Give up instead of waiting when a provider asks us to back off longer than this
+        self.max_retry_after = float(os.getenv("LLM_MAX_RETRY_AFTER", "60.0"))
+        # SDK clients are created with max_retries=0 so retries happen here, under the limiter
+        self.rate_limiter = ProviderRateLimiter()
+        
+        # Hedging / failover to a secondary provider (system default; users can set their own)
+        self.default_fallback_provider = (os.getenv("LLM_FALLBACK_PROVIDER") or "").lower() or None
+        self.default_fallback_model = os.getenv("LLM_FALLBACK_MODEL")
+        self.hedge_by_default = os.getenv("LLM_HEDGE_REQUESTS", "false").lower() == "true"
+        self.hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        self.hedge_default_delay = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "3.0"))
+        self.hedge_min_delay = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.latency = LatencyTracker()
+        self._hedge_stats: Dict[str, Dict[str, int]] = {}
+        
+        # Per-task model routing within the user's provider
+        self.router = ModelRouter(self.latency)
+        
+        # Per-call latency, token, retry, error and cost telemetry
+        self.telemetry = LLMTelemetry()
+    
+    def _resolve_key(self, provider: str, api_key: str = None) -> str | None:
+        """The API key actually used for a call (user key or env fallback)."""
+        return api_key or getattr(self, f"default_{provider}_key", None)
+    
+    @staticmethod
+    def _estimate_tokens(prompt: str, system_prompt: str = None, max_tokens: int = 1000) -> int:
+        """Rough token estimate (~4 chars/token) used to charge the tokens/minute bucket."""
+        return (len(prompt) + len(system_prompt or "")) // 4 + max_tokens
+    
+    def _retry_delay(self, error: LLMProviderError, attempt: int) -> float | None:
+        """Seconds to wait before retrying, or None if the error should be raised."""
+        if not error.retryable or attempt >= self.max_retries:
+            return None
+        if error.retry_after is not None:
+            if error.retry_after > self.max_retry_after:
+                return None
+            return error.retry_after
+        # Full-jitter exponential backoff
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+    
+    async def _handle_retry(self, provider: str, api_key: str, error: LLMProviderError, attempt: int):
+        """Back off before the next attempt, or re-raise when the error is final."""
+        delay = self._retry_delay(error, attempt)
+        if delay is None:
+            raise error
+        if isinstance(error, LLMRateLimitError):
+            self.rate_limiter.penalize(provider, api_key, delay)
+        self.rate_limiter.record_retry(provider)
+        print(f"{PROVIDER_LABELS[provider]} call failed ({error.status_code or error.error_type}), retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        await asyncio.sleep(delay)
     
     async def generate_text(
         self, 
@@ -22,61 +241,314 @@ class LLMService:
         max_tokens: int = 1000,
         provider: str = None,
         api_key: str = None,
-        model: str = None
+        model: str = None,
+        fallback: Dict[str, str] = None,
+        hedge: bool = None,
+        task: str = None
     ) -> str:
-        """Generate text using the configured LLM provider."""
+        """
+        Generate text using the configured LLM provider.
+        When `task` is given, the model is routed to a tier suited to that task (see ModelRouter).
+        Calls are rate limited per (provider, api_key) and retried with jittered exponential
+        backoff on 429, 5xx and timeouts, honoring Retry-After when the provider sends it.
+        
+        If a secondary provider is configured (`fallback`, or LLM_FALLBACK_PROVIDER), 5xx and
+        timeouts fail over to it immediately. With `hedge` enabled, a hedge request is also
+        sent to the secondary once the primary exceeds its recent p95 latency; the first
+        response wins and the other call is cancelled.
+        """
         current_provider = (provider or self.default_provider).lower()
+        if current_provider not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {current_provider}")
         
+        primary = self._primary_target(current_provider, api_key, model, task)
+        
+        if not task:
+            return await self._generate_with_failover(primary, prompt, system_prompt, max_tokens, fallback, hedge)
+        
+        started = time.monotonic()
+        result = await self._generate_with_failover(primary, prompt, system_prompt, max_tokens, fallback, hedge)
+        self.latency.record(
+            self.router.latency_key(task, current_provider, primary["model"]), time.monotonic() - started
+        )
+        return result
+    
+    def _primary_target(self, provider: str, api_key: str = None, model: str = None, task: str = None) -> Dict[str, str]:
+        """Provider, key and (task-routed) model for the primary call."""
+        preferred_model = model or DEFAULT_MODELS[provider]
+        if task:
+            preferred_model = self.router.select_model(task, provider, preferred_model)
+        return {"provider": provider, "api_key": api_key, "model": preferred_model}
+    
+    async def _generate_with_failover(
+        self,
+        primary: Dict[str, str],
+        prompt: str,
+        system_prompt: str = None,
+        max_tokens: int = 1000,
+        fallback: Dict[str, str] = None,
+        hedge: bool = None
+    ) -> str:
+        current_provider = primary["provider"]
+        secondary = self._resolve_fallback(primary, fallback)
+        if hedge is None:
+            hedge = self.hedge_by_default
+        
+        stats = self._provider_hedge_stats(current_provider)
+        stats["requests"] += 1
+        
+        if secondary and hedge:
+            return await self._generate_hedged(primary, secondary, prompt, system_prompt, max_tokens)
+        
+        try:
+            return await self._generate_with_retries(
+                primary, prompt, system_prompt, max_tokens, failover=secondary is not None
+            )
+        except LLMProviderError as e:
+            if not secondary or not self._should_failover(e):
+                raise
+            print(f"{PROVIDER_LABELS[current_provider]} failed ({e.status_code or e.error_type}), failing over to {PROVIDER_LABELS[secondary['provider']]}")
+            stats["failovers"] += 1
+            secondary_stats = self._provider_hedge_stats(secondary["provider"])
+            secondary_stats["fallback_calls"] += 1
+            result = await self._generate_with_retries(secondary, prompt, system_prompt, max_tokens)
+            secondary_stats["fallback_wins"] += 1
+            return result
+    
+    def _resolve_fallback(self, primary: Dict[str, str], fallback: Dict[str, str] = None) -> Dict[str, str] | None:
+        """
+        The secondary provider/model for hedging and failover, or None if not configured.
+        Pass fallback=False to disable the system default (e.g. when testing specific credentials).
+        """
+        if fallback is False:
+            return None
+        if fallback and fallback.get("provider"):
+            fallback_provider = fallback["provider"].lower()
+            fallback_key = fallback.get("api_key")
+            fallback_model = fallback.get("model")
+        elif self.default_fallback_provider:
+            fallback_provider = self.default_fallback_provider
+            fallback_key = None
+            fallback_model = self.default_fallback_model
+        else:
+            return None
+        
+        if fallback_provider not in PROVIDERS:
+            return None
+        secondary = {
+            "provider": fallback_provider,
+            "api_key": fallback_key,
+            "model": fallback_model or DEFAULT_MODELS[fallback_provider],
+        }
+        if not self._resolve_key(fallback_provider, fallback_key):
+            return None
+        if (secondary["provider"], secondary["model"]) == (primary["provider"], primary["model"]):
+            return None
+        return secondary
+    
+    @staticmethod
+    def _should_failover(error: LLMProviderError) -> bool:
+        """5xx, timeouts, connection errors and exhausted rate limits move on to the secondary."""
+        return error.retryable
+    
+    def _provider_hedge_stats(self, provider: str) -> Dict[str, int]:
+        if provider not in self._hedge_stats:
+            self._hedge_stats[provider] = {
+                "requests": 0,
+                "hedged": 0,
+                "hedge_wins": 0,
+                "failovers": 0,
+                "fallback_calls": 0,
+                "fallback_wins": 0,
+            }
+        return self._hedge_stats[provider]
+    
+    def hedge_stats(self) -> Dict[str, Any]:
+        """Per-provider hedge rate (hedged/requests) and win rate (hedge wins/hedged)."""
+        return {
+            provider: {
+                **stats,
+                "hedge_rate": stats["hedged"] / stats["requests"] if stats["requests"] else 0.0,
+                "hedge_win_rate": stats["hedge_wins"] / stats["hedged"] if stats["hedged"] else 0.0,
+                "fallback_win_rate": stats["fallback_wins"] / stats["fallback_calls"] if stats["fallback_calls"] else 0.0,
+            }
+            for provider, stats in self._hedge_stats.items()
+        }
+    
+    def hedge_delay(self, provider: str, model: str) -> float:
+        """Delay before hedging: the primary's recent p95 latency, once there are enough samples."""
+        key = f"{provider}:{model}"
+        if self.latency.count(key) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, self.latency.percentile(key, self.hedge_percentile))
+    
+    async def _generate_hedged(
+        self,
+        primary: Dict[str, str],
+        secondary: Dict[str, str],
+        prompt: str,
+        system_prompt: str = None,
+        max_tokens: int = 1000
+    ) -> str:
+        """Race the primary against a delayed hedge request to the secondary provider."""
+        primary_stats = self._provider_hedge_stats(primary["provider"])
+        secondary_stats = self._provider_hedge_stats(secondary["provider"])
+        
+        primary_task = asyncio.create_task(
+            self._generate_with_retries(primary, prompt, system_prompt, max_tokens, failover=True)
+        )
+        tasks = {primary_task}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(primary["provider"], primary["model"]))
+            if done and not primary_task.exception():
+                return primary_task.result()
+            
+            if done:
+                error = primary_task.exception()
+                if not isinstance(error, LLMProviderError) or not self._should_failover(error):
+                    raise error
+                primary_stats["failovers"] += 1
+            else:
+                primary_stats["hedged"] += 1
+            
+            secondary_stats["fallback_calls"] += 1
+            hedge_task = asyncio.create_task(
+                self._generate_with_retries(secondary, prompt, system_prompt, max_tokens)
+            )
+            tasks = {hedge_task} if done else {primary_task, hedge_task}
+            
+            errors = []
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception():
+                        errors.append(task.exception())
+                        continue
+                    if task is hedge_task:
+                        secondary_stats["fallback_wins"] += 1
+                        if primary_task in tasks:
+                            primary_stats["hedge_wins"] += 1
+                    return task.result()
+            # Both failed; the primary's error is the more useful one to surface
+            if primary_task.done() and primary_task.exception():
+                raise primary_task.exception()
+            raise errors[0]
+        finally:
+            # Cancel the loser (or everything, if we were cancelled ourselves)
+            for task in (primary_task, *tasks):
+                if not task.done():
+                    task.cancel()
+    
+    async def _generate_with_retries(
+        self,
+        target: Dict[str, str],
+        prompt: str,
+        system_prompt: str = None,
+        max_tokens: int = 1000,
+        failover: bool = False
+    ) -> str:
+        """
+        Call one provider/model under the rate limiter, retrying transient failures.
+        With `failover`, 5xx and timeouts are raised immediately so a secondary can take over.
+        """
+        current_provider = target["provider"]
+        api_key = target.get("api_key")
+        model = target.get("model")
+        limiter_key = self._resolve_key(current_provider, api_key)
+        estimated_tokens = self._estimate_tokens(prompt, system_prompt, max_tokens)
+        call = self.telemetry.start(
+            current_provider, model, estimated_prompt_tokens=estimated_tokens - max_tokens
+        )
+        
+        attempt = 0
+        try:
+            while True:
+                try:
+                    async with self.rate_limiter.slot(current_provider, limiter_key, estimated_tokens) as waited:
+                        call.queue_wait += waited
+                        call.usage = {}
+                        started = time.monotonic()
+                        result = await self._call_provider(
+                            current_provider, prompt, system_prompt, max_tokens, api_key, model, call.usage
+                        )
+                        self.latency.record(f"{current_provider}:{model}", time.monotonic() - started)
+                        call.finish(completion_text=result)
+                        return result
+                except LLMProviderError as e:
+                    if failover and self._should_failover(e) and not isinstance(e, LLMRateLimitError):
+                        raise
+                    await self._handle_retry(current_provider, limiter_key, e, attempt)
+                    attempt += 1
+                    call.retries = attempt
+        except asyncio.CancelledError:
+            call.finish(cancelled=True)
+            raise
+        except Exception as e:
+            call.finish(error=e)
+            raise
+    
+    async def _call_provider(
+        self,
+        current_provider: str,
+        prompt: str,
+        system_prompt: str = None,
+        max_tokens: int = 1000,
+        api_key: str = None,
+        model: str = None,
+        usage: Dict[str, int] = None
+    ) -> str:
+        """Make a single provider call, without rate limiting or retries."""
         if current_provider == "groq":
-            return await self._generate_with_groq(prompt, system_prompt, max_tokens, api_key, model)
+            return await self._generate_with_groq(prompt, system_prompt, max_tokens, api_key, model, usage)
         elif current_provider == "openai":
-            return await self._generate_with_openai(prompt, system_prompt, max_tokens, api_key, model)
+            return await self._generate_with_openai(prompt, system_prompt, max_tokens, api_key, model, usage)
         elif current_provider == "anthropic":
-            return await self._generate_with_anthropic(prompt, system_prompt, max_tokens, api_key, model)
+            return await self._generate_with_anthropic(prompt, system_prompt, max_tokens, api_key, model, usage)
         elif current_provider == "gemini":
-            return await self._generate_with_gemini(prompt, system_prompt, max_tokens, api_key, model)
+            return await self._generate_with_gemini(prompt, system_prompt, max_tokens, api_key, model, usage)
         elif current_provider == "huggingface":
-            return await self._generate_with_huggingface(prompt, system_prompt, max_tokens, api_key, model)
+            return await self._generate_with_huggingface(prompt, system_prompt, max_tokens, api_key, model, usage)
         else:
             raise ValueError(f"Unknown LLM provider: {current_provider}")
     
-    async def _generate_with_groq(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None) -> str:
+    async def _generate_with_groq(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> str:
         """Generate text using Groq API."""
         try:
-            from groq import Groq
+            from groq import AsyncGroq
             
             key = api_key or self.default_groq_key
             if not key:
                 raise ValueError("GROQ_API_KEY not set")
             
-            client = Groq(api_key=key)
+            client = AsyncGroq(api_key=key, max_retries=0)
             
             messages = []
             if system_prompt:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
             
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=model or "llama-3-70b-8192",
                 messages=messages,
                 max_tokens=max_tokens,
                 temperature=0.7,
             )
             
+            _fill_usage(usage, getattr(response, "usage", None), "prompt_tokens", "completion_tokens")
             return response.choices[0].message.content
         except Exception as e:
-            raise RuntimeError(f"Groq API error: {str(e)}")
+            raise provider_error("groq", e)
     
-    async def _generate_with_openai(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None) -> str:
+    async def _generate_with_openai(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> str:
         """Generate text using OpenAI API."""
         try:
-            from openai import OpenAI
+            from openai import AsyncOpenAI
             
             key = api_key or self.default_openai_key
             if not key:
                 raise ValueError("OPENAI_API_KEY not set")
             
-            client = OpenAI(api_key=key)
+            client = AsyncOpenAI(api_key=key, max_retries=0)
             
             model_name = model or "gpt-4-turbo-preview"
             
@@ -89,7 +561,7 @@ class LLMService:
                 
                 messages = [{"role": "user", "content": full_prompt}]
                 
-                response = client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model=model_name,
                     messages=messages,
                     # O1 models don't support max_tokens or temperature
@@ -101,18 +573,19 @@ class LLMService:
                     messages.append({"role": "system", "content": system_prompt})
                 messages.append({"role": "user", "content": prompt})
                 
-                response = client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model=model_name,
                     messages=messages,
                     max_tokens=max_tokens,
                     temperature=0.7,
                 )
             
+            _fill_usage(usage, getattr(response, "usage", None), "prompt_tokens", "completion_tokens")
             return response.choices[0].message.content
         except Exception as e:
-            raise RuntimeError(f"OpenAI API error: {str(e)}")
+            raise provider_error("openai", e)
 
-    async def _generate_with_anthropic(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None) -> str:
+    async def _generate_with_anthropic(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> str:
         """Generate text using Anthropic API."""
         try:
             import anthropic
@@ -121,11 +594,11 @@ class LLMService:
             if not key:
                 raise ValueError("ANTHROPIC_API_KEY not set")
             
-            client = anthropic.Anthropic(api_key=key)
+            client = anthropic.AsyncAnthropic(api_key=key, max_retries=0)
             
             messages = [{"role": "user", "content": prompt}]
             
-            response = client.messages.create(
+            response = await client.messages.create(
                 model=model or "claude-3-opus-20240229",
                 max_tokens=max_tokens,
                 temperature=0.7,
@@ -133,11 +606,12 @@ class LLMService:
                 messages=messages
             )
             
+            _fill_usage(usage, getattr(response, "usage", None), "input_tokens", "output_tokens")
             return response.content[0].text
         except Exception as e:
-            raise RuntimeError(f"Anthropic API error: {str(e)}")
+            raise provider_error("anthropic", e)
 
-    async def _generate_with_gemini(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None) -> str:
+    async def _generate_with_gemini(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> str:
         """Generate text using Google Gemini API."""
         try:
             import google.generativeai as genai
@@ -156,7 +630,7 @@ class LLMService:
             model_name = model or "gemini-pro"
             gemini_model = genai.GenerativeModel(model_name)
             
-            response = gemini_model.generate_content(
+            response = await gemini_model.generate_content_async(
                 full_prompt,
                 generation_config=genai.types.GenerationConfig(
                     max_output_tokens=max_tokens,
@@ -164,11 +638,12 @@ class LLMService:
                 )
             )
             
+            _fill_usage(usage, getattr(response, "usage_metadata", None), "prompt_token_count", "candidates_token_count")
             return response.text
         except Exception as e:
-            raise RuntimeError(f"Gemini API error: {str(e)}")
+            raise provider_error("gemini", e)
     
-    async def _generate_with_huggingface(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None) -> str:
+    async def _generate_with_huggingface(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> str:
         """Generate text using HuggingFace Inference API."""
         try:
             import httpx
@@ -197,14 +672,352 @@ class LLMService:
                 )
                 
                 if response.status_code != 200:
-                    raise RuntimeError(f"HuggingFace API error: {response.text}")
+                    raise LLMProviderError(
+                        f"HuggingFace API error: {response.text}",
+                        provider="huggingface",
+                        status_code=response.status_code,
+                        retry_after=parse_retry_after(response.headers),
+                    )
                 
                 result = response.json()
                 if isinstance(result, list) and len(result) > 0:
                     return result[0].get("generated_text", "")
                 return str(result)
         except Exception as e:
-            raise RuntimeError(f"HuggingFace API error: {str(e)}")
+            raise provider_error("huggingface", e)
+    
+    async def stream_text(
+        self,
+        prompt: str,
+        system_prompt: str = None,
+        max_tokens: int = 1000,
+        provider: str = None,
+        api_key: str = None,
+        model: str = None,
+        fallback: Dict[str, str] = None,
+        hedge: bool = None,
+        task: str = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text chunks from the configured LLM provider as they arrive.
+        `task` routes the model the same way as generate_text, and a completed stream's
+        end-to-end time is recorded for that task and the model that served it.
+        Failures before the first chunk are retried like generate_text, then fail over to the
+        secondary provider if one is configured; once text has been emitted the error is raised.
+        Hedging does not apply to streams, since time-to-first-token is already visible.
+        """
+        current_provider = (provider or self.default_provider).lower()
+        if current_provider not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {current_provider}")
+        
+        primary = self._primary_target(current_provider, api_key, model, task)
+        secondary = self._resolve_fallback(primary, fallback)
+        self._provider_hedge_stats(current_provider)["requests"] += 1
+        
+        started = time.monotonic()
+        emitted = False
+        try:
+            async for chunk in self._stream_with_retries(primary, prompt, system_prompt, max_tokens, failover=secondary is not None):
+                emitted = True
+                yield chunk
+            self._record_stream_latency(task, primary, started)
+            return
+        except LLMProviderError as e:
+            if emitted or not secondary or not self._should_failover(e):
+                raise
+            print(f"{PROVIDER_LABELS[current_provider]} stream failed ({e.status_code or e.error_type}), failing over to {PROVIDER_LABELS[secondary['provider']]}")
+            self._provider_hedge_stats(current_provider)["failovers"] += 1
+        
+        async for chunk in self._stream_with_retries(secondary, prompt, system_prompt, max_tokens):
+            yield chunk
+        self._record_stream_latency(task, secondary, started)
+    
+    def _record_stream_latency(self, task: str, target: Dict[str, str], started: float):
+        """End-to-end time of a completed stream, for the task's SLO routing (as in generate_text)."""
+        if task:
+            self.latency.record(
+                self.router.latency_key(task, target["provider"], target["model"]), time.monotonic() - started
+            )
+    
+    async def _stream_with_retries(
+        self,
+        target: Dict[str, str],
+        prompt: str,
+        system_prompt: str = None,
+        max_tokens: int = 1000,
+        failover: bool = False
+    ) -> AsyncIterator[str]:
+        """Stream from one provider/model under the rate limiter, retrying before the first chunk."""
+        current_provider = target["provider"]
+        api_key = target.get("api_key")
+        model = target.get("model")
+        limiter_key = self._resolve_key(current_provider, api_key)
+        estimated_tokens = self._estimate_tokens(prompt, system_prompt, max_tokens)
+        call = self.telemetry.start(
+            current_provider, model, streaming=True, estimated_prompt_tokens=estimated_tokens - max_tokens
+        )
+        parts = []
+        
+        attempt = 0
+        try:
+            while True:
+                emitted = False
+                try:
+                    async with self.rate_limiter.slot(current_provider, limiter_key, estimated_tokens) as waited:
+                        call.queue_wait += waited
+                        call.usage = {}
+                        async for chunk in self._open_stream(
+                            current_provider, prompt, system_prompt, max_tokens, api_key, model, call.usage
+                        ):
+                            if chunk:
+                                emitted = True
+                                call.mark_first_token()
+                                parts.append(chunk)
+                                yield chunk
+                    call.finish(completion_text="".join(parts))
+                    return
+                except LLMProviderError as e:
+                    if emitted or (failover and self._should_failover(e) and not isinstance(e, LLMRateLimitError)):
+                        raise
+                    await self._handle_retry(current_provider, limiter_key, e, attempt)
+                    attempt += 1
+                    call.retries = attempt
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away or the consumer stopped reading
+            call.finish(completion_text="".join(parts), cancelled=True)
+            raise
+        except Exception as e:
+            call.finish(completion_text="".join(parts), error=e)
+            raise
+    
+    def _open_stream(
+        self,
+        current_provider: str,
+        prompt: str,
+        system_prompt: str = None,
+        max_tokens: int = 1000,
+        api_key: str = None,
+        model: str = None,
+        usage: Dict[str, int] = None
+    ) -> AsyncIterator[str]:
+        """Open a single provider stream, without rate limiting or retries."""
+        if current_provider == "groq":
+            return self._stream_with_groq(prompt, system_prompt, max_tokens, api_key, model, usage)
+        elif current_provider == "openai":
+            return self._stream_with_openai(prompt, system_prompt, max_tokens, api_key, model, usage)
+        elif current_provider == "anthropic":
+            return self._stream_with_anthropic(prompt, system_prompt, max_tokens, api_key, model, usage)
+        elif current_provider == "gemini":
+            return self._stream_with_gemini(prompt, system_prompt, max_tokens, api_key, model, usage)
+        elif current_provider == "huggingface":
+            return self._stream_with_huggingface(prompt, system_prompt, max_tokens, api_key, model, usage)
+        else:
+            raise ValueError(f"Unknown LLM provider: {current_provider}")
+    
+    async def _stream_with_groq(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> AsyncIterator[str]:
+        """Stream text using Groq API."""
+        try:
+            from groq import AsyncGroq
+            
+            key = api_key or self.default_groq_key
+            if not key:
+                raise ValueError("GROQ_API_KEY not set")
+            
+            client = AsyncGroq(api_key=key, max_retries=0)
+            
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": prompt})
+            
+            stream = await client.chat.completions.create(
+                model=model or "llama-3-70b-8192",
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=True,
+            )
+            
+            async for chunk in stream:
+                # Groq reports usage on the final chunk
+                x_groq = getattr(chunk, "x_groq", None)
+                _fill_usage(usage, getattr(x_groq, "usage", None), "prompt_tokens", "completion_tokens")
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+        except Exception as e:
+            raise provider_error("groq", e)
+    
+    async def _stream_with_openai(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> AsyncIterator[str]:
+        """Stream text using OpenAI API."""
+        model_name = model or "gpt-4-turbo-preview"
+        
+        # O1 models do not support streaming, so emit the full completion as a single chunk
+        if model_name.startswith("o1"):
+            yield await self._generate_with_openai(prompt, system_prompt, max_tokens, api_key, model_name, usage)
+            return
+        
+        try:
+            from openai import AsyncOpenAI
+            
+            key = api_key or self.default_openai_key
+            if not key:
+                raise ValueError("OPENAI_API_KEY not set")
+            
+            client = AsyncOpenAI(api_key=key, max_retries=0)
+            
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": prompt})
+            
+            stream = await client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=True,
+            )
+            
+            async for chunk in stream:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+        except Exception as e:
+            raise provider_error("openai", e)
+    
+    async def _stream_with_anthropic(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> AsyncIterator[str]:
+        """Stream text using Anthropic API."""
+        try:
+            import anthropic
+            
+            key = api_key or self.default_anthropic_key
+            if not key:
+                raise ValueError("ANTHROPIC_API_KEY not set")
+            
+            client = anthropic.AsyncAnthropic(api_key=key, max_retries=0)
+            
+            messages = [{"role": "user", "content": prompt}]
+            
+            stream = await client.messages.create(
+                model=model or "claude-3-opus-20240229",
+                max_tokens=max_tokens,
+                temperature=0.7,
+                system=system_prompt,
+                messages=messages,
+                stream=True,
+            )
+            
+            async for event in stream:
+                if event.type == "content_block_delta":
+                    yield event.delta.text
+                elif event.type == "message_start":
+                    _fill_usage(usage, event.message.usage, "input_tokens", "output_tokens")
+                elif event.type == "message_delta":
+                    _fill_usage(usage, getattr(event, "usage", None), "input_tokens", "output_tokens")
+        except Exception as e:
+            raise provider_error("anthropic", e)
+    
+    async def _stream_with_gemini(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> AsyncIterator[str]:
+        """Stream text using Google Gemini API."""
+        try:
+            import google.generativeai as genai
+            
+            key = api_key or self.default_gemini_key
+            if not key:
+                raise ValueError("GEMINI_API_KEY not set")
+            
+            genai.configure(api_key=key)
+            
+            full_prompt = prompt
+            if system_prompt:
+                full_prompt = f"{system_prompt}\n\n{prompt}"
+            
+            gemini_model = genai.GenerativeModel(model or "gemini-pro")
+            
+            response = await gemini_model.generate_content_async(
+                full_prompt,
+                generation_config=genai.types.GenerationConfig(
+                    max_output_tokens=max_tokens,
+                    temperature=0.7,
+                ),
+                stream=True,
+            )
+            
+            async for chunk in response:
+                _fill_usage(usage, getattr(chunk, "usage_metadata", None), "prompt_token_count", "candidates_token_count")
+                yield chunk.text
+        except Exception as e:
+            raise provider_error("gemini", e)
+    
+    async def _stream_with_huggingface(self, prompt: str, system_prompt: str = None, max_tokens: int = 1000, api_key: str = None, model: str = None, usage: Dict[str, int] = None) -> AsyncIterator[str]:
+        """Stream text using HuggingFace Inference API (text-generation-inference SSE)."""
+        try:
+            import httpx
+            
+            key = api_key or self.default_huggingface_key
+            if not key:
+                raise ValueError("HUGGINGFACE_API_KEY not set")
+            
+            model_id = model or "mistralai/Mixtral-8x7B-Instruct-v0.1"
+            
+            full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+            
+            async with httpx.AsyncClient() as client:
+                async with client.stream(
+                    "POST",
+                    f"https://api-inference.huggingface.co/models/{model_id}",
+                    headers={"Authorization": f"Bearer {key}"},
+                    json={
+                        "inputs": full_prompt,
+                        "parameters": {
+                            "max_new_tokens": max_tokens,
+                            "temperature": 0.7,
+                            "return_full_text": False,
+                        },
+                        "stream": True,
+                    },
+                    timeout=30.0,
+                ) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        raise LLMProviderError(
+                            f"HuggingFace API error: {body.decode(errors='replace')}",
+                            provider="huggingface",
+                            status_code=response.status_code,
+                            retry_after=parse_retry_after(response.headers),
+                        )
+                    
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = json.loads(line[len("data:"):].strip())
+                        token = data.get("token") or {}
+                        # The final event carries generation details when available
+                        details = data.get("details") or {}
+                        if usage is not None and details.get("generated_tokens") is not None:
+                            usage["completion_tokens"] = details["generated_tokens"]
+                        if not token.get("special"):
+                            yield token.get("text", "")
+        except Exception as e:
+            raise provider_error("huggingface", e)
+    
+    @staticmethod
+    async def _strip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Incremental equivalent of str.strip() over a stream of chunks."""
+        started = False
+        pending_whitespace = ""
+        async for chunk in chunks:
+            if not started:
+                chunk = chunk.lstrip()
+                if not chunk:
+                    continue
+                started = True
+            body = chunk.rstrip()
+            if not body:
+                # Hold trailing whitespace until we know more text follows it
+                pending_whitespace += chunk
+                continue
+            yield pending_whitespace + body
+            pending_whitespace = chunk[len(body):]
     
     async def improve_resume_bullet(
         self,
@@ -213,9 +1026,15 @@ class LLMService:
         job_title: str = None,
         provider: str = None,
         api_key: str = None,
-        model: str = None
+        model: str = None,
+        fallback: Dict[str, str] = None,
+        hedge: bool = None,
+        fallback_to_original: bool = True
     ) -> str:
-        """Improve a resume bullet point following STAR/RIC format."""
+        """
+        Improve a resume bullet point following STAR/RIC format.
+        If generation fails, returns the original bullet, or raises when `fallback_to_original` is False.
+        """
         system_prompt = """You are an expert resume writer and career coach. You rewrite resume bullet points to highlight accomplishments using the Result-Impact-Context (RIC) format, similar to STAR method.
 
 Guidelines:
@@ -249,7 +1068,10 @@ Provide only the improved bullet point, nothing else. Do not add explanations or
                 max_tokens=200,
                 provider=provider,
                 api_key=api_key,
-                model=model
+                model=model,
+                fallback=fallback,
+                hedge=hedge,
+                task=TASK_BULLET_REWRITE
             )
             # Clean up the response
             improved = improved.strip().strip('"').strip("'")
@@ -258,21 +1080,20 @@ Provide only the improved bullet point, nothing else. Do not add explanations or
                 improved = improved.replace("Improved:", "").strip()
             return improved
         except Exception as e:
+            if not fallback_to_original:
+                raise
             # Fallback: return original if generation fails
             print(f"Error improving bullet: {str(e)}")
             return original_bullet
     
-    async def generate_recruiter_message(
+    def _recruiter_message_prompts(
         self,
         candidate_summary: str,
         job_title: str,
         company: str,
-        recipient_name: str = None,
-        provider: str = None,
-        api_key: str = None,
-        model: str = None
-    ) -> str:
-        """Generate a LinkedIn message for a recruiter."""
+        recipient_name: str = None
+    ) -> tuple[str, str, str]:
+        """Build the (system_prompt, prompt, greeting) used for recruiter messages."""
         system_prompt = """You are an assistant that drafts brief LinkedIn messages to recruiters. The message should be:
 - Polite, professional, and show genuine interest
 - Brief (3-4 sentences)
@@ -292,6 +1113,25 @@ Job: {job_title} at {company}
 
 Write a brief, authentic message expressing interest in the role and highlighting relevant experience. Keep it conversational and professional."""
 
+        return system_prompt, prompt, greeting
+    
+    async def generate_recruiter_message(
+        self,
+        candidate_summary: str,
+        job_title: str,
+        company: str,
+        recipient_name: str = None,
+        provider: str = None,
+        api_key: str = None,
+        model: str = None,
+        fallback: Dict[str, str] = None,
+        hedge: bool = None
+    ) -> str:
+        """Generate a LinkedIn message for a recruiter."""
+        system_prompt, prompt, greeting = self._recruiter_message_prompts(
+            candidate_summary, job_title, company, recipient_name
+        )
+
         try:
             message = await self.generate_text(
                 prompt, 
@@ -299,7 +1139,10 @@ Write a brief, authentic message expressing interest in the role and highlightin
                 max_tokens=300,
                 provider=provider,
                 api_key=api_key,
-                model=model
+                model=model,
+                fallback=fallback,
+                hedge=hedge,
+                task=TASK_RECRUITER_MESSAGE
             )
             # Ensure it starts with greeting
             if not message.startswith(greeting.split(",")[0]):
@@ -308,19 +1151,70 @@ Write a brief, authentic message expressing interest in the role and highlightin
         except Exception as e:
             raise RuntimeError(f"Failed to generate recruiter message: {str(e)}")
     
-    async def generate_referral_message(
+    async def stream_recruiter_message(
         self,
         candidate_summary: str,
         job_title: str,
         company: str,
-        contact_name: str,
-        contact_role: str = None,
-        connection: str = None,
+        recipient_name: str = None,
         provider: str = None,
         api_key: str = None,
-        model: str = None
-    ) -> str:
-        """Generate a LinkedIn message asking for a referral."""
+        model: str = None,
+        fallback: Dict[str, str] = None,
+        hedge: bool = None
+    ) -> AsyncIterator[str]:
+        """Stream a LinkedIn message for a recruiter, applying the greeting prefix incrementally."""
+        system_prompt, prompt, greeting = self._recruiter_message_prompts(
+            candidate_summary, job_title, company, recipient_name
+        )
+        greeting_prefix = greeting.split(",")[0]
+
+        async def with_greeting() -> AsyncIterator[str]:
+            # Buffer only until we can tell whether the model already opened with the greeting
+            buffer = ""
+            decided = False
+            async for chunk in self.stream_text(
+                prompt,
+                system_prompt,
+                max_tokens=300,
+                provider=provider,
+                api_key=api_key,
+                model=model,
+                fallback=fallback,
+                hedge=hedge,
+                task=TASK_RECRUITER_MESSAGE
+            ):
+                if decided:
+                    yield chunk
+                    continue
+                buffer += chunk
+                if len(buffer) < len(greeting_prefix) and greeting_prefix.startswith(buffer):
+                    continue
+                decided = True
+                if not buffer.startswith(greeting_prefix):
+                    yield f"{greeting}\n\n"
+                yield buffer
+            if not decided:
+                if not buffer.startswith(greeting_prefix):
+                    yield f"{greeting}\n\n"
+                yield buffer
+
+        try:
+            async for chunk in self._strip_stream(with_greeting()):
+                yield chunk
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate recruiter message: {str(e)}")
+    
+    def _referral_message_prompts(
+        self,
+        candidate_summary: str,
+        job_title: str,
+        company: str,
+        contact_name: str,
+        contact_role: str = None,
+        connection: str = None
+    ) -> tuple[str, str]:
+        """Build the (system_prompt, prompt) used for referral messages."""
         system_prompt = """You are an assistant that drafts LinkedIn messages asking for referrals. The message should be:
 - Polite and appreciative of their time
 - Not too formal, but professional
@@ -358,6 +1252,27 @@ Write a brief, friendly message that:
 
 Keep it genuine and appreciative."""
 
+        return system_prompt, prompt
+    
+    async def generate_referral_message(
+        self,
+        candidate_summary: str,
+        job_title: str,
+        company: str,
+        contact_name: str,
+        contact_role: str = None,
+        connection: str = None,
+        provider: str = None,
+        api_key: str = None,
+        model: str = None,
+        fallback: Dict[str, str] = None,
+        hedge: bool = None
+    ) -> str:
+        """Generate a LinkedIn message asking for a referral."""
+        system_prompt, prompt = self._referral_message_prompts(
+            candidate_summary, job_title, company, contact_name, contact_role, connection
+        )
+
         try:
             message = await self.generate_text(
                 prompt, 
@@ -365,11 +1280,50 @@ Keep it genuine and appreciative."""
                 max_tokens=400,
                 provider=provider,
                 api_key=api_key,
-                model=model
+                model=model,
+                fallback=fallback,
+                hedge=hedge,
+                task=TASK_REFERRAL_MESSAGE
             )
             return message.strip()
         except Exception as e:
             raise RuntimeError(f"Failed to generate referral message: {str(e)}")
+    
+    async def stream_referral_message(
+        self,
+        candidate_summary: str,
+        job_title: str,
+        company: str,
+        contact_name: str,
+        contact_role: str = None,
+        connection: str = None,
+        provider: str = None,
+        api_key: str = None,
+        model: str = None,
+        fallback: Dict[str, str] = None,
+        hedge: bool = None
+    ) -> AsyncIterator[str]:
+        """Stream a LinkedIn message asking for a referral."""
+        system_prompt, prompt = self._referral_message_prompts(
+            candidate_summary, job_title, company, contact_name, contact_role, connection
+        )
+
+        try:
+            chunks = self.stream_text(
+                prompt,
+                system_prompt,
+                max_tokens=400,
+                provider=provider,
+                api_key=api_key,
+                model=model,
+                fallback=fallback,
+                hedge=hedge,
+                task=TASK_REFERRAL_MESSAGE
+            )
+            async for chunk in self._strip_stream(chunks):
+                yield chunk
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate referral message: {str(e)}")
 
 
 # Singleton instance
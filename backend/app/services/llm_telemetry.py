@@ -0,0 +1,329 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+from dotenv import load_dotenv
+
+from app.services.llm_router import DEFAULT_MODEL_RANKS, DEFAULT_MODEL_TIERS
+from app.utils.disconnect import work_scope
+
+load_dotenv()
+
+# Latency buckets in seconds (upper bounds, Prometheus style)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+# USD per 1K (prompt, completion) tokens. Override/extend with LLM_PRICES, e.g.
+# LLM_PRICES='{"gpt-4o": [0.005, 0.015]}'
+DEFAULT_PRICES = {
+    "gpt-4-turbo-preview": (0.01, 0.03),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "claude-3-opus-20240229": (0.015, 0.075),
+    "claude-3-sonnet-20240229": (0.003, 0.015),
+    "claude-3-haiku-20240307": (0.00025, 0.00125),
+    "gemini-pro": (0.000125, 0.000375),
+    "llama-3-70b-8192": (0.00059, 0.00079),
+    "llama3-70b-8192": (0.00059, 0.00079),
+    "llama3-8b-8192": (0.00005, 0.00008),
+}
+
+
+# Series are kept per provider/model. Models are user-supplied, so only known ones (priced,
+# tiered or ranked, plus LLM_TELEMETRY_MODELS, comma-separated) get their own series; the
+# rest are counted under OTHER_LABEL. The JSONL log keeps the exact model.
+OTHER_LABEL = "other"
+
+
+def _escape_label(value: Any) -> str:
+    """Escape a label value per the Prometheus text exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _known_models(prices: Dict[str, tuple]) -> set:
+    models = set(prices)
+    for tiers in DEFAULT_MODEL_TIERS.values():
+        models.update(tiers.values())
+    for ranks in DEFAULT_MODEL_RANKS.values():
+        models.update(ranks)
+    models.update(model.strip() for model in os.getenv("LLM_TELEMETRY_MODELS", "").split(",") if model.strip())
+    return models
+
+
+def _load_prices() -> Dict[str, tuple]:
+    prices = dict(DEFAULT_PRICES)
+    overrides = os.getenv("LLM_PRICES")
+    if overrides:
+        try:
+            for model, (prompt_price, completion_price) in json.loads(overrides).items():
+                prices[model] = (float(prompt_price), float(completion_price))
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Warning: ignoring invalid LLM_PRICES: {str(e)}")
+    return prices
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Approximate quantile (0-1): the upper bound of the bucket containing it."""
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for index, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if running >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += bucket_count
+            cumulative.append({"le": bound, "count": running})
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": cumulative,
+        }
+
+
+class _ModelStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.cancelled = 0
+        self.avoided_completion_tokens = 0
+        self.avoided_cost_usd = 0.0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_usage_calls = 0
+        self.cost_usd = 0.0
+        # Successful calls only; the average is the expected size of a cancelled completion
+        self.ok_calls = 0
+        self.ok_completion_tokens = 0
+        self.wall_time = Histogram()
+        self.queue_wait = Histogram()
+        self.time_to_first_token = Histogram()
+
+
+class LLMCallRecord:
+    """Measurements for one logical provider call (including its retries)."""
+
+    def __init__(self, telemetry: "LLMTelemetry", provider: str, model: str, streaming: bool, estimated_prompt_tokens: int):
+        self.telemetry = telemetry
+        self.provider = provider
+        self.model = model
+        self.streaming = streaming
+        self.estimated_prompt_tokens = estimated_prompt_tokens
+        self.started = time.monotonic()
+        self.queue_wait = 0.0
+        self.first_token_at: Optional[float] = None
+        self.retries = 0
+        self.usage: Dict[str, int] = {}
+        self.finished = False
+        # Request-level counters (set by run_until_disconnect), if any
+        self.scope = work_scope.get()
+
+    def mark_first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+    def finish(self, completion_text: str = None, error: Exception = None, cancelled: bool = False):
+        if self.finished:
+            return
+        self.finished = True
+        self.telemetry._record(self, completion_text, error, cancelled)
+
+
+class LLMTelemetry:
+    """
+    Aggregates per-call LLM telemetry by provider/model: wall time, queue wait and
+    time-to-first-token histograms, token usage, retries, error classes and estimated cost.
+    Each call is optionally appended to a JSONL file (LLM_TELEMETRY_LOG).
+    """
+
+    def __init__(self):
+        self.prices = _load_prices()
+        self.known_models = _known_models(self.prices)
+        self.log_path = os.getenv("LLM_TELEMETRY_LOG")
+        self._log_lock = threading.Lock()
+        self._stats: Dict[str, _ModelStats] = {}
+
+    def start(self, provider: str, model: str, streaming: bool = False, estimated_prompt_tokens: int = 0) -> LLMCallRecord:
+        return LLMCallRecord(self, provider, model, streaming, estimated_prompt_tokens)
+
+    def _cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+        price = self.prices.get(model)
+        if not price:
+            return None
+        return prompt_tokens / 1000.0 * price[0] + completion_tokens / 1000.0 * price[1]
+
+    def _record(self, record: LLMCallRecord, completion_text: str, error: Exception, cancelled: bool):
+        finished = time.monotonic()
+        wall_time = finished - record.started
+        ttft = record.first_token_at - record.started if record.first_token_at is not None else None
+
+        estimated = "prompt_tokens" not in record.usage or "completion_tokens" not in record.usage
+        prompt_tokens = record.usage.get("prompt_tokens", record.estimated_prompt_tokens)
+        completion_tokens = record.usage.get("completion_tokens", len(completion_text or "") // 4)
+        cost = self._cost(record.model, prompt_tokens, completion_tokens)
+        error_type = getattr(error, "error_type", None) or (type(error).__name__ if error else None)
+        status_code = getattr(error, "status_code", None)
+
+        provider = record.provider if record.provider in DEFAULT_MODEL_TIERS else OTHER_LABEL
+        model = record.model if record.model in self.known_models else OTHER_LABEL
+        key = f"{provider}:{model}"
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = _ModelStats()
+            self._stats[key] = stats
+
+        stats.calls += 1
+        stats.retries += record.retries
+        stats.queue_wait.observe(record.queue_wait)
+        avoided_tokens = 0
+        avoided_cost = None
+        if cancelled:
+            stats.cancelled += 1
+            # Estimate the completion we didn't pay for: a typical completion minus what streamed
+            if stats.ok_calls:
+                avoided_tokens = max(0, stats.ok_completion_tokens // stats.ok_calls - completion_tokens)
+                stats.avoided_completion_tokens += avoided_tokens
+                avoided_cost = self._cost(record.model, 0, avoided_tokens)
+                if avoided_cost:
+                    stats.avoided_cost_usd += avoided_cost
+            if record.scope is not None:
+                record.scope["llm_calls_cancelled"] += 1
+                record.scope["estimated_cost_avoided_usd"] += avoided_cost or 0.0
+        elif error:
+            stats.errors[error_type] = stats.errors.get(error_type, 0) + 1
+        else:
+            stats.ok_calls += 1
+            stats.ok_completion_tokens += completion_tokens
+            stats.wall_time.observe(wall_time)
+            if ttft is not None:
+                stats.time_to_first_token.observe(ttft)
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+        if estimated:
+            stats.estimated_usage_calls += 1
+        if cost:
+            stats.cost_usd += cost
+
+        if self.log_path:
+            self._append_log({
+                "ts": datetime.now(timezone.utc).isoformat(),
+                "provider": record.provider,
+                "model": record.model,
+                "streaming": record.streaming,
+                "outcome": "cancelled" if cancelled else ("error" if error else "ok"),
+                "wall_time_seconds": round(wall_time, 4),
+                "queue_wait_seconds": round(record.queue_wait, 4),
+                "time_to_first_token_seconds": round(ttft, 4) if ttft is not None else None,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "usage_estimated": estimated,
+                "cost_usd": round(cost, 6) if cost is not None else None,
+                "retries": record.retries,
+                "avoided_completion_tokens": avoided_tokens if cancelled else None,
+                "error_type": error_type,
+                "status_code": status_code,
+            })
+
+    def _append_log(self, entry: Dict[str, Any]):
+        try:
+            with self._log_lock:
+                with open(self.log_path, "a") as log_file:
+                    log_file.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Failed to write LLM telemetry log: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            key: {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "cancelled": stats.cancelled,
+                "avoided_completion_tokens": stats.avoided_completion_tokens,
+                "avoided_cost_usd": round(stats.avoided_cost_usd, 6),
+                "retries": stats.retries,
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "estimated_usage_calls": stats.estimated_usage_calls,
+                "cost_usd": round(stats.cost_usd, 6),
+                "wall_time_seconds": stats.wall_time.snapshot(),
+                "queue_wait_seconds": stats.queue_wait.snapshot(),
+                "time_to_first_token_seconds": stats.time_to_first_token.snapshot(),
+            }
+            for key, stats in self._stats.items()
+        }
+
+    def prometheus_text(self) -> str:
+        """Render the aggregates in Prometheus text exposition format."""
+        lines: List[str] = []
+        models = []
+        for key, stats in self._stats.items():
+            provider, model = key.split(":", 1)
+            models.append((f'provider="{_escape_label(provider)}",model="{_escape_label(model)}"', stats))
+
+        histograms = (
+            ("nextstep_llm_call_seconds", "wall_time"),
+            ("nextstep_llm_queue_wait_seconds", "queue_wait"),
+            ("nextstep_llm_time_to_first_token_seconds", "time_to_first_token"),
+        )
+        for name, attribute in histograms:
+            lines.append(f"# TYPE {name} histogram")
+            for labels, stats in models:
+                histogram = getattr(stats, attribute)
+                running = 0
+                for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    running += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        lines.append("# TYPE nextstep_llm_tokens_total counter")
+        for labels, stats in models:
+            lines.append(f'nextstep_llm_tokens_total{{{labels},kind="prompt"}} {stats.prompt_tokens}')
+            lines.append(f'nextstep_llm_tokens_total{{{labels},kind="completion"}} {stats.completion_tokens}')
+
+        counters = (
+            ("nextstep_llm_calls_total", "calls"),
+            ("nextstep_llm_retries_total", "retries"),
+            ("nextstep_llm_cancelled_total", "cancelled"),
+            ("nextstep_llm_cost_usd_total", "cost_usd"),
+            ("nextstep_llm_avoided_completion_tokens_total", "avoided_completion_tokens"),
+            ("nextstep_llm_avoided_cost_usd_total", "avoided_cost_usd"),
+        )
+        for name, attribute in counters:
+            lines.append(f"# TYPE {name} counter")
+            for labels, stats in models:
+                lines.append(f"{name}{{{labels}}} {getattr(stats, attribute)}")
+
+        lines.append("# TYPE nextstep_llm_errors_total counter")
+        for labels, stats in models:
+            for error_type, count in stats.errors.items():
+                lines.append(f'nextstep_llm_errors_total{{{labels},error_type="{_escape_label(error_type)}"}} {count}')
+        return "\n".join(lines) + "\n"
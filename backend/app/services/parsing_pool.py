@@ -0,0 +1,133 @@
+"""
+Resume parsing off the event loop.
+
+Each parse runs in its own child process, forked from a forkserver that has the parser
+preloaded (so it starts quickly and never inherits the API's threads or model weights).
+Children get an address-space limit and a wall-clock timeout; a hung or runaway document
+is killed without affecting the API or other parses. Concurrency is bounded by
+PARSER_WORKERS (defaults to the number of cores).
+"""
+import asyncio
+import multiprocessing
+import os
+from typing import Any, Dict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(os.cpu_count() or 2)))
+PARSER_TIMEOUT_SECONDS = float(os.getenv("PARSER_TIMEOUT_SECONDS", "30"))
+PARSER_MEMORY_LIMIT_MB = int(os.getenv("PARSER_MEMORY_LIMIT_MB", "1024"))
+
+
+class ResumeParseTimeout(ValueError):
+    """Parsing exceeded PARSER_TIMEOUT_SECONDS and the parser process was killed."""
+
+
+def _limit_memory(limit_mb: int):
+    if limit_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return
+    limit = limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _parse_in_child(connection, file_path: str, filename: str, memory_limit_mb: int):
+    """Child process entry point: parse and send back ("ok", result) or ("error", type, message)."""
+    from app.utils.resume_parser import parse_resume_file
+
+    try:
+        _limit_memory(memory_limit_mb)
+        connection.send(("ok", parse_resume_file(file_path, filename)))
+    except MemoryError:
+        connection.send(("error", "MemoryError", f"Resume parsing exceeded the {memory_limit_mb} MB memory limit"))
+    except ValueError as e:
+        connection.send(("error", "ValueError", str(e)))
+    except Exception as e:
+        connection.send(("error", type(e).__name__, str(e)))
+    finally:
+        connection.close()
+
+
+def _context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["app.utils.resume_parser"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class ResumeParsingPool:
+    def __init__(
+        self,
+        workers: int = PARSER_WORKERS,
+        timeout: float = PARSER_TIMEOUT_SECONDS,
+        memory_limit_mb: int = PARSER_MEMORY_LIMIT_MB,
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._context = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self.stats_counts = {"parsed": 0, "failed": 0, "timed_out": 0, "crashed": 0}
+
+    def _run(self, file_path: str, filename: str) -> Dict[str, Any]:
+        """Blocking: run one parse in a child process and wait for it (called from a thread)."""
+        if self._context is None:
+            self._context = _context()
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_parse_in_child,
+            args=(sender, file_path, filename, self.memory_limit_mb),
+            daemon=True,
+        )
+        process.start()
+        sender.close()
+        try:
+            if not receiver.poll(self.timeout):
+                self.stats_counts["timed_out"] += 1
+                raise ResumeParseTimeout(f"Resume parsing timed out after {self.timeout:.0f}s")
+            try:
+                message = receiver.recv()
+            except EOFError:
+                # Child died without answering (e.g. killed by the memory limit)
+                self.stats_counts["crashed"] += 1
+                raise ValueError("Failed to parse resume: parser process crashed")
+        finally:
+            receiver.close()
+            if process.is_alive():
+                process.kill()
+            process.join()
+
+        if message[0] == "ok":
+            self.stats_counts["parsed"] += 1
+            return message[1]
+        self.stats_counts["failed"] += 1
+        _, error_type, error_message = message
+        if error_type in ("ValueError", "MemoryError"):
+            raise ValueError(error_message)
+        raise RuntimeError(f"{error_type}: {error_message}")
+
+    async def parse(self, file_path: str, filename: str) -> Dict[str, Any]:
+        """
+        Parse the resume at `file_path` in a child process (only the path crosses the
+        process boundary). Raises ValueError for unparseable or hung documents.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        async with self._semaphore:
+            return await asyncio.to_thread(self._run, file_path, filename)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats_counts,
+            "workers": self.workers,
+            "timeout_seconds": self.timeout,
+            "memory_limit_mb": self.memory_limit_mb,
+        }
+
+
+resume_parsing_pool = ResumeParsingPool()
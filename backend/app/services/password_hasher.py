@@ -0,0 +1,59 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow (~100-300 ms per hash at cost 12), and it releases the GIL.
+Hashes and verifications run on a dedicated thread pool of PASSWORD_HASH_WORKERS threads.
+At most that many run at once; further requests wait on the event loop, where a client
+disconnect cancels them before they cost any CPU. A login burst then queues behind itself
+instead of stalling every other request.
+
+The bcrypt cost is BCRYPT_ROUNDS. Hashes made with any other cost are re-hashed with the
+current one on the user's next successful login (see verify_and_update).
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+from passlib.context import CryptContext
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def create_password_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    # min = max = default: a hash with any other cost "needs update"
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = PASSWORD_HASH_WORKERS):
+        self.context = create_password_context(rounds)
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _run(self, func, *args):
+        # Created lazily so the semaphore binds to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(password matches, new hash to store if the stored one uses an outdated cost)."""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+
+password_hasher = PasswordHasher()
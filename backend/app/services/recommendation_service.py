@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+from typing import Optional
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Job, Recommendation, Resume, Bullet
+from app.services.llm_service import llm_service
+from app.services.settings_cache import get_llm_options
+from app.services.task_queue import dead_task_handler, enqueue, task_handler
+from app.services.event_bus import (
+    publish_event,
+    EVENT_RECRUITER_MESSAGE_READY,
+    EVENT_IMPROVEMENTS_READY,
+    EVENT_RECOMMENDATIONS_FAILED,
+)
+
+# Task kind for the durable queue (see worker.py)
+GENERATE_RECOMMENDATIONS_TASK = "generate_recommendations"
+
+# Recommendation.kind for the recruiter message + bullet improvements generated on job submit
+RECOMMENDATION_KIND_INITIAL = "initial"
+
+
+def recommendation_input_hash(job: Job, resume: Resume, bullets: list, llm_options: dict) -> str:
+    """SHA-256 over everything that determines the generated recommendation."""
+    inputs = {
+        "job": [job.title, job.company, job.description_text],
+        "resume": [resume.text_content, resume.parsed_json],
+        "bullets": [bullet.text for bullet in bullets],
+        "llm": [llm_options.get("provider"), llm_options.get("model")],
+    }
+    encoded = json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def schedule_initial_recommendations(db: Session, user_id: int, job_id: int, resume_id: int):
+    """
+    Enqueue recommendation generation for a job/resume pair. Repeated triggers while a
+    generation is queued or running share that task instead of starting another.
+    """
+    return enqueue(
+        db,
+        GENERATE_RECOMMENDATIONS_TASK,
+        {"user_id": user_id, "job_id": job_id, "resume_id": resume_id},
+        dedup_key=f"{GENERATE_RECOMMENDATIONS_TASK}:{job_id}:{resume_id}",
+    )
+
+
+def _get_or_create_recommendation(db: Session, user_id: int, job_id: int, resume_id: int, input_hash: str) -> Recommendation:
+    """Insert the idempotency row if it doesn't exist (race-safe) and return it."""
+    db.execute(
+        insert(Recommendation)
+        .values(
+            user_id=user_id,
+            job_id=job_id,
+            resume_id=resume_id,
+            kind=RECOMMENDATION_KIND_INITIAL,
+            input_hash=input_hash,
+            status="generating",
+        )
+        .on_conflict_do_nothing(constraint="uq_recommendations_idempotency")
+    )
+    db.commit()
+    return db.query(Recommendation).filter(
+        Recommendation.job_id == job_id,
+        Recommendation.resume_id == resume_id,
+        Recommendation.kind == RECOMMENDATION_KIND_INITIAL,
+        Recommendation.input_hash == input_hash,
+    ).one()
+
+
+def _load_recommendation_inputs(user_id: int, job_id: int, resume_id: int) -> Optional[dict]:
+    """
+    Blocking: everything generation needs, as plain values, with the idempotency row created.
+    None if there is nothing to do (missing job/resume, no API key, or already complete).
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.job_id == job_id, Job.user_id == user_id).first()
+        resume = db.query(Resume).filter(
+            Resume.resume_id == resume_id,
+            Resume.user_id == user_id
+        ).first()
+
+        if not job or not resume:
+            return None
+
+        # Get user settings for API keys (cached, see settings_cache)
+        llm_options = get_llm_options(db, user_id)
+
+        if not llm_options["api_key"]:
+            # Skip if no API key configured
+            return None
+
+        bullets = db.query(Bullet).filter(
+            Bullet.resume_id == resume_id,
+            Bullet.section == "Work Experience"
+        ).all()
+
+        input_hash = recommendation_input_hash(job, resume, bullets, llm_options)
+        recommendation = _get_or_create_recommendation(db, user_id, job_id, resume_id, input_hash)
+        if recommendation.status == "complete":
+            # Same inputs were already generated; nothing to pay for again
+            return None
+        if recommendation.status != "generating":
+            # An earlier task for these inputs gave up; this is a fresh attempt
+            recommendation.status = "generating"
+            db.commit()
+
+        return {
+            "recommendation_id": recommendation.id,
+            "has_recruiter_message": bool(recommendation.recruiter_message_text),
+            "has_improvements": recommendation.improved_resume_json is not None,
+            "job_title": job.title,
+            "company": job.company,
+            "description_text": job.description_text or "",
+            "parsed_json": resume.parsed_json or {},
+            "bullets": [bullet.text for bullet in bullets],
+            "llm_options": llm_options,
+        }
+    finally:
+        db.close()
+
+
+def _update_recommendation(recommendation_id: int, **fields):
+    """Blocking: set columns on the recommendation row and commit."""
+    db = SessionLocal()
+    try:
+        db.query(Recommendation).filter(
+            Recommendation.id == recommendation_id
+        ).update(fields, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def generate_initial_recommendations(user_id: int, job_id: int, resume_id: int):
+    """
+    Generate initial recommendations (recruiter message and bullet improvements)
+    for a job with a linked resume. Runs in the worker; DB reads and writes run in threads
+    with their own sessions, so only the LLM calls wait on the event loop.
+
+    Results are keyed by (job, resume, kind, input hash): a completed result for the same
+    inputs is reused, and a retry only generates the parts that are still missing.
+    Raises if the recruiter message or any bullet improvement could not be generated so the
+    queue retries the task; once it gives up, the row is marked `failed`.
+    """
+    inputs = await asyncio.to_thread(_load_recommendation_inputs, user_id, job_id, resume_id)
+    if inputs is None:
+        return
+    recommendation_id = inputs["recommendation_id"]
+    llm_options = inputs["llm_options"]
+    bullets = inputs["bullets"]
+
+    # Generate recruiter message
+    recruiter_error = None
+    if not inputs["has_recruiter_message"]:
+        parsed_data = inputs["parsed_json"]
+        candidate_summary = f"Professional with experience in {parsed_data.get('sections', {}).get('experience', 'various roles')[:200]}"
+        if parsed_data.get("experience_count"):
+            candidate_summary += f" ({parsed_data['experience_count']} positions)"
+
+        try:
+            recruiter_message = await llm_service.generate_recruiter_message(
+                candidate_summary=candidate_summary,
+                job_title=inputs["job_title"],
+                company=inputs["company"] or "the company",
+                recipient_name=None,
+                **llm_options
+            )
+            # Save as soon as it's ready so the client can show it before improvements finish
+            await asyncio.to_thread(_update_recommendation, recommendation_id, recruiter_message_text=recruiter_message)
+            publish_event(user_id, EVENT_RECRUITER_MESSAGE_READY, job_id, resume_id=resume_id)
+        except Exception as e:
+            recruiter_error = e
+            print(f"Failed to generate recruiter message: {str(e)}")
+
+    # Generate resume improvements. All or nothing: an original bullet stored in place of a
+    # failed rewrite would be reused for these inputs forever, so a failure is retried instead.
+    improvements_error = None
+    if not inputs["has_improvements"] and bullets:
+        improvements = []
+        try:
+            job_text = inputs["description_text"].lower()
+            job_requirements = []
+            common_skills = ["python", "javascript", "java", "react", "aws", "docker", "kubernetes", "sql", "machine learning", "data science"]
+            for skill in common_skills:
+                if skill in job_text:
+                    job_requirements.append(skill.title())
+
+            num_to_improve = max(1, min(3, len(bullets)))
+            for bullet_text in bullets[:num_to_improve]:
+                improved_text = await llm_service.improve_resume_bullet(
+                    bullet_text,
+                    job_requirements,
+                    inputs["job_title"],
+                    fallback_to_original=False,
+                    **llm_options
+                )
+                improvements.append({
+                    "original_bullet": bullet_text,
+                    "improved_bullet": improved_text,
+                })
+            await asyncio.to_thread(
+                _update_recommendation, recommendation_id, improved_resume_json={"improvements": improvements}
+            )
+            publish_event(user_id, EVENT_IMPROVEMENTS_READY, job_id, resume_id=resume_id)
+        except Exception as e:
+            improvements_error = e
+            print(f"Failed to generate improvements: {str(e)}")
+
+    if recruiter_error or improvements_error:
+        # The queue retries the missing parts; recommendations_failed goes out only after the last attempt
+        raise RuntimeError(f"Recommendation generation failed: {str(recruiter_error or improvements_error)}")
+
+    await asyncio.to_thread(_update_recommendation, recommendation_id, status="complete")
+
+
+@task_handler(GENERATE_RECOMMENDATIONS_TASK)
+async def handle_generate_recommendations(payload: dict):
+    await generate_initial_recommendations(
+        payload["user_id"],
+        payload["job_id"],
+        payload["resume_id"],
+    )
+
+
+def mark_recommendations_failed(job_id: int, resume_id: int):
+    """Blocking: move the pair's unfinished initial recommendations to the terminal `failed` status."""
+    db = SessionLocal()
+    try:
+        db.query(Recommendation).filter(
+            Recommendation.job_id == job_id,
+            Recommendation.resume_id == resume_id,
+            Recommendation.kind == RECOMMENDATION_KIND_INITIAL,
+            Recommendation.status == "generating",
+        ).update({Recommendation.status: "failed"}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+@dead_task_handler(GENERATE_RECOMMENDATIONS_TASK)
+async def handle_generate_recommendations_dead(payload: dict, error: str):
+    await asyncio.to_thread(mark_recommendations_failed, payload["job_id"], payload["resume_id"])
+    publish_event(payload["user_id"], EVENT_RECOMMENDATIONS_FAILED, payload["job_id"], resume_id=payload["resume_id"])
@@ -0,0 +1,258 @@
+"""
+Per-user and per-IP rate limiting for expensive API routes.
+
+Each limited route has a token bucket per user (the `user_id` that decode_token returns for
+the verified bearer token) and per client IP. Both must have a token for the request to go through; otherwise the client
+gets a 429 with a Retry-After header. Routes and limits come from DEFAULT_ROUTE_LIMITS,
+overridable with REQUEST_RATE_LIMITS (same JSON shape), e.g.
+    REQUEST_RATE_LIMITS='{"POST /api/resume/improve": {"user": {"rpm": 20, "burst": 5}}}'
+A route key ending in "/" matches every path under it. Set a limit to null to disable it;
+a limit with rpm <= 0 or burst < 1 is disabled too (with a warning).
+
+RATE_LIMIT_BACKEND=memory (default) keeps buckets in-process, i.e. per replica. With
+RATE_LIMIT_BACKEND=postgres, all replicas share buckets in `rate_limit_buckets` (see
+migration_add_rate_limit_buckets.sql). If the database is unreachable, requests are let
+through rather than failed.
+"""
+import asyncio
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from app.auth import decode_token
+from app.database import engine
+from app.utils.token_bucket import TokenBucket
+
+load_dotenv()
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+# Use the first X-Forwarded-For address as the client IP (only behind a trusted proxy)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# In-memory buckets kept before idle (full) ones are pruned
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+# Upper bound for the Retry-After header, in seconds
+RATE_LIMIT_MAX_RETRY_AFTER = int(os.getenv("RATE_LIMIT_MAX_RETRY_AFTER", "3600"))
+
+# "METHOD /path" -> {"user": {"rpm", "burst"}, "ip": {"rpm", "burst"}}. The IP limit is looser:
+# several users can share an address (campus networks, offices).
+DEFAULT_ROUTE_LIMITS = {
+    "POST /api/resume/improve": {"user": {"rpm": 10, "burst": 5}, "ip": {"rpm": 30, "burst": 15}},
+    "POST /api/message/": {"user": {"rpm": 20, "burst": 10}, "ip": {"rpm": 60, "burst": 30}},
+    "POST /api/settings/test": {"user": {"rpm": 5, "burst": 3}, "ip": {"rpm": 15, "burst": 5}},
+    "POST /api/resume/upload": {"user": {"rpm": 10, "burst": 5}, "ip": {"rpm": 30, "burst": 15}},
+}
+
+
+def _valid_limit(route: str, scope: str, limit: Any) -> Optional[Dict[str, float]]:
+    """The limit if usable, else None (disabled). rpm must be > 0 and burst >= 1, or no token ever arrives."""
+    if limit is None:
+        return None
+    try:
+        rpm = float(limit["rpm"])
+        burst = float(limit["burst"]) if limit.get("burst") is not None else rpm
+    except (KeyError, TypeError, ValueError, AttributeError):
+        rpm = burst = 0.0
+    if not (rpm > 0 and burst >= 1 and math.isfinite(rpm) and math.isfinite(burst)):
+        print(f"Warning: disabling invalid {scope} rate limit for {route}: {limit!r} (needs rpm > 0 and burst >= 1)")
+        return None
+    return {"rpm": rpm, "burst": burst}
+
+
+def _load_route_limits() -> Dict[str, Dict[str, Any]]:
+    limits = {route: dict(values) for route, values in DEFAULT_ROUTE_LIMITS.items()}
+    overrides = os.getenv("REQUEST_RATE_LIMITS")
+    if overrides:
+        try:
+            for route, values in json.loads(overrides).items():
+                limits.setdefault(route, {}).update(values)
+        except (ValueError, AttributeError) as e:
+            print(f"Warning: ignoring invalid REQUEST_RATE_LIMITS: {str(e)}")
+    return {
+        route: {scope: _valid_limit(route, scope, limit) for scope, limit in values.items()}
+        for route, values in limits.items()
+    }
+
+
+class BucketLimit:
+    def __init__(self, rpm: float, burst: float = None):
+        self.rate = float(rpm) / 60.0  # Tokens per second
+        self.capacity = float(burst if burst is not None else rpm)
+
+
+class MemoryBucketStore:
+    """Token buckets in this process."""
+
+    def __init__(self, max_buckets: int = RATE_LIMIT_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: str, limit: BucketLimit) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune()
+            bucket = self._buckets[key] = TokenBucket(limit.capacity, limit.rate)
+        return bucket
+
+    def _prune(self):
+        # A full bucket behaves exactly like a new one, so dropping it loses nothing
+        for key in [key for key, bucket in self._buckets.items() if bucket.time_until(bucket.capacity) == 0]:
+            del self._buckets[key]
+
+    def acquire(self, buckets: List[Tuple[str, BucketLimit]]) -> float:
+        """Take one token from every bucket, or none. Returns 0, or seconds until all have one."""
+        with self._lock:
+            resolved = [self._bucket(key, limit) for key, limit in buckets]
+            wait = max((bucket.time_until(1) for bucket in resolved), default=0.0)
+            if wait == 0:
+                for bucket in resolved:
+                    bucket.consume(1)
+            return wait
+
+
+# Refill and take one token in one statement; no row comes back if the bucket is empty
+_TAKE_TOKEN_SQL = text("""
+    INSERT INTO rate_limit_buckets (bucket_key, tokens, updated_at)
+    VALUES (:key, :capacity - 1, clock_timestamp())
+    ON CONFLICT (bucket_key) DO UPDATE SET
+        tokens = LEAST(:capacity, rate_limit_buckets.tokens
+            + EXTRACT(EPOCH FROM clock_timestamp() - rate_limit_buckets.updated_at) * :rate) - 1,
+        updated_at = clock_timestamp()
+    WHERE LEAST(:capacity, rate_limit_buckets.tokens
+        + EXTRACT(EPOCH FROM clock_timestamp() - rate_limit_buckets.updated_at) * :rate) >= 1
+    RETURNING tokens
+""")
+_BUCKET_WAIT_SQL = text("""
+    SELECT (1 - LEAST(:capacity, tokens + EXTRACT(EPOCH FROM clock_timestamp() - updated_at) * :rate)) / :rate
+    FROM rate_limit_buckets WHERE bucket_key = :key
+""")
+
+
+class PostgresBucketStore:
+    """Token buckets shared by every replica, one row per bucket."""
+
+    def acquire(self, buckets: List[Tuple[str, BucketLimit]]) -> float:
+        # One transaction: if any bucket is empty, closing without commit gives the other tokens back
+        with engine.connect() as connection:
+            for key, limit in buckets:
+                params = {"key": key, "capacity": limit.capacity, "rate": limit.rate}
+                if connection.execute(_TAKE_TOKEN_SQL, params).first() is None:
+                    wait = connection.execute(_BUCKET_WAIT_SQL, params).scalar()
+                    return max(float(wait or 0.0), 0.001)
+            connection.commit()
+        return 0.0
+
+
+class RequestRateLimiter:
+    def __init__(self, backend: str = RATE_LIMIT_BACKEND):
+        self.backend = backend
+        self.routes = _load_route_limits()
+        self.store = PostgresBucketStore() if backend == "postgres" else MemoryBucketStore()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def match(self, method: str, path: str) -> Optional[str]:
+        """The configured route for a request, if it is rate limited."""
+        for route in self.routes:
+            route_method, _, route_path = route.partition(" ")
+            if route_method != method:
+                continue
+            if path == route_path or path == route_path.rstrip("/") or (route_path.endswith("/") and path.startswith(route_path)):
+                return route
+        return None
+
+    def _buckets(self, route: str, user_id: Optional[str], ip: Optional[str]) -> List[Tuple[str, BucketLimit]]:
+        buckets = []
+        for scope, identity in (("user", user_id), ("ip", ip)):
+            limit = self.routes[route].get(scope)
+            if limit and identity:
+                buckets.append((f"{route}|{scope}:{identity}", BucketLimit(limit["rpm"], limit.get("burst"))))
+        return buckets
+
+    async def check(self, route: str, user_id: Optional[str], ip: Optional[str]) -> float:
+        """Take a token for the request. Returns 0 if allowed, else seconds until it would be."""
+        buckets = self._buckets(route, user_id, ip)
+        stats = self._stats.setdefault(route, {"allowed": 0, "limited": 0, "errors": 0})
+        if not buckets:
+            stats["allowed"] += 1
+            return 0.0
+        try:
+            if self.backend == "postgres":
+                wait = await asyncio.to_thread(self.store.acquire, buckets)
+            else:
+                wait = self.store.acquire(buckets)
+        except Exception as e:
+            # Fail open: a rate-limit outage shouldn't take the API down with it
+            stats["errors"] += 1
+            print(f"[rate_limit] Bucket check failed for {route}: {str(e)}")
+            return 0.0
+        stats["limited" if wait > 0 else "allowed"] += 1
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "routes": {route: {**self._stats.get(route, {}), "limits": limits} for route, limits in self.routes.items()},
+        }
+
+
+request_rate_limiter = RequestRateLimiter()
+
+
+def _client_ip(scope) -> Optional[str]:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip() or None
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def _user_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                # Verified (and cached) the same way the route's verify_token will
+                return str(decode_token(token.strip())["user_id"])
+            except Exception:
+                return None  # The route itself answers with 401
+    return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying request_rate_limiter (pure ASGI, so streamed responses pass through untouched)."""
+
+    def __init__(self, app, limiter: RequestRateLimiter = None):
+        self.app = app
+        self.limiter = limiter or request_rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route = self.limiter.match(scope["method"], scope["path"])
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        wait = await self.limiter.check(route, _user_id(scope), _client_ip(scope))
+        if wait <= 0:
+            return await self.app(scope, receive, send)
+
+        retry_after = max(1, math.ceil(min(wait, RATE_LIMIT_MAX_RETRY_AFTER)))
+        body = json.dumps({"detail": f"Rate limit exceeded. Try again in {retry_after} seconds."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,127 @@
+"""
+Fan-out rescoring: when a resume is uploaded, score it against all of the user's jobs.
+
+Runs on the task queue (see worker.py). Job embeddings are stacked into one matrix and
+scored with a single matrix-vector product; results are upserted into resume_job_scores
+in batches, with progress events published to the user's event stream.
+"""
+import asyncio
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Job, JobEmbedding, Resume, ResumeEmbedding, ResumeJobScore
+from app.services.task_queue import enqueue, task_handler
+from app.services.event_bus import publish_event, EVENT_RESCORE_PROGRESS, EVENT_RESCORE_COMPLETE
+
+RESCORE_RESUME_TASK = "rescore_resume"
+
+# Rows upserted (and progress events published) per batch
+RESCORE_BATCH_SIZE = 200
+
+
+def schedule_rescore(db: Session, user_id: int, resume_id: int):
+    """Enqueue rescoring of a resume against the user's jobs (coalesced per resume)."""
+    return enqueue(
+        db,
+        RESCORE_RESUME_TASK,
+        {"user_id": user_id, "resume_id": resume_id},
+        dedup_key=f"{RESCORE_RESUME_TASK}:{resume_id}",
+    )
+
+
+def score_matrix(resume_vector: np.ndarray, job_matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of one resume vector against each row of `job_matrix`, on a 0-100 scale."""
+    job_norms = np.linalg.norm(job_matrix, axis=1)
+    resume_norm = np.linalg.norm(resume_vector)
+    denominator = job_norms * resume_norm
+    similarities = np.divide(
+        job_matrix @ resume_vector,
+        denominator,
+        out=np.zeros(len(job_matrix), dtype=np.float64),
+        where=denominator != 0,
+    )
+    return np.clip(similarities * 100, 0, 100)
+
+
+def rescore_resume(user_id: int, resume_id: int) -> int:
+    """Score a resume against all of the user's jobs and persist the results. Returns jobs scored."""
+    db = SessionLocal()
+    try:
+        resume_embedding = db.query(ResumeEmbedding).join(
+            Resume, Resume.resume_id == ResumeEmbedding.resume_id
+        ).filter(
+            ResumeEmbedding.resume_id == resume_id,
+            ResumeEmbedding.section == "full",
+            Resume.user_id == user_id,
+        ).first()
+        resume_vector = getattr(resume_embedding, "embedding", None) if resume_embedding else None
+        if resume_vector is None:
+            publish_event(user_id, EVENT_RESCORE_COMPLETE, resume_id=resume_id, scored=0, total=0)
+            return 0
+
+        job_embeddings = db.query(JobEmbedding).join(
+            Job, Job.job_id == JobEmbedding.job_id
+        ).filter(
+            Job.user_id == user_id,
+            JobEmbedding.section == "full",
+        ).all()
+        job_ids = []
+        vectors = []
+        for job_embedding in job_embeddings:
+            vector = getattr(job_embedding, "embedding", None)
+            if vector is not None:
+                job_ids.append(job_embedding.job_id)
+                vectors.append(np.asarray(vector, dtype=np.float64))
+
+        total = len(job_ids)
+        if total:
+            scores = score_matrix(np.asarray(resume_vector, dtype=np.float64), np.vstack(vectors))
+            for start in range(0, total, RESCORE_BATCH_SIZE):
+                batch = [
+                    {
+                        "user_id": user_id,
+                        "resume_id": resume_id,
+                        "job_id": job_id,
+                        "score": round(float(score), 1),
+                    }
+                    for job_id, score in zip(job_ids[start:start + RESCORE_BATCH_SIZE], scores[start:start + RESCORE_BATCH_SIZE])
+                ]
+                statement = insert(ResumeJobScore).values(batch)
+                db.execute(statement.on_conflict_do_update(
+                    constraint="uq_resume_job_scores_resume_job",
+                    set_={"score": statement.excluded.score, "computed_at": func.now()},
+                ))
+                db.commit()
+                publish_event(
+                    user_id, EVENT_RESCORE_PROGRESS,
+                    resume_id=resume_id, scored=min(start + RESCORE_BATCH_SIZE, total), total=total,
+                )
+
+        publish_event(user_id, EVENT_RESCORE_COMPLETE, resume_id=resume_id, scored=total, total=total)
+        return total
+    finally:
+        db.close()
+
+
+def best_resumes_for_jobs(db: Session, user_id: int, job_ids: List[int]) -> Dict[int, ResumeJobScore]:
+    """Highest-scoring resume per job, from the stored batch scores."""
+    if not job_ids:
+        return {}
+    rows = db.query(ResumeJobScore).filter(
+        ResumeJobScore.user_id == user_id,
+        ResumeJobScore.job_id.in_(job_ids),
+    ).order_by(ResumeJobScore.job_id, ResumeJobScore.score.desc()).all()
+    best: Dict[int, ResumeJobScore] = {}
+    for row in rows:
+        best.setdefault(row.job_id, row)
+    return best
+
+
+@task_handler(RESCORE_RESUME_TASK)
+async def handle_rescore_resume(payload: dict):
+    # Numpy and DB work are blocking; keep the worker's event loop free
+    await asyncio.to_thread(rescore_resume, payload["user_id"], payload["resume_id"])
@@ -0,0 +1,37 @@
+"""
+Helpers shared by the single and bulk resume upload paths.
+"""
+from sqlalchemy.orm import Session
+
+from app.models import Bullet, Resume, ResumeEmbedding
+
+
+def with_embedding(model, embedding, **fields):
+    """Build a row, setting `embedding` only when there is one and the model has the column."""
+    if embedding is not None and hasattr(model, "embedding"):
+        fields["embedding"] = embedding
+    return model(**fields)
+
+
+def find_cached_resume(db: Session, sha256: str) -> Resume | None:
+    """Most recent processed resume (any user) whose file has this fingerprint."""
+    return db.query(Resume).filter(
+        Resume.content_sha256 == sha256, Resume.parsed_json.isnot(None)
+    ).order_by(Resume.uploaded_at.desc()).first()
+
+
+def copy_resume_artifacts(db: Session, source: Resume, target: Resume) -> bool:
+    """Copy bullets and embeddings of an identical, already-processed resume. Returns True if it had a full embedding."""
+    for bullet in source.bullets:
+        db.add(with_embedding(
+            Bullet, getattr(bullet, "embedding", None),
+            resume_id=target.resume_id, section=bullet.section, text=bullet.text,
+        ))
+    has_full_embedding = False
+    for resume_embedding in source.resume_embeddings:
+        db.add(with_embedding(
+            ResumeEmbedding, getattr(resume_embedding, "embedding", None),
+            resume_id=target.resume_id, section=resume_embedding.section,
+        ))
+        has_full_embedding = has_full_embedding or resume_embedding.section == "full"
+    return has_full_embedding
@@ -0,0 +1,148 @@
+"""
+Cached UserSettings lookups for LLM-backed routes and tasks.
+
+Every AI request needs the user's provider, API key and model. Settings are cached per
+user_id, including "no settings saved", for SETTINGS_CACHE_TTL_SECONDS. PUT /api/settings/
+writes through: the route commits, then updates this process's cache and broadcasts an
+invalidation to every other API replica and worker over the event bus. If a replica misses
+a broadcast, for example while its listener reconnects, the TTL bounds how stale it can get.
+
+Entries are plain snapshots rather than ORM rows, so they are safe to share across
+sessions and threads. `llm_options_from_settings` and the settings routes accept them as-is.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models import UserSettings
+from app.services.event_bus import event_bus
+from app.services.llm_service import llm_options_from_settings
+
+load_dotenv()
+
+SETTINGS_CACHE_TTL_SECONDS = float(os.getenv("SETTINGS_CACHE_TTL_SECONDS", "300"))
+SETTINGS_CACHE_SIZE = int(os.getenv("SETTINGS_CACHE_SIZE", "10000"))
+SETTINGS_INVALIDATED = "user_settings_invalidated"
+
+# What GET /api/settings/ reports for a user who hasn't saved settings yet
+DEFAULT_AI_PROVIDER = "openai"
+DEFAULT_MODEL_PREFERENCE = "gpt-4-turbo-preview"
+
+_SETTINGS_FIELDS = (
+    "user_id", "ai_provider", "api_key", "model_preference",
+    "fallback_provider", "fallback_api_key", "fallback_model", "hedge_requests",
+)
+
+
+class SettingsSnapshot:
+    """Immutable copy of a UserSettings row."""
+
+    __slots__ = _SETTINGS_FIELDS
+
+    def __init__(self, settings: UserSettings):
+        for field in _SETTINGS_FIELDS:
+            object.__setattr__(self, field, getattr(settings, field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SettingsSnapshot is read-only")
+
+
+class UserSettingsCache:
+    def __init__(self, ttl_seconds: float = SETTINGS_CACHE_TTL_SECONDS, max_size: int = SETTINGS_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[Optional[SettingsSnapshot], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-user generation, bumped by put/invalidate: a miss only stores what it read if no
+        # write landed meanwhile. Bounded like the entries; evicted users fall back to _floor,
+        # the highest generation evicted so far, so an eviction never makes a stale read look current.
+        self._generations: "OrderedDict[int, int]" = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self._subscribed = False
+        self.stats_counts = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _subscribe(self):
+        # Deferred to first use so importing this module never starts the LISTEN thread
+        if not self._subscribed:
+            self._subscribed = True
+            event_bus.on_broadcast(SETTINGS_INVALIDATED, lambda data: self.invalidate(int(data["user_id"])))
+
+    def _generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, self._floor)
+
+    def _bump(self, user_id: int):
+        # Caller holds the lock
+        self._clock += 1
+        self._generations[user_id] = self._clock
+        self._generations.move_to_end(user_id)
+        while len(self._generations) > self.max_size:
+            _, evicted = self._generations.popitem(last=False)
+            self._floor = max(self._floor, evicted)
+
+    def _store(self, user_id: int, snapshot: Optional[SettingsSnapshot], generation: int = None):
+        """Cache `snapshot`; with `generation`, only if the user's settings haven't changed since."""
+        with self._lock:
+            if generation is not None and self._generation(user_id) != generation:
+                return
+            self._entries[user_id] = (snapshot, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, db: Session, user_id: int) -> Optional[SettingsSnapshot]:
+        """The user's settings (None if they haven't saved any), from cache or the database."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.stats_counts["hits"] += 1
+                return entry[0]
+            self.stats_counts["misses"] += 1
+            generation = self._generation(user_id)
+
+        self._subscribe()
+        settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+        snapshot = SettingsSnapshot(settings) if settings else None
+        # A put() or invalidation during the query wins over this (possibly older) read
+        self._store(user_id, snapshot, generation)
+        return snapshot
+
+    def put(self, settings: UserSettings):
+        """Write-through after a committed update: refresh this process and invalidate the others."""
+        self._subscribe()
+        snapshot = SettingsSnapshot(settings)
+        with self._lock:
+            self._bump(settings.user_id)
+        self._store(settings.user_id, snapshot)
+        try:
+            event_bus.broadcast(SETTINGS_INVALIDATED, {"user_id": settings.user_id})
+        except Exception as e:
+            # Other replicas catch up when their entry's TTL runs out
+            print(f"Failed to broadcast settings invalidation for user {settings.user_id}: {str(e)}")
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._bump(user_id)
+            if self._entries.pop(user_id, None) is not None:
+                self.stats_counts["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats_counts, "entries": len(self._entries), "ttl_seconds": self.ttl_seconds}
+
+
+settings_cache = UserSettingsCache()
+
+
+def get_user_settings(db: Session, user_id: int) -> Optional[SettingsSnapshot]:
+    return settings_cache.get(db, user_id)
+
+
+def get_llm_options(db: Session, user_id: int) -> Dict[str, Any]:
+    """LLMService keyword arguments for the user (see llm_options_from_settings)."""
+    return llm_options_from_settings(settings_cache.get(db, user_id))
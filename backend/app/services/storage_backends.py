@@ -0,0 +1,344 @@
+"""
+Object storage backends used by StorageService (see storage_service.py).
+
+STORAGE_BACKEND selects one:
+- supabase (default): Supabase Storage; needs SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY.
+- local: a content-addressed store on the local filesystem under STORAGE_LOCAL_DIR, for
+  self-hosted deployments and load tests that shouldn't touch a remote object store.
+
+Local layout, per bucket:
+
+    <bucket>/objects/ab/cd/abcd...  file bytes, named by SHA-256 (sharded two levels deep)
+    <bucket>/refs/<object key>      hard link to the object for that key
+
+Identical files are stored once: every key holding the same bytes links the same object,
+and the object's link count is its reference count. Objects and refs are written to a
+temp file first and renamed into place, so readers never see a partial file.
+
+Local signed URLs point at the API's GET /api/storage/{bucket}/{key} route (under
+STORAGE_PUBLIC_URL, the API base the browser reaches) with an expiry and an HMAC-SHA256
+signature keyed with STORAGE_URL_SECRET (default: NEXTAUTH_SECRET).
+"""
+import hashlib
+import hmac
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import quote, urlencode
+from dotenv import load_dotenv
+
+from app.auth import NEXTAUTH_SECRET
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+STORAGE_LOCAL_DIR = os.getenv("STORAGE_LOCAL_DIR", "./storage")
+STORAGE_PUBLIC_URL = os.getenv("STORAGE_PUBLIC_URL", "http://localhost:8000").rstrip("/")
+STORAGE_URL_SECRET = os.getenv("STORAGE_URL_SECRET") or NEXTAUTH_SECRET
+
+_CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def content_type(key: str) -> str:
+    return _CONTENT_TYPES.get(os.path.splitext(key)[1].lower(), _CONTENT_TYPES[".docx"])
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int  # Bytes (0 if unknown)
+    created_at: Optional[float]  # Unix time, if the backend reports it
+
+
+class StorageBackend:
+    """Interface every storage backend implements. Keys are paths within a bucket."""
+
+    name = "base"
+
+    def upload(self, bucket: str, key: str, content: bytes, upsert: bool = False) -> str:
+        """Store `content` under `key`. Returns the URL (or key) to record as the file's location."""
+        raise NotImplementedError
+
+    def signed_url(self, bucket: str, key: str, expires_in: int) -> str:
+        """A URL the browser can download the file from for `expires_in` seconds."""
+        raise NotImplementedError
+
+    def signed_urls(self, bucket: str, keys: List[str], expires_in: int) -> Dict[str, str]:
+        """Signed URLs for several files ({key: url}; keys that can't be signed are left out)."""
+        urls = {}
+        for key in keys:
+            try:
+                urls[key] = self.signed_url(bucket, key, expires_in)
+            except Exception:
+                continue
+        return urls
+
+    def remove(self, bucket: str, keys: List[str]):
+        """Delete the files stored under `keys` (missing keys are ignored)."""
+        raise NotImplementedError
+
+    def object_key(self, bucket: str, location: str) -> str:
+        """The key for a location returned by upload() (the location itself unless it is a URL)."""
+        return location
+
+    def location(self, bucket: str, key: str) -> str:
+        """What upload() returns for `key`, without touching storage."""
+        return key
+
+    def list_objects(self, bucket: str, page_size: int = 1000) -> Iterator[List[StoredObject]]:
+        """Every object in the bucket, in pages of about `page_size`."""
+        raise NotImplementedError
+
+
+class SupabaseStorageBackend(StorageBackend):
+    name = "supabase"
+
+    def __init__(self, url: str, service_role_key: str):
+        from supabase import create_client
+
+        self.client = create_client(url, service_role_key)
+
+    def upload(self, bucket: str, key: str, content: bytes, upsert: bool = False) -> str:
+        response = self.client.storage.from_(bucket).upload(
+            key,
+            content,
+            file_options={
+                "content-type": content_type(key),
+                "upsert": "true" if upsert else "false",
+            }
+        )
+        if not response:
+            raise RuntimeError("Failed to upload file")
+        return self.client.storage.from_(bucket).get_public_url(key)
+
+    def signed_url(self, bucket: str, key: str, expires_in: int) -> str:
+        response = self.client.storage.from_(bucket).create_signed_url(key, expires_in)
+        return response.get("signedURL", "")
+
+    def signed_urls(self, bucket: str, keys: List[str], expires_in: int) -> Dict[str, str]:
+        # One API call for the whole list; missing objects come back with an error instead of a URL
+        try:
+            response = self.client.storage.from_(bucket).create_signed_urls(keys, expires_in)
+        except Exception:
+            # Some client versions fail the whole batch on a missing object; sign one by one
+            return super().signed_urls(bucket, keys, expires_in)
+        return {item["path"]: item["signedURL"] for item in response if item.get("path") and not item.get("error")}
+
+    def remove(self, bucket: str, keys: List[str]):
+        self.client.storage.from_(bucket).remove(keys)
+
+    def object_key(self, bucket: str, location: str) -> str:
+        # Public URLs look like <project>/storage/v1/object/public/<bucket>/<key>?
+        marker = f"/object/public/{bucket}/"
+        if marker not in location:
+            return location
+        key = location.split(marker, 1)[1]
+        return key[:-1] if key.endswith("?") else key
+
+    def location(self, bucket: str, key: str) -> str:
+        return self.client.storage.from_(bucket).get_public_url(key)
+
+    def _list_folder(self, bucket: str, prefix: str, page_size: int) -> List[dict]:
+        entries, offset = [], 0
+        while True:
+            page = self.client.storage.from_(bucket).list(prefix, {
+                "limit": page_size, "offset": offset, "sortBy": {"column": "name", "order": "asc"},
+            })
+            entries.extend(page)
+            if len(page) < page_size:
+                return entries
+            offset += page_size
+
+    def list_objects(self, bucket: str, page_size: int = 1000) -> Iterator[List[StoredObject]]:
+        # Listing is per folder and offset-paged, and deleting a folder's last file removes the
+        # folder: list the top level up front so deletions between pages can't shift it
+        folders, page = [], []
+        for entry in self._list_folder(bucket, "", page_size):
+            if entry.get("id") is None:
+                folders.append(entry["name"])
+            else:
+                page.append(self._stored_object("", entry))
+        for folder in folders:
+            pending = [folder]
+            while pending:
+                prefix = pending.pop()
+                for entry in self._list_folder(bucket, prefix, page_size):
+                    if entry.get("id") is None:
+                        pending.append(f"{prefix}/{entry['name']}")
+                    else:
+                        page.append(self._stored_object(prefix, entry))
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    @staticmethod
+    def _stored_object(prefix: str, entry: dict) -> StoredObject:
+        created_at = None
+        if entry.get("created_at"):
+            try:
+                created_at = datetime.fromisoformat(entry["created_at"].replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                pass
+        return StoredObject(
+            key=f"{prefix}/{entry['name']}" if prefix else entry["name"],
+            size=int((entry.get("metadata") or {}).get("size") or 0),
+            created_at=created_at,
+        )
+
+
+class LocalStorageBackend(StorageBackend):
+    """Content-addressed filesystem store (layout in the module docstring)."""
+
+    name = "local"
+
+    def __init__(self, root: str = STORAGE_LOCAL_DIR, public_url: str = STORAGE_PUBLIC_URL, url_secret: str = STORAGE_URL_SECRET):
+        self.root = Path(root).resolve()
+        self.public_url = public_url
+        self._url_secret = url_secret.encode()
+
+    def _bucket_dir(self, bucket: str) -> Path:
+        if not bucket or "/" in bucket or bucket in (".", ".."):
+            raise ValueError(f"Invalid bucket name: {bucket!r}")
+        return self.root / bucket
+
+    def _ref_path(self, bucket: str, key: str) -> Path:
+        parts = [part for part in key.split("/") if part]
+        if not parts or any(part in (".", "..") for part in parts):
+            raise ValueError(f"Invalid object key: {key!r}")
+        return self._bucket_dir(bucket).joinpath("refs", *parts)
+
+    def _object_path(self, bucket: str, digest: str) -> Path:
+        return self._bucket_dir(bucket) / "objects" / digest[:2] / digest[2:4] / digest
+
+    def _store_object(self, bucket: str, content: bytes) -> Path:
+        """Write the bytes once per distinct content. Returns the object's path."""
+        path = self._object_path(bucket, hashlib.sha256(content).hexdigest())
+        if path.exists():
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(content)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            try:
+                # link (not rename) so a concurrent writer of the same content never swaps the inode
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(tmp_path)
+        return path
+
+    def upload(self, bucket: str, key: str, content: bytes, upsert: bool = False) -> str:
+        ref = self._ref_path(bucket, key)
+        if ref.exists() and not upsert:
+            raise RuntimeError(f"Object already exists: {bucket}/{key}")
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        tmp_ref = ref.parent / f".tmp-{uuid.uuid4().hex}"
+        for _ in range(3):
+            try:
+                os.link(self._store_object(bucket, content), tmp_ref)
+                break
+            except FileNotFoundError:
+                # A concurrent delete dropped the last reference in between; write it again
+                continue
+        else:
+            raise RuntimeError(f"Failed to store object: {bucket}/{key}")
+        try:
+            os.replace(tmp_ref, ref)
+        except BaseException:
+            tmp_ref.unlink(missing_ok=True)
+            raise
+        return key
+
+    def _signature(self, bucket: str, key: str, expires: int) -> str:
+        message = f"{bucket}\n{key}\n{expires}".encode()
+        return hmac.new(self._url_secret, message, hashlib.sha256).hexdigest()
+
+    def signed_url(self, bucket: str, key: str, expires_in: int) -> str:
+        ref = self._ref_path(bucket, key)
+        if not ref.exists():
+            raise FileNotFoundError(f"Object not found: {bucket}/{key}")
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "signature": self._signature(bucket, key, expires)})
+        return f"{self.public_url}/api/storage/{quote(bucket)}/{quote(key)}?{query}"
+
+    def signed_file(self, bucket: str, key: str, expires: int, signature: str) -> Path:
+        """
+        The file behind a URL from signed_url(). Raises PermissionError if the signature is
+        wrong or the URL has expired, FileNotFoundError if the object is gone.
+        """
+        if expires < time.time() or not hmac.compare_digest(self._signature(bucket, key, expires), signature):
+            raise PermissionError("Invalid or expired download link")
+        ref = self._ref_path(bucket, key)
+        if not ref.is_file():
+            raise FileNotFoundError(f"Object not found: {bucket}/{key}")
+        return ref
+
+    def remove(self, bucket: str, keys: List[str]):
+        for key in keys:
+            ref = self._ref_path(bucket, key)
+            try:
+                links = ref.stat().st_nlink
+                # Last reference besides the object itself: find the object by its content
+                digest = hashlib.sha256(ref.read_bytes()).hexdigest() if links == 2 else None
+                ref.unlink()
+            except FileNotFoundError:
+                continue
+            if digest:
+                self._object_path(bucket, digest).unlink(missing_ok=True)
+
+    def list_objects(self, bucket: str, page_size: int = 1000) -> Iterator[List[StoredObject]]:
+        refs = self._bucket_dir(bucket) / "refs"
+        page = []
+        for directory, _, filenames in os.walk(refs):
+            for filename in filenames:
+                if filename.startswith(".tmp-"):
+                    continue
+                path = Path(directory) / filename
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                # Shared objects are only reclaimed with their last key; count their bytes then
+                size = stat.st_size if stat.st_nlink <= 2 else 0
+                page.append(StoredObject(path.relative_to(refs).as_posix(), size, stat.st_mtime))
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+        if page:
+            yield page
+
+
+def create_storage_backend(name: str = STORAGE_BACKEND) -> Optional[StorageBackend]:
+    """Build the configured backend, or None if it can't be used (reason is printed)."""
+    if name == "local":
+        backend = LocalStorageBackend()
+        print(f"Local storage backend at {backend.root}")
+        return backend
+    if name != "supabase":
+        print(f"Warning: Unknown STORAGE_BACKEND '{name}'. File storage will not work.")
+        return None
+
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not supabase_url or not supabase_key:
+        print("Warning: Supabase credentials not set. File storage will not work (or set STORAGE_BACKEND=local).")
+        return None
+    try:
+        backend = SupabaseStorageBackend(supabase_url, supabase_key)
+        print("Supabase client initialized")
+        return backend
+    except Exception as e:
+        print(f"Failed to initialize Supabase client: {str(e)}")
+        return None
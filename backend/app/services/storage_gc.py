@@ -0,0 +1,164 @@
+"""
+Garbage collection of orphaned resume files in object storage.
+
+Files are left behind when an upload is retried under a new key, or when a resume row is
+removed. The collector lists the bucket page by page. For each page it asks the database
+which keys are still referenced, either by `resumes.file_path` (the key or its public URL)
+or by a pending `storage_outbox` entry. Everything else that is older than
+STORAGE_GC_MIN_AGE_HOURS is deleted in batched remove() calls. Deletes are limited to
+STORAGE_GC_MAX_DELETES_PER_SECOND.
+
+Run it on demand:
+    python -m app.services.storage_gc [--dry-run]
+or queue a `storage_gc` task for the worker. Each run prints a summary with throughput and
+bytes reclaimed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List
+from dotenv import load_dotenv
+
+from app.database import SessionLocal
+from app.models import Resume, StorageOutbox
+from app.services.storage_backends import StorageBackend, StoredObject
+from app.services.storage_service import storage_service
+from app.services.task_queue import task_handler
+from app.utils.token_bucket import TokenBucket
+
+load_dotenv()
+
+STORAGE_GC_TASK = "storage_gc"
+
+STORAGE_GC_PAGE_SIZE = int(os.getenv("STORAGE_GC_PAGE_SIZE", "1000"))
+STORAGE_GC_DELETE_BATCH_SIZE = int(os.getenv("STORAGE_GC_DELETE_BATCH_SIZE", "100"))
+STORAGE_GC_MAX_DELETES_PER_SECOND = float(os.getenv("STORAGE_GC_MAX_DELETES_PER_SECOND", "50"))
+# Younger objects may belong to an upload whose database write hasn't committed yet
+STORAGE_GC_MIN_AGE_HOURS = float(os.getenv("STORAGE_GC_MIN_AGE_HOURS", "24"))
+
+
+def _referenced_keys(backend: StorageBackend, bucket: str, keys: List[str]) -> set:
+    """The subset of `keys` still referenced by a resume or a pending upload."""
+    locations = {backend.location(bucket, key): key for key in keys}
+    db = SessionLocal()
+    try:
+        file_paths = db.query(Resume.file_path).filter(
+            Resume.file_path.in_(list(locations) + keys)
+        ).all()
+        pending = db.query(StorageOutbox.object_key).filter(StorageOutbox.object_key.in_(keys)).all()
+    finally:
+        db.close()
+    referenced = {locations.get(file_path, file_path) for (file_path,) in file_paths}
+    referenced.update(object_key for (object_key,) in pending)
+    return referenced
+
+
+class StorageGarbageCollector:
+    def __init__(
+        self,
+        bucket: str = "resumes",
+        dry_run: bool = False,
+        page_size: int = STORAGE_GC_PAGE_SIZE,
+        delete_batch_size: int = STORAGE_GC_DELETE_BATCH_SIZE,
+        max_deletes_per_second: float = STORAGE_GC_MAX_DELETES_PER_SECOND,
+        min_age_hours: float = STORAGE_GC_MIN_AGE_HOURS,
+    ):
+        self.bucket = bucket
+        self.dry_run = dry_run
+        self.page_size = max(1, page_size)
+        self.delete_batch_size = max(1, delete_batch_size)
+        self.min_age_seconds = min_age_hours * 3600
+        # One batch may go out at once; after that deletes are paced to the configured rate (<= 0: unlimited)
+        self.limiter = TokenBucket(self.delete_batch_size, max_deletes_per_second) if max_deletes_per_second > 0 else None
+
+    def _orphans(self, backend: StorageBackend, page: List[StoredObject], cutoff: float) -> List[StoredObject]:
+        candidates = [obj for obj in page if obj.created_at is None or obj.created_at < cutoff]
+        if not candidates:
+            return []
+        referenced = _referenced_keys(backend, self.bucket, [obj.key for obj in candidates])
+        return [obj for obj in candidates if obj.key not in referenced]
+
+    def _delete(self, backend: StorageBackend, batch: List[StoredObject], stats: Dict):
+        if self.limiter:
+            wait = self.limiter.time_until(len(batch))
+            if wait > 0:
+                time.sleep(wait)
+            self.limiter.consume(len(batch))
+        try:
+            backend.remove(self.bucket, [obj.key for obj in batch])
+        except Exception as e:
+            stats["failed"] += len(batch)
+            print(f"[storage_gc] Failed to delete {len(batch)} objects: {str(e)}")
+            return
+        for obj in batch:
+            storage_service.url_cache.invalidate(self.bucket, obj.key)
+        stats["deleted"] += len(batch)
+        stats["bytes_reclaimed"] += sum(obj.size for obj in batch)
+
+    def run(self) -> Dict:
+        """Blocking: one full pass over the bucket. Returns the run's stats."""
+        backend = storage_service.backend
+        started = time.monotonic()
+        cutoff = time.time() - self.min_age_seconds
+        stats = {
+            "bucket": self.bucket, "dry_run": self.dry_run, "scanned": 0, "orphaned": 0,
+            "deleted": 0, "failed": 0, "bytes_reclaimed": 0, "orphaned_bytes": 0,
+        }
+        for page in backend.list_objects(self.bucket, self.page_size):
+            stats["scanned"] += len(page)
+            # Objects without a creation time are only collected when no age limit is set
+            if self.min_age_seconds > 0:
+                page = [obj for obj in page if obj.created_at is not None]
+            orphans = self._orphans(backend, page, cutoff)
+            stats["orphaned"] += len(orphans)
+            stats["orphaned_bytes"] += sum(obj.size for obj in orphans)
+            if self.dry_run:
+                for obj in orphans:
+                    print(f"[storage_gc] Would delete {self.bucket}/{obj.key} ({obj.size} bytes)")
+                continue
+            for start in range(0, len(orphans), self.delete_batch_size):
+                self._delete(backend, orphans[start:start + self.delete_batch_size], stats)
+
+        elapsed = time.monotonic() - started
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["scanned_per_second"] = round(stats["scanned"] / elapsed, 1) if elapsed else 0.0
+        stats["deleted_per_second"] = round(stats["deleted"] / elapsed, 1) if elapsed else 0.0
+        print(
+            f"[storage_gc] {'Dry run: ' if self.dry_run else ''}scanned {stats['scanned']} objects in "
+            f"{elapsed:.1f}s ({stats['scanned_per_second']}/s), {stats['orphaned']} orphaned, "
+            f"{stats['deleted']} deleted ({stats['deleted_per_second']}/s), "
+            f"{stats['bytes_reclaimed']} bytes reclaimed, {stats['failed']} failed"
+        )
+        return stats
+
+
+@task_handler(STORAGE_GC_TASK)
+async def handle_storage_gc(payload: dict):
+    collector = StorageGarbageCollector(
+        bucket=payload.get("bucket", "resumes"),
+        dry_run=bool(payload.get("dry_run", False)),
+    )
+    await asyncio.to_thread(collector.run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete orphaned resume files from object storage.")
+    parser.add_argument("--bucket", default="resumes")
+    parser.add_argument("--dry-run", action="store_true", help="report orphans without deleting them")
+    parser.add_argument("--min-age-hours", type=float, default=STORAGE_GC_MIN_AGE_HOURS)
+    parser.add_argument("--max-deletes-per-second", type=float, default=STORAGE_GC_MAX_DELETES_PER_SECOND)
+    args = parser.parse_args()
+
+    stats = StorageGarbageCollector(
+        bucket=args.bucket,
+        dry_run=args.dry_run,
+        min_age_hours=args.min_age_hours,
+        max_deletes_per_second=args.max_deletes_per_second,
+    ).run()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
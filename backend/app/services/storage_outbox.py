@@ -0,0 +1,106 @@
+"""
+Storage outbox: resume files are written to object storage off the request path.
+
+The upload request stages the file in STORAGE_STAGING_DIR (a hard link to the upload's temp
+file when they share a filesystem, a copy otherwise). In the same transaction as the resume
+row it adds a `storage_outbox` row (object key + staging path) and a `store_resume_file`
+task. Either all three commit or none do, so a resume never points at a key nobody will
+upload. The file bytes never pass through Postgres or stay in the API's memory.
+
+The worker uploads the staged file, points the resume at the stored object, deletes the
+outbox row and then the staged file; failed uploads are retried with backoff by the task
+queue. STORAGE_STAGING_DIR must therefore be shared by the API and the worker (same host,
+or a shared volume).
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Resume, StorageOutbox
+from app.services.storage_service import storage_service
+from app.services.task_queue import enqueue, task_handler
+
+load_dotenv()
+
+STORE_RESUME_FILE_TASK = "store_resume_file"
+STORAGE_STAGING_DIR = os.getenv("STORAGE_STAGING_DIR", "./storage_staging")
+
+
+def stage_file(source_path: str) -> str:
+    """Blocking: put a copy of `source_path` in the staging dir. Returns the staged path."""
+    staging_dir = Path(STORAGE_STAGING_DIR).resolve()
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    staged = staging_dir / uuid.uuid4().hex
+    try:
+        os.link(source_path, staged)
+    except OSError:
+        # Different filesystem (or no hard links): copy, then rename so the worker never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=staging_dir, prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, staged)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+    return str(staged)
+
+
+def discard_staged(staging_path: str):
+    """Remove a staged file whose outbox row was never committed."""
+    Path(staging_path).unlink(missing_ok=True)
+
+
+def add_resume_upload(db: Session, resume_id: int, object_key: str, staging_path: str) -> StorageOutbox:
+    """
+    Add the outbox row and its upload task to the current transaction (not committed).
+    If the transaction rolls back, the caller should discard_staged(staging_path).
+    """
+    entry = StorageOutbox(resume_id=resume_id, object_key=object_key, staging_path=staging_path)
+    db.add(entry)
+    db.flush()
+    enqueue(
+        db,
+        STORE_RESUME_FILE_TASK,
+        {"outbox_id": entry.id},
+        dedup_key=f"{STORE_RESUME_FILE_TASK}:{entry.id}",
+        commit=False,
+    )
+    return entry
+
+
+def store_resume_file(outbox_id: int) -> bool:
+    """Upload one outbox entry and update its resume. Returns False if it was already stored."""
+    db = SessionLocal()
+    try:
+        entry = db.query(StorageOutbox).filter(StorageOutbox.id == outbox_id).first()
+        if not entry:
+            return False
+        staging_path = entry.staging_path
+        try:
+            content = Path(staging_path).read_bytes()
+        except FileNotFoundError:
+            raise RuntimeError(
+                f"Staged file {staging_path} not found; STORAGE_STAGING_DIR must be shared by the API and the worker"
+            )
+        # upsert: a retry after a failed commit below must not fail on the existing object
+        storage_url = storage_service.upload_file(content, entry.object_key, upsert=True)
+        db.query(Resume).filter(Resume.resume_id == entry.resume_id).update({"file_path": storage_url})
+        db.delete(entry)
+        db.commit()
+    finally:
+        db.close()
+    discard_staged(staging_path)
+    return True
+
+
+@task_handler(STORE_RESUME_FILE_TASK)
+async def handle_store_resume_file(payload: dict):
+    # The Supabase client is synchronous; keep the worker's event loop free
+    await asyncio.to_thread(store_resume_file, payload["outbox_id"])
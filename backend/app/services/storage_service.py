@@ -1,85 +1,195 @@
 import os
-from typing import Optional
-from supabase import create_client, Client
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from app.services.storage_backends import StorageBackend, create_storage_backend
+
 load_dotenv()
 
+SIGNED_URL_EXPIRES_SECONDS = int(os.getenv("SIGNED_URL_EXPIRES_SECONDS", "3600"))
+# Never hand out a cached URL with less than this left (the browser may use it a while later)
+SIGNED_URL_MIN_REMAINING_SECONDS = int(os.getenv("SIGNED_URL_MIN_REMAINING_SECONDS", "300"))
+# Past this point a cached URL is still served, but re-signed in the background
+SIGNED_URL_REFRESH_AHEAD_SECONDS = int(os.getenv("SIGNED_URL_REFRESH_AHEAD_SECONDS", "900"))
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "10000"))
+
+
+class SignedUrlCache:
+    """
+    LRU cache of signed URLs keyed by (bucket, key), with their expiry times.
+
+    A URL is reused until it gets within SIGNED_URL_MIN_REMAINING_SECONDS of expiring.
+    Inside SIGNED_URL_REFRESH_AHEAD_SECONDS it is still served, and the caller is asked
+    to re-sign it in the background, so hot URLs never expire on the request path.
+    """
+
+    def __init__(
+        self,
+        max_size: int = SIGNED_URL_CACHE_SIZE,
+        min_remaining: float = SIGNED_URL_MIN_REMAINING_SECONDS,
+        refresh_ahead: float = SIGNED_URL_REFRESH_AHEAD_SECONDS,
+    ):
+        self.max_size = max_size
+        self.min_remaining = min_remaining
+        self.refresh_ahead = max(refresh_ahead, min_remaining)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats_counts = {"hits": 0, "misses": 0, "refreshes": 0}
+
+    def get(self, bucket: str, key: str) -> Tuple[Optional[str], bool]:
+        """(cached URL or None, whether it should be refreshed ahead of expiry)."""
+        with self._lock:
+            entry = self._entries.get((bucket, key))
+            remaining = entry[1] - time.time() if entry else 0
+            if not entry or remaining <= self.min_remaining:
+                self.stats_counts["misses"] += 1
+                return None, False
+            self._entries.move_to_end((bucket, key))
+            self.stats_counts["hits"] += 1
+            return entry[0], remaining <= self.refresh_ahead
+
+    def put(self, bucket: str, key: str, url: str, expires_at: float):
+        with self._lock:
+            self._entries[(bucket, key)] = (url, expires_at)
+            self._entries.move_to_end((bucket, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, bucket: str, key: str):
+        with self._lock:
+            self._entries.pop((bucket, key), None)
+
+
 class StorageService:
     _instance = None
-    _client: Optional[Client] = None
-    
+    _backend: Optional[StorageBackend] = None
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(StorageService, cls).__new__(cls)
+            cls._instance.url_cache = SignedUrlCache()
+            cls._instance._refreshing = set()
+            cls._instance._refresh_lock = threading.Lock()
+            cls._instance._refresher = None
         return cls._instance
-    
+
     def __init__(self):
-        if self._client is None:
-            self._init_client()
-    
-    def _init_client(self):
-        """Initialize Supabase client."""
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        
-        if not supabase_url or not supabase_key:
-            print("Warning: Supabase credentials not set. File storage will not work.")
-            return
-        
-        try:
-            self._client = create_client(supabase_url, supabase_key)
-            print("Supabase client initialized")
-        except Exception as e:
-            print(f"Failed to initialize Supabase client: {str(e)}")
-    
-    def upload_file(self, file_content: bytes, file_path: str, bucket: str = "resumes") -> str:
+        if self._backend is None:
+            self._init_backend()
+
+    def _init_backend(self):
+        """Initialize the configured storage backend (STORAGE_BACKEND, see storage_backends.py)."""
+        StorageService._backend = create_storage_backend()
+
+    @property
+    def backend(self) -> StorageBackend:
+        if not self._backend:
+            raise RuntimeError("Storage backend not initialized")
+        return self._backend
+
+    def object_key(self, file_path: str, bucket: str = "resumes") -> str:
+        """The object key for a stored `file_path` (a public URL or the key itself)."""
+        return self._backend.object_key(bucket, file_path) if self._backend else file_path
+
+    def upload_file(self, file_content: bytes, file_path: str, bucket: str = "resumes", upsert: bool = False) -> str:
         """
-        Upload a file to Supabase Storage.
+        Upload a file (overwriting an existing object if `upsert`).
         Returns the public URL or path to the file.
         """
-        if not self._client:
-            raise RuntimeError("Supabase client not initialized")
-        
+        backend = self.backend
         try:
-            # Upload file
-            response = self._client.storage.from_(bucket).upload(
-                file_path,
-                file_content,
-                file_options={"content-type": "application/pdf" if file_path.endswith(".pdf") else "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
-            )
-            
-            if response:
-                # Get public URL
-                public_url = self._client.storage.from_(bucket).get_public_url(file_path)
-                return public_url
-            else:
-                raise RuntimeError("Failed to upload file")
+            return backend.upload(bucket, file_path, file_content, upsert=upsert)
         except Exception as e:
             raise RuntimeError(f"Storage upload error: {str(e)}")
-    
+
+    def _sign(self, bucket: str, keys: List[str]) -> Dict[str, str]:
+        """Sign `keys` in one backend call and cache the URLs."""
+        expires_at = time.time() + SIGNED_URL_EXPIRES_SECONDS
+        urls = self.backend.signed_urls(bucket, keys, SIGNED_URL_EXPIRES_SECONDS)
+        for key, url in urls.items():
+            self.url_cache.put(bucket, key, url, expires_at)
+        return urls
+
+    def _refresh_in_background(self, bucket: str, keys: List[str]):
+        with self._refresh_lock:
+            keys = [key for key in keys if (bucket, key) not in self._refreshing]
+            if not keys:
+                return
+            self._refreshing.update((bucket, key) for key in keys)
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="signed-url-refresh")
+
+        def refresh():
+            try:
+                self._sign(bucket, keys)
+                self.url_cache.stats_counts["refreshes"] += len(keys)
+            except Exception as e:
+                # The cached URLs are still valid for a while; the next request tries again
+                print(f"[storage] Background URL refresh failed: {str(e)}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.difference_update((bucket, key) for key in keys)
+
+        self._refresher.submit(refresh)
+
+    def get_file_urls(self, file_paths: List[str], bucket: str = "resumes") -> Dict[str, str]:
+        """
+        Signed URLs for several private files ({file_path: url}), for list views.
+        Cached URLs are reused; the rest are signed in a single backend call.
+        Files that can't be signed (e.g. not uploaded yet) are left out.
+        """
+        keys = {file_path: self.object_key(file_path, bucket) for file_path in file_paths}
+        urls: Dict[str, str] = {}
+        missing, stale = [], []
+        for key in set(keys.values()):
+            url, refresh = self.url_cache.get(bucket, key)
+            if url is None:
+                missing.append(key)
+            else:
+                urls[key] = url
+                if refresh:
+                    stale.append(key)
+        if missing:
+            try:
+                urls.update(self._sign(bucket, missing))
+            except Exception as e:
+                raise RuntimeError(f"Failed to get file URLs: {str(e)}")
+        if stale:
+            self._refresh_in_background(bucket, stale)
+        return {file_path: urls[key] for file_path, key in keys.items() if key in urls}
+
     def get_file_url(self, file_path: str, bucket: str = "resumes") -> str:
-        """Get a signed URL for a private file."""
-        if not self._client:
-            raise RuntimeError("Supabase client not initialized")
-        
+        """Get a signed URL for a private file (cached until close to expiry)."""
+        key = self.object_key(file_path, bucket)
+        url, refresh = self.url_cache.get(bucket, key)
+        if url is not None:
+            if refresh:
+                self._refresh_in_background(bucket, [key])
+            return url
+
+        backend = self.backend
         try:
-            # For private files, create a signed URL
-            response = self._client.storage.from_(bucket).create_signed_url(
-                file_path,
-                3600  # 1 hour expiry
-            )
-            return response.get("signedURL", "")
+            expires_at = time.time() + SIGNED_URL_EXPIRES_SECONDS
+            url = backend.signed_url(bucket, key, SIGNED_URL_EXPIRES_SECONDS)
         except Exception as e:
             raise RuntimeError(f"Failed to get file URL: {str(e)}")
-    
+        if url:
+            self.url_cache.put(bucket, key, url, expires_at)
+        return url
+
     def delete_file(self, file_path: str, bucket: str = "resumes") -> bool:
         """Delete a file from storage."""
-        if not self._client:
+        if not self._backend:
             return False
-        
+
+        key = self.object_key(file_path, bucket)
+        self.url_cache.invalidate(bucket, key)
         try:
-            self._client.storage.from_(bucket).remove([file_path])
+            self._backend.remove(bucket, [key])
             return True
         except Exception as e:
             print(f"Failed to delete file: {str(e)}")
@@ -88,4 +198,3 @@ class StorageService:
 
 # Singleton instance
 storage_service = StorageService()
-
@@ -0,0 +1,229 @@
+"""
+Durable Postgres-backed task queue.
+
+The API enqueues rows into `task_queue`; one or more workers (see worker.py) claim them
+with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never pick the same task.
+A claimed task is invisible to other workers until its visibility timeout (`locked_until`)
+passes; if a worker dies mid-task, the task becomes claimable again. Failed tasks are
+retried with exponential backoff up to `max_attempts`; once those are exhausted the task is
+dead, and the kind's `dead_task_handler` (if any) runs once. Tasks enqueued with a `dedup_key`
+are coalesced: while one is queued or running, enqueueing the same key returns it.
+"""
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+from dotenv import load_dotenv
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import QueuedTask
+
+load_dotenv()
+
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.getenv("TASK_RETRY_BASE_DELAY", "10"))
+RETRY_MAX_DELAY = float(os.getenv("TASK_RETRY_MAX_DELAY", "600"))
+
+TaskHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+DeadTaskHandler = Callable[[Dict[str, Any], str], Awaitable[None]]
+_handlers: Dict[str, TaskHandler] = {}
+_dead_handlers: Dict[str, DeadTaskHandler] = {}
+
+
+def task_handler(kind: str):
+    """Register an async handler for a task kind. Handlers receive the task payload."""
+    def decorator(func: TaskHandler) -> TaskHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_handler(kind: str) -> TaskHandler | None:
+    return _handlers.get(kind)
+
+
+def dead_task_handler(kind: str):
+    """Register an async handler for a task of `kind` that failed its last attempt. Receives (payload, error)."""
+    def decorator(func: DeadTaskHandler) -> DeadTaskHandler:
+        _dead_handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_dead_handler(kind: str) -> DeadTaskHandler | None:
+    return _dead_handlers.get(kind)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _active_task(db: Session, dedup_key: str) -> QueuedTask | None:
+    return db.query(QueuedTask).filter(
+        QueuedTask.dedup_key == dedup_key,
+        QueuedTask.status.in_(("queued", "running")),
+    ).first()
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    max_attempts: int = None,
+    delay_seconds: float = 0,
+    dedup_key: str = None,
+    commit: bool = True,
+) -> QueuedTask:
+    """
+    Add a task to the queue and commit. Returns the persisted task, or the already
+    queued/running task with the same `dedup_key`.
+    With commit=False the task is only flushed, so it commits (or rolls back) together with
+    the caller's other changes, e.g. the rows the task will work on.
+    """
+    if dedup_key:
+        existing = _active_task(db, dedup_key)
+        if existing:
+            return existing
+
+    task = QueuedTask(
+        kind=kind,
+        payload=payload,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts or DEFAULT_MAX_ATTEMPTS,
+        run_after=_now() + timedelta(seconds=delay_seconds),
+        dedup_key=dedup_key,
+    )
+    if not commit:
+        try:
+            with db.begin_nested():
+                db.add(task)
+        except IntegrityError:
+            existing = _active_task(db, dedup_key) if dedup_key else None
+            if existing:
+                return existing
+            raise
+        return task
+
+    db.add(task)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost the race to a concurrent enqueue of the same key (partial unique index)
+        db.rollback()
+        existing = _active_task(db, dedup_key) if dedup_key else None
+        if existing:
+            return existing
+        raise
+    db.refresh(task)
+    return task
+
+
+def claim(db: Session, worker_id: str, limit: int, visibility_timeout: float) -> List[Dict[str, Any]]:
+    """
+    Claim up to `limit` runnable tasks for `worker_id`.
+    Runnable means queued and due, or running with an expired visibility timeout
+    (the previous worker died). Returns plain dicts so callers can drop the session.
+    """
+    now = _now()
+    tasks = (
+        db.query(QueuedTask)
+        .filter(
+            or_(
+                and_(QueuedTask.status == "queued", QueuedTask.run_after <= now),
+                and_(QueuedTask.status == "running", QueuedTask.locked_until < now),
+            ),
+            QueuedTask.attempts < QueuedTask.max_attempts,
+        )
+        .order_by(QueuedTask.run_after)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    claimed = []
+    for task in tasks:
+        task.status = "running"
+        task.attempts = (task.attempts or 0) + 1
+        task.locked_by = worker_id
+        task.locked_until = now + timedelta(seconds=visibility_timeout)
+        claimed.append({
+            "id": task.id,
+            "kind": task.kind,
+            "payload": task.payload,
+            "attempts": task.attempts,
+            "max_attempts": task.max_attempts,
+        })
+    db.commit()
+    return claimed
+
+
+def extend_visibility(db: Session, task_id: int, worker_id: str, visibility_timeout: float) -> bool:
+    """Heartbeat: push out the visibility timeout of a task this worker still holds."""
+    updated = (
+        db.query(QueuedTask)
+        .filter(QueuedTask.id == task_id, QueuedTask.locked_by == worker_id, QueuedTask.status == "running")
+        .update({QueuedTask.locked_until: _now() + timedelta(seconds=visibility_timeout)}, synchronize_session=False)
+    )
+    db.commit()
+    return updated > 0
+
+
+def complete(db: Session, task_id: int, worker_id: str):
+    """Mark a task done (only if this worker still holds it)."""
+    db.query(QueuedTask).filter(
+        QueuedTask.id == task_id, QueuedTask.locked_by == worker_id
+    ).update(
+        {QueuedTask.status: "done", QueuedTask.locked_until: None, QueuedTask.last_error: None},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def fail(db: Session, task_id: int, worker_id: str, error: str) -> bool:
+    """
+    Record a failure; requeue with backoff, or mark failed once attempts are exhausted.
+    Returns True if the task is now dead (no retry will follow).
+    """
+    task = db.query(QueuedTask).filter(
+        QueuedTask.id == task_id, QueuedTask.locked_by == worker_id
+    ).with_for_update().first()
+    if not task:
+        db.rollback()
+        return False
+
+    task.last_error = error[:2000]
+    task.locked_until = None
+    if task.attempts >= task.max_attempts:
+        task.status = "failed"
+    else:
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (task.attempts - 1)))
+        task.status = "queued"
+        task.run_after = _now() + timedelta(seconds=random.uniform(delay / 2, delay))
+    dead = task.status == "failed"
+    db.commit()
+    return dead
+
+
+def reap_expired(db: Session) -> List[Dict[str, Any]]:
+    """Mark tasks whose worker died on their final attempt as failed. Returns them (id, kind, payload, error)."""
+    error = "Visibility timeout expired on final attempt"
+    tasks = (
+        db.query(QueuedTask)
+        .filter(
+            QueuedTask.status == "running",
+            QueuedTask.locked_until < _now(),
+            QueuedTask.attempts >= QueuedTask.max_attempts,
+        )
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    reaped = []
+    for task in tasks:
+        task.status = "failed"
+        task.last_error = error
+        reaped.append({"id": task.id, "kind": task.kind, "payload": task.payload, "error": error})
+    db.commit()
+    return reaped
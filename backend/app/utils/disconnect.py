@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Set
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+load_dotenv()
+
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))
+
+# Nginx convention for "client closed request"; never actually reaches the client
+CLIENT_CLOSED_REQUEST = 499
+
+# Counters for the request whose work is currently running. LLM telemetry records
+# cancelled provider calls (and the estimated cost they avoided) into it.
+work_scope: ContextVar[Dict[str, Any] | None] = ContextVar("work_scope", default=None)
+
+# Work allowed to outlive its request; referenced here so it isn't garbage collected
+_background_work: Set[asyncio.Task] = set()
+
+
+class DisconnectMetrics:
+    """Per-endpoint counts of requests completed, cancelled on disconnect, or left running."""
+
+    def __init__(self):
+        self._endpoints: Dict[str, Dict[str, float]] = {}
+
+    def _endpoint(self, endpoint: str) -> Dict[str, float]:
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = {
+                "completed": 0,
+                "cancelled": 0,
+                "continued_in_background": 0,
+                "llm_calls_cancelled": 0,
+                "estimated_cost_avoided_usd": 0.0,
+                "seconds_before_cancel": 0.0,
+            }
+            self._endpoints[endpoint] = stats
+        return stats
+
+    def record(self, endpoint: str, outcome: str, scope: Dict[str, Any] = None, elapsed: float = 0.0):
+        stats = self._endpoint(endpoint)
+        stats[outcome] += 1
+        if outcome == "cancelled":
+            stats["seconds_before_cancel"] += elapsed
+        if scope:
+            stats["llm_calls_cancelled"] += scope.get("llm_calls_cancelled", 0)
+            stats["estimated_cost_avoided_usd"] += scope.get("estimated_cost_avoided_usd", 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            endpoint: {
+                **stats,
+                "estimated_cost_avoided_usd": round(stats["estimated_cost_avoided_usd"], 6),
+                "seconds_before_cancel": round(stats["seconds_before_cancel"], 3),
+            }
+            for endpoint, stats in self._endpoints.items()
+        }
+
+
+disconnect_metrics = DisconnectMetrics()
+
+
+async def run_until_disconnect(
+    request: Request,
+    work: Awaitable,
+    endpoint: str,
+    continue_in_background: bool = False,
+    poll_interval: float = DISCONNECT_POLL_INTERVAL,
+):
+    """
+    Await `work` while watching for the client to go away. On disconnect the work is
+    cancelled, which aborts in-flight provider calls and releases their rate-limiter
+    slots, unless `continue_in_background` is set (opt-in), in which case it keeps running.
+    Raises HTTPException(499) if the client disconnected before the work finished.
+    """
+    scope: Dict[str, Any] = {"llm_calls_cancelled": 0, "estimated_cost_avoided_usd": 0.0}
+    token = work_scope.set(scope)
+    try:
+        task = asyncio.ensure_future(work)
+    finally:
+        work_scope.reset(token)
+
+    started = time.monotonic()
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                disconnect_metrics.record(endpoint, "completed")
+                return task.result()
+            if await request.is_disconnected():
+                break
+    except asyncio.CancelledError:
+        # The server cancelled the request handler (e.g. shutdown): take the work with it
+        task.cancel()
+        raise
+
+    if continue_in_background:
+        _background_work.add(task)
+        task.add_done_callback(_background_work.discard)
+        task.add_done_callback(_log_background_failure)
+        disconnect_metrics.record(endpoint, "continued_in_background")
+    else:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        disconnect_metrics.record(endpoint, "cancelled", scope, time.monotonic() - started)
+    raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected")
+
+
+def _log_background_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"Background work failed after client disconnect: {str(task.exception())}")
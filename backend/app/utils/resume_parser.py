@@ -1,27 +1,202 @@
+import os
 import re
+from collections import Counter
 import fitz  # PyMuPDF
 import docx2txt
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 import io
+from dotenv import load_dotenv
 
+load_dotenv()
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF using PyMuPDF."""
+# "layout": rebuild reading order and detect headers from PDF font metadata; "plain": page text + keywords
+PDF_EXTRACTION_MODE = os.getenv("PDF_EXTRACTION_MODE", "layout")
+
+
+# Common section headers, in priority order: a line containing keywords from several
+# sections belongs to the first one listed.
+SECTION_KEYWORDS = {
+    "education": ["EDUCATION", "ACADEMIC", "EDUCATIONAL BACKGROUND"],
+    "experience": ["EXPERIENCE", "WORK EXPERIENCE", "EMPLOYMENT", "PROFESSIONAL EXPERIENCE", "CAREER"],
+    "skills": ["SKILLS", "TECHNICAL SKILLS", "COMPETENCIES", "TECHNOLOGIES"],
+    "projects": ["PROJECTS", "PROJECT EXPERIENCE"],
+    "summary": ["SUMMARY", "PROFESSIONAL SUMMARY", "OBJECTIVE", "PROFILE"],
+    "certifications": ["CERTIFICATIONS", "CERTIFICATES", "LICENSES"],
+}
+
+
+def _alternation(keywords: List[str]) -> str:
+    # Longest first so the alternation prefers the most specific keyword
+    return "|".join(re.escape(keyword) for keyword in sorted(set(keywords), key=len, reverse=True))
+
+
+# One pass over each (upper-cased) line: a single alternation rejects non-header lines;
+# only header lines are resolved to their section by priority.
+_ANY_HEADER_RE = re.compile(_alternation([k for keywords in SECTION_KEYWORDS.values() for k in keywords]))
+_SECTION_HEADER_RES = [(name, re.compile(_alternation(keywords))) for name, keywords in SECTION_KEYWORDS.items()]
+_KEYWORD_SECTIONS = {}
+for _section_name, _keywords in SECTION_KEYWORDS.items():
+    for _keyword in _keywords:
+        _KEYWORD_SECTIONS.setdefault(_keyword, _section_name)
+
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_PHONE_RES = [
+    re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'),
+    re.compile(r'\(\d{3}\)\s?\d{3}[-.]?\d{4}'),
+    re.compile(r'\+\d{1,3}\s?\d{3}[-.]?\d{3}[-.]?\d{4}'),
+]
+_BULLET_SPLIT_RE = re.compile(r'[•\-\*▪▫‣⁃]\s*')
+
+
+def extract_text_from_pdf(file_content: bytes = None, file_path: str = None) -> str:
+    """Extract text from PDF using PyMuPDF. Pass a path to let PyMuPDF read the file directly."""
     try:
-        pdf_document = fitz.open(stream=file_content, filetype="pdf")
-        text = ""
-        for page in pdf_document:
-            text += page.get_text()
-        pdf_document.close()
-        return text
+        pdf_document = _open_pdf(file_content, file_path)
+        try:
+            return "".join([page.get_text() for page in pdf_document])
+        finally:
+            pdf_document.close()
     except Exception as e:
         raise ValueError(f"Failed to parse PDF: {str(e)}")
 
 
-def extract_text_from_docx(file_content: bytes) -> str:
+def _open_pdf(file_content: bytes = None, file_path: str = None):
+    if file_path:
+        return fitz.open(file_path, filetype="pdf")
+    return fitz.open(stream=file_content, filetype="pdf")
+
+
+# A header is short, and set larger than body text or in bold
+_HEADER_MAX_WORDS = 5
+_HEADER_SIZE_RATIO = 1.15
+_BOLD_FLAG = 16
+# Columns must be separated by an empty vertical strip at least this wide (points)
+_MIN_GUTTER = 12.0
+
+
+def _is_bold(span) -> bool:
+    return bool(span["flags"] & _BOLD_FLAG) or "bold" in span["font"].lower()
+
+
+def _page_lines(page) -> List[Tuple[str, float, bool, Tuple[float, float, float, float]]]:
+    """(text, font size, bold, bbox) for every text line on the page, from one get_text("dict") call."""
+    lines = []
+    # No images, ligatures kept as-is (cheapest for MuPDF; "ﬁ".upper() is "FI", so keywords still match)
+    for block in page.get_text("dict", flags=fitz.TEXT_PRESERVE_LIGATURES)["blocks"]:
+        for line in block.get("lines", ()):
+            spans = line["spans"]
+            if len(spans) == 1:
+                span = spans[0]
+                text = span["text"].strip()
+                if text:
+                    lines.append((text, span["size"], _is_bold(span), line["bbox"]))
+                continue
+            spans = [span for span in spans if not span["text"].isspace()]
+            text = "".join(span["text"] for span in spans).strip()
+            if text:
+                size = max(span["size"] for span in spans)
+                lines.append((text, size, all(_is_bold(span) for span in spans), line["bbox"]))
+    return lines
+
+
+def _find_gutter(lines, page_width: float) -> float | None:
+    """x position of an empty vertical strip splitting the page into two columns, if any."""
+    # Lines wider than 60% of the page span both columns (name, full-width headers)
+    narrow = sorted((bbox[0], bbox[2], len(text)) for text, _, _, bbox in lines if bbox[2] - bbox[0] < page_width * 0.6)
+    if len(narrow) < 4:
+        return None
+    total_chars = sum(chars for _, _, chars in narrow)
+    best_gap, gutter = 0.0, None
+    covered_to = narrow[0][1]
+    left_chars = narrow[0][2]
+    for x0, x1, chars in narrow[1:]:
+        gap = x0 - covered_to
+        middle = covered_to + gap / 2
+        # Both sides need real content, so right-aligned dates next to a single column don't count
+        balanced = min(left_chars, total_chars - left_chars) >= total_chars * 0.1
+        if gap >= _MIN_GUTTER and gap > best_gap and balanced and page_width * 0.2 <= middle <= page_width * 0.8:
+            best_gap, gutter = gap, middle
+        covered_to = max(covered_to, x1)
+        left_chars += chars
+    return gutter
+
+
+def _reading_order(lines, page_width: float):
+    """Order lines top to bottom; in two-column stretches, the whole left column before the right."""
+    lines = sorted(lines, key=lambda line: (round(line[3][1]), line[3][0]))
+    gutter = _find_gutter(lines, page_width)
+    if gutter is None:
+        return lines
+
+    ordered, left, right = [], [], []
+    for line in lines:
+        x0, _, x1, _ = line[3]
+        if x1 <= gutter:
+            left.append(line)
+        elif x0 >= gutter:
+            right.append(line)
+        else:
+            # Full-width line: finish the column stretch above it first
+            ordered += left + right + [line]
+            left, right = [], []
+    return ordered + left + right
+
+
+def extract_pdf_layout(file_content: bytes = None, file_path: str = None) -> Tuple[str, Dict[str, str] | None]:
+    """
+    Layout-aware PDF extraction. Returns (text in reading order, sections), where sections come
+    from header lines detected by font size/weight, or None if the document has no styled headers.
+    """
+    try:
+        pdf_document = _open_pdf(file_content, file_path)
+        try:
+            lines = []
+            for page in pdf_document:
+                lines += _reading_order(_page_lines(page), page.rect.width)
+        finally:
+            pdf_document.close()
+    except Exception as e:
+        raise ValueError(f"Failed to parse PDF: {str(e)}")
+
+    text = "\n".join(line[0] for line in lines)
+    if not lines:
+        return text, None
+
+    # Body text size: the size most characters are set in
+    sizes = Counter()
+    for line_text, size, _, _ in lines:
+        sizes[round(size, 1)] += len(line_text)
+    body_size = sizes.most_common(1)[0][0]
+
+    sections = {}
+    current_section = None
+    current_content = []
+    found_header = False
+    for line_text, size, bold, _ in lines:
+        larger = size >= body_size * _HEADER_SIZE_RATIO
+        styled = (larger or bold) and len(line_text.split()) <= _HEADER_MAX_WORDS
+        section_name = _styled_header_section(line_text.upper()) if styled else None
+        if section_name or (styled and (larger or line_text.isupper())):
+            # Save previous section; a styled header we don't recognise (e.g. "AWARDS") ends it
+            if current_section:
+                sections[current_section] = '\n'.join(current_content).strip()
+            current_section = section_name
+            current_content = []
+            found_header = found_header or section_name is not None
+        elif current_section:
+            current_content.append(line_text)
+
+    # Save last section
+    if current_section:
+        sections[current_section] = '\n'.join(current_content).strip()
+
+    return text, sections if found_header else None
+
+
+def extract_text_from_docx(file_content: bytes = None, file_path: str = None) -> str:
     """Extract text from DOCX using docx2txt."""
     try:
-        text = docx2txt.process(io.BytesIO(file_content))
+        text = docx2txt.process(file_path or io.BytesIO(file_content))
         return text or ""
     except Exception as e:
         raise ValueError(f"Failed to parse DOCX: {str(e)}")
@@ -29,20 +204,14 @@ def extract_text_from_docx(file_content: bytes) -> str:
 
 def extract_email(text: str) -> str | None:
     """Extract email address from text."""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    match = re.search(email_pattern, text)
+    match = _EMAIL_RE.search(text)
     return match.group(0) if match else None
 
 
 def extract_phone(text: str) -> str | None:
     """Extract phone number from text."""
-    phone_patterns = [
-        r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
-        r'\(\d{3}\)\s?\d{3}[-.]?\d{4}',
-        r'\+\d{1,3}\s?\d{3}[-.]?\d{3}[-.]?\d{4}',
-    ]
-    for pattern in phone_patterns:
-        match = re.search(pattern, text)
+    for pattern in _PHONE_RES:
+        match = pattern.search(text)
         if match:
             return match.group(0)
     return None
@@ -50,7 +219,7 @@ def extract_phone(text: str) -> str | None:
 
 def extract_name(text: str) -> str | None:
     """Extract name from first few lines of resume."""
-    lines = text.split('\n')[:5]
+    lines = text.split('\n', 5)[:5]
     for line in lines:
         line = line.strip()
         # Look for lines with 2-4 capitalized words (likely name)
@@ -61,49 +230,51 @@ def extract_name(text: str) -> str | None:
     return None
 
 
+def _header_section(line_upper: str) -> str | None:
+    """Section a header line belongs to, or None if the line isn't a header."""
+    if not _ANY_HEADER_RE.search(line_upper):
+        return None
+    for section_name, pattern in _SECTION_HEADER_RES:
+        if pattern.search(line_upper):
+            return section_name
+    return None
+
+
+def _styled_header_section(line_upper: str) -> str | None:
+    """
+    Section of a line already known to be a header (from its styling): the section of its
+    leftmost, longest keyword, so "PROJECT EXPERIENCE" is projects rather than experience.
+    """
+    match = _ANY_HEADER_RE.search(line_upper)
+    return _KEYWORD_SECTIONS[match.group(0)] if match else None
+
+
 def parse_resume_sections(text: str) -> Dict[str, Any]:
     """Parse resume text into structured sections."""
-    text_upper = text.upper()
-    
-    # Common section headers
-    section_keywords = {
-        "education": ["EDUCATION", "ACADEMIC", "EDUCATIONAL BACKGROUND"],
-        "experience": ["EXPERIENCE", "WORK EXPERIENCE", "EMPLOYMENT", "PROFESSIONAL EXPERIENCE", "CAREER"],
-        "skills": ["SKILLS", "TECHNICAL SKILLS", "COMPETENCIES", "TECHNOLOGIES"],
-        "projects": ["PROJECTS", "PROJECT EXPERIENCE"],
-        "summary": ["SUMMARY", "PROFESSIONAL SUMMARY", "OBJECTIVE", "PROFILE"],
-        "certifications": ["CERTIFICATIONS", "CERTIFICATES", "LICENSES"],
-    }
-    
     sections = {}
-    lines = text.split('\n')
     current_section = None
     current_content = []
-    
-    for line in lines:
+
+    # Upper-case once; upper() never adds or removes newlines, so lines stay aligned
+    for line, line_upper in zip(text.split('\n'), text.upper().split('\n')):
         line_stripped = line.strip()
         if not line_stripped:
             continue
-            
-        # Check if this line is a section header
-        is_header = False
-        for section_name, keywords in section_keywords.items():
-            if any(keyword in line.upper() for keyword in keywords):
-                # Save previous section
-                if current_section:
-                    sections[current_section] = '\n'.join(current_content).strip()
-                current_section = section_name
-                current_content = []
-                is_header = True
-                break
-        
-        if not is_header and current_section:
+
+        section_name = _header_section(line_upper)
+        if section_name:
+            # Save previous section
+            if current_section:
+                sections[current_section] = '\n'.join(current_content).strip()
+            current_section = section_name
+            current_content = []
+        elif current_section:
             current_content.append(line_stripped)
-    
+
     # Save last section
     if current_section:
         sections[current_section] = '\n'.join(current_content).strip()
-    
+
     return sections
 
 
@@ -111,16 +282,14 @@ def extract_experience_bullets(experience_text: str) -> List[str]:
     """Extract bullet points from experience section."""
     if not experience_text:
         return []
-    
+
     # Split by common bullet characters
-    bullets = re.split(r'[•\-\*▪▫‣⁃]\s*', experience_text)
-    bullets = [b.strip() for b in bullets if b.strip() and len(b.strip()) > 10]
-    
+    bullets = [b for b in (part.strip() for part in _BULLET_SPLIT_RE.split(experience_text)) if len(b) > 10]
+
     # Also try splitting by line breaks if no bullets found
     if len(bullets) <= 1:
-        lines = experience_text.split('\n')
-        bullets = [l.strip() for l in lines if l.strip() and len(l.strip()) > 10]
-    
+        bullets = [l for l in (line.strip() for line in experience_text.split('\n')) if len(l) > 10]
+
     return bullets[:20]  # Limit to 20 bullets
 
 
@@ -131,32 +300,54 @@ def parse_resume(file_content: bytes, filename: str) -> Dict[str, Any]:
     """
     # Extract text based on file type
     if filename.lower().endswith('.pdf'):
+        if PDF_EXTRACTION_MODE == "layout":
+            return parse_resume_text(*extract_pdf_layout(file_content))
         text = extract_text_from_pdf(file_content)
     elif filename.lower().endswith('.docx'):
         text = extract_text_from_docx(file_content)
     else:
         raise ValueError(f"Unsupported file type: {filename}")
-    
+
+    return parse_resume_text(text)
+
+
+def parse_resume_file(file_path: str, filename: str) -> Dict[str, Any]:
+    """Like parse_resume, but reads the document from disk (no in-memory copy of the file)."""
+    if filename.lower().endswith('.pdf'):
+        if PDF_EXTRACTION_MODE == "layout":
+            return parse_resume_text(*extract_pdf_layout(file_path=file_path))
+        text = extract_text_from_pdf(file_path=file_path)
+    elif filename.lower().endswith('.docx'):
+        text = extract_text_from_docx(file_path=file_path)
+    else:
+        raise ValueError(f"Unsupported file type: {filename}")
+
+    return parse_resume_text(text)
+
+
+def parse_resume_text(text: str, sections: Dict[str, str] = None) -> Dict[str, Any]:
+    """Parse extracted resume text into structured data. Pass `sections` if the extractor already found them."""
     if not text or len(text.strip()) < 50:
         raise ValueError("Resume appears to be empty or too short")
-    
+
     # Extract contact info
     name = extract_name(text)
     email = extract_email(text)
     phone = extract_phone(text)
-    
-    # Parse sections
-    sections = parse_resume_sections(text)
-    
+
+    # Parse sections (by keyword, unless layout extraction found styled headers)
+    if sections is None:
+        sections = parse_resume_sections(text)
+
     # Extract experience bullets
     experience_bullets = []
     if "experience" in sections:
         experience_bullets = extract_experience_bullets(sections["experience"])
-    
+
     # Count entries (simple heuristic)
     education_count = len([s for s in sections.get("education", "").split('\n') if s.strip()]) if "education" in sections else 0
     experience_count = len(experience_bullets) if experience_bullets else 0
-    
+
     return {
         "name": name,
         "email": email,
@@ -167,4 +358,3 @@ def parse_resume(file_content: bytes, filename: str) -> Dict[str, Any]:
         "experience_count": experience_count,
         "text_content": text,
     }
-
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_REUSE_SECONDS = float(os.getenv("SINGLE_FLIGHT_REUSE_SECONDS", "2.0"))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async computations.
+
+    Callers with the same key await one shared task instead of each running the work.
+    A successful result is reused for `reuse_seconds` after it completes (failures are
+    not reused). If every waiter is cancelled (e.g. all clients disconnected), the shared
+    task is cancelled too.
+    """
+
+    def __init__(self, name: str, key_func: Callable[..., Hashable] = None, reuse_seconds: float = DEFAULT_REUSE_SECONDS):
+        self.name = name
+        self.key_func = key_func
+        self.reuse_seconds = reuse_seconds
+        self._in_flight: Dict[Hashable, Tuple[asyncio.Future, list]] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.stats_counts = {"executed": 0, "coalesced": 0, "reused": 0}
+        _registry[name] = self
+
+    def key(self, *args, **kwargs) -> Hashable:
+        """Build a key with the configured key function (defaults to the arguments themselves)."""
+        if self.key_func:
+            return self.key_func(*args, **kwargs)
+        return (args, tuple(sorted(kwargs.items())))
+
+    def _cached(self, key: Hashable):
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._results[key]
+            return False, None
+        return True, result
+
+    def _finished(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key, (None,))[0] is future:
+            del self._in_flight[key]
+        if self.reuse_seconds > 0 and not future.cancelled() and future.exception() is None:
+            self._results[key] = (time.monotonic() + self.reuse_seconds, future.result())
+        # Drop expired entries so the cache doesn't grow with one-off keys
+        now = time.monotonic()
+        for stale in [k for k, (expires_at, _) in self._results.items() if expires_at <= now]:
+            del self._results[stale]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of `func()`, sharing it with concurrent callers of the same key."""
+        hit, result = self._cached(key)
+        if hit:
+            self.stats_counts["reused"] += 1
+            return result
+
+        entry = self._in_flight.get(key)
+        if entry is None:
+            future = asyncio.ensure_future(func())
+            waiters = [0]
+            entry = (future, waiters)
+            self._in_flight[key] = entry
+            future.add_done_callback(lambda done: self._finished(key, done))
+            self.stats_counts["executed"] += 1
+        else:
+            self.stats_counts["coalesced"] += 1
+
+        future, waiters = entry
+        waiters[0] += 1
+        try:
+            # Shield so one caller's cancellation doesn't cancel the work for the others
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if waiters[0] == 1 and not future.done():
+                future.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats_counts,
+            "in_flight": len(self._in_flight),
+            "reuse_seconds": self.reuse_seconds,
+        }
+
+
+_registry: Dict[str, SingleFlight] = {}
+
+
+def single_flight_stats() -> Dict[str, Any]:
+    return {name: flight.stats() for name, flight in _registry.items()}
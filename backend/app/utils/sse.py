@@ -0,0 +1,19 @@
+import json
+from typing import Any
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Disable proxy buffering (nginx) so events reach the browser immediately
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(data: Any, event: str = None) -> str:
+    """Format a payload as a Server-Sent Events frame. Data is JSON encoded."""
+    frame = ""
+    if event:
+        frame += f"event: {event}\n"
+    frame += f"data: {json.dumps(data)}\n\n"
+    return frame
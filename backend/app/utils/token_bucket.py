@@ -0,0 +1,44 @@
+import time
+
+
+class TokenBucket:
+    """
+    Classic token bucket. Holds up to `capacity` tokens and refills continuously
+    at `refill_rate` tokens per second. Not thread-safe; callers serialize access.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.updated_at = now
+
+    def time_until(self, amount: float = 1.0) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        now = time.monotonic()
+        self._refill(now)
+        # Requests larger than the bucket can never fit; treat them as needing a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        if self.refill_rate <= 0:
+            return float("inf")
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float = 1.0):
+        """Remove tokens unconditionally (the balance may go negative to account for debt)."""
+        self._refill(time.monotonic())
+        self.tokens -= min(amount, self.capacity)
+
+    def try_consume(self, amount: float = 1.0) -> float:
+        """Consume `amount` tokens if available. Returns 0 on success, else seconds to wait."""
+        wait = self.time_until(amount)
+        if wait == 0:
+            self.consume(amount)
+        return wait
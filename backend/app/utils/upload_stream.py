@@ -0,0 +1,181 @@
+"""
+Streaming multipart upload handling.
+
+The request body is parsed as it arrives: the file part is written to a temporary file in
+chunks and SHA-256 hashed in the same pass, and the upload is rejected as soon as it
+exceeds the size limit, so a client can't make the server buffer an arbitrarily large
+body. Callers get a path on disk (for PyMuPDF/docx2txt to open directly) and must call
+`cleanup()` when done. `receive_uploads` does the same for batches of files in one field.
+"""
+import hashlib
+import os
+import tempfile
+from typing import List, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+load_dotenv()
+
+MAX_RESUME_BYTES = 5 * 1024 * 1024  # 5MB
+# Allowance for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+
+
+class StreamedUpload:
+    def __init__(self, filename: str, path: str, size: int, sha256: str, content_type: Optional[str]):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.content_type = content_type
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+
+
+async def receive_upload(request: Request, field_name: str, max_bytes: int = MAX_RESUME_BYTES) -> StreamedUpload:
+    """
+    Stream the `field_name` file part of a multipart/form-data request to a temp file.
+    Raises 413 as soon as the file (or the body) exceeds the limit, 400 if the part is missing.
+    """
+    uploads = await _receive_files(request, field_name, max_bytes, max_files=1, body_limit=max_bytes + MULTIPART_OVERHEAD_BYTES)
+    return uploads[0]
+
+
+async def receive_uploads(
+    request: Request,
+    field_name: str,
+    max_bytes: int = MAX_RESUME_BYTES,
+    max_files: int = 500,
+    max_total_bytes: int = None,
+) -> List[StreamedUpload]:
+    """
+    Stream every `field_name` file part (up to `max_files`) to its own temp file.
+    Each file is limited to `max_bytes` and the whole body to `max_total_bytes`.
+    """
+    body_limit = (max_total_bytes or max_bytes * max_files) + MULTIPART_OVERHEAD_BYTES * max_files
+    return await _receive_files(request, field_name, max_bytes, max_files, body_limit)
+
+
+async def _receive_files(request: Request, field_name: str, max_bytes: int, max_files: int, body_limit: int) -> List[StreamedUpload]:
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data upload")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > body_limit:
+        raise _too_large(max_bytes)
+
+    state = {
+        "header_field": b"",
+        "header_value": b"",
+        "headers": {},
+        "current": None,  # [filename, content_type, temp_file, digest, size] of the file part being written
+    }
+    received_files = []
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        # Only file parts with the expected name are kept (up to max_files); other fields are ignored
+        if name != field_name or b"filename" not in disposition or len(received_files) >= max_files:
+            return
+        part_type = state["headers"].get(b"content-type")
+        temp_file = tempfile.NamedTemporaryFile(prefix="upload_", dir=UPLOAD_TMP_DIR, delete=False)
+        state["current"] = [
+            disposition[b"filename"].decode("utf-8", "replace"),
+            part_type.decode("latin-1") if part_type else None,
+            temp_file,
+            hashlib.sha256(),
+            0,
+        ]
+        received_files.append(state["current"])
+
+    def on_part_data(data, start, end):
+        current = state["current"]
+        if current is None:
+            return
+        chunk = data[start:end]
+        current[4] += len(chunk)
+        if current[4] > max_bytes:
+            raise _too_large(max_bytes)
+        current[3].update(chunk)
+        current[2].write(chunk)
+
+    def on_part_end():
+        if state["current"] is not None:
+            state["current"][2].close()
+        state["current"] = None
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    def discard_all():
+        for _, _, temp_file, _, _ in received_files:
+            temp_file.close()
+            try:
+                os.unlink(temp_file.name)
+            except FileNotFoundError:
+                pass
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise _too_large(max_bytes)
+            parser.write(chunk)
+        parser.finalize()
+    except BaseException:
+        discard_all()
+        raise
+
+    uploads = []
+    for filename, part_type, temp_file, digest, size in received_files:
+        temp_file.close()
+        if filename:
+            uploads.append(StreamedUpload(
+                filename=os.path.basename(filename),
+                path=temp_file.name,
+                size=size,
+                sha256=digest.hexdigest(),
+                content_type=part_type,
+            ))
+        else:
+            # Browsers send an empty filename for a file input with nothing selected
+            os.unlink(temp_file.name)
+
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No file provided")
+    return uploads
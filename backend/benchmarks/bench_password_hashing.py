@@ -0,0 +1,84 @@
+"""
+Login throughput and event-loop responsiveness under concurrent logins.
+
+Run from backend/ (requires passlib and bcrypt):
+    python -m benchmarks.bench_password_hashing [--logins 64] [--concurrency 16] [--rounds 12]
+
+Simulates a burst of logins on one event loop, verifying passwords either inline in the
+handler (as the login route did before) or on app.services.password_hasher's pool. A
+ticker task stands in for every other request on the worker: it measures how late it
+gets scheduled while the burst runs.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.services.password_hasher import PasswordHasher, create_password_context
+
+PASSWORD = "correct horse battery staple"
+TICK_SECONDS = 0.01
+
+
+async def _ticker(lags: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def _burst(verify, hashed: str, logins: int, concurrency: int) -> dict:
+    slots = asyncio.Semaphore(concurrency)  # Concurrent clients
+
+    async def login():
+        async with slots:
+            valid = await verify(PASSWORD, hashed)
+            assert valid
+
+    lags, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "logins_per_second": logins / elapsed,
+        "p99_lag_ms": lags[int(len(lags) * 0.99) - 1] * 1000 if lags else elapsed * 1000,
+        "max_lag_ms": lags[-1] * 1000 if lags else elapsed * 1000,
+    }
+
+
+async def _run(args):
+    context = create_password_context(args.rounds)
+    hashed = context.hash(PASSWORD)
+
+    async def inline(password, hashed_password):
+        return context.verify(password, hashed_password)
+
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers)
+
+    async def pooled(password, hashed_password):
+        valid, _ = await hasher.verify_and_update(password, hashed_password)
+        return valid
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent, bcrypt cost {args.rounds}, {hasher.workers} hash workers")
+    print(f"{'path':<8} {'logins/s':>9} {'p99 lag ms':>11} {'max lag ms':>11}")
+    for name, verify in (("inline", inline), ("pool", pooled)):
+        result = await _burst(verify, hashed, args.logins, args.concurrency)
+        print(f"{name:<8} {result['logins_per_second']:>9.1f} {result['p99_lag_ms']:>11.1f} {result['max_lag_ms']:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16, help="clients logging in at once")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="hash pool threads")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
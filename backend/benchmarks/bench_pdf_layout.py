@@ -0,0 +1,85 @@
+"""
+Layout-aware vs plain PDF extraction: throughput and section accuracy.
+
+Run from backend/ (requires PyMuPDF):
+    python -m benchmarks.bench_pdf_layout [--size 200] [--repeat 7]
+
+Every path goes from PDF bytes to parsed sections:
+- legacy: the parser before the single-pass rewrite (benchmarks/legacy_resume_parser.py)
+- plain:  page.get_text() per page, then keyword header matching (PDF_EXTRACTION_MODE=plain)
+- layout: one get_text("dict") per page, reading order and headers from fonts/positions
+
+Accuracy is the share of labeled body lines (benchmarks/pdf_fixtures.py) that end up in
+the right section, overall and per layout.
+"""
+import argparse
+import time
+from collections import defaultdict
+
+import fitz  # PyMuPDF
+
+from app.utils import resume_parser
+from benchmarks import legacy_resume_parser
+from benchmarks.pdf_fixtures import LAYOUTS, labeled_fixtures, section_accuracy
+
+
+def _legacy(pdf: bytes) -> dict:
+    pdf_document = fitz.open(stream=pdf, filetype="pdf")
+    text = ""
+    for page in pdf_document:
+        text += page.get_text()
+    pdf_document.close()
+    return legacy_resume_parser.parse_resume_text(text)
+
+
+def _plain(pdf: bytes) -> dict:
+    return resume_parser.parse_resume_text(resume_parser.extract_text_from_pdf(pdf))
+
+
+def _layout(pdf: bytes) -> dict:
+    return resume_parser.parse_resume_text(*resume_parser.extract_pdf_layout(pdf))
+
+
+def _throughput(parse, pdfs) -> float:
+    # CPU time: extraction is single-threaded and CPU-bound, and this ignores noisy neighbours
+    started = time.process_time()
+    for pdf in pdfs:
+        parse(pdf)
+    return len(pdfs) / (time.process_time() - started)
+
+
+def _accuracy(parse, fixtures):
+    per_layout = defaultdict(lambda: [0, 0])
+    for layout, pdf, labels in fixtures:
+        correct, total = section_accuracy(parse(pdf)["sections"], labels)
+        per_layout[layout][0] += correct
+        per_layout[layout][1] += total
+    overall = sum(c for c, _ in per_layout.values()) / max(1, sum(t for _, t in per_layout.values()))
+    return overall, {layout: c / max(1, t) for layout, (c, t) in per_layout.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200, help="number of labeled PDF fixtures")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per path (best is reported)")
+    args = parser.parse_args()
+
+    fixtures = labeled_fixtures(args.size)
+    pdfs = [pdf for _, pdf, _ in fixtures]
+
+    paths = (("legacy", _legacy), ("plain", _plain), ("layout", _layout))
+    # Interleave the timed runs so no path benefits from a warmer machine
+    rates = {name: 0.0 for name, _ in paths}
+    for _ in range(args.repeat):
+        for name, parse in paths:
+            rates[name] = max(rates[name], _throughput(parse, pdfs))
+
+    print(f"{'path':<8} {'docs/s':>8} {'accuracy':>9}  " + "  ".join(f"{layout:>12}" for layout in LAYOUTS))
+    for name, parse in paths:
+        rate = rates[name]
+        overall, per_layout = _accuracy(parse, fixtures)
+        print(f"{name:<8} {rate:>8,.0f} {overall:>9.1%}  " + "  ".join(f"{per_layout.get(layout, 0):>12.1%}" for layout in LAYOUTS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Resume parser throughput, before and after the single-pass rewrite.
+
+Run from backend/:
+    python -m benchmarks.bench_resume_parser [--size 500] [--repeat 5]
+
+Parses the synthetic corpus with the legacy reference parser and with
+app.utils.resume_parser, checks that both produce identical output for every resume,
+and reports documents per second. With --pdf (needs PyMuPDF), PDF text extraction
+(string concatenation vs list join) is compared on rendered copies of the corpus too.
+"""
+import argparse
+import time
+
+from app.utils import resume_parser
+from benchmarks import legacy_resume_parser
+from benchmarks.synthetic_resumes import synthetic_corpus
+
+
+def _throughput(parse, corpus, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in corpus:
+            parse(text)
+        best = min(best, time.perf_counter() - started)
+    return len(corpus) / best
+
+
+def _check_identical(corpus):
+    for index, text in enumerate(corpus):
+        expected = legacy_resume_parser.parse_resume_text(text)
+        actual = resume_parser.parse_resume_text(text)
+        if expected != actual:
+            raise AssertionError(f"Parser output differs from the legacy parser on corpus resume {index}")
+
+
+def _bench_pdf(corpus, repeat: int):
+    try:
+        import fitz
+    except ImportError:
+        print("PyMuPDF not installed; skipping PDF extraction benchmark")
+        return
+
+    def render(text: str) -> bytes:
+        document = fitz.open()
+        lines = text.split("\n")
+        for start in range(0, len(lines), 40):
+            page = document.new_page()
+            page.insert_text((50, 72), "\n".join(lines[start:start + 40]), fontsize=10)
+        data = document.tobytes()
+        document.close()
+        return data
+
+    def legacy_extract(file_content: bytes) -> str:
+        pdf_document = fitz.open(stream=file_content, filetype="pdf")
+        text = ""
+        for page in pdf_document:
+            text += page.get_text()
+        pdf_document.close()
+        return text
+
+    pdfs = [render(text) for text in corpus]
+    for pdf in pdfs:
+        if legacy_extract(pdf) != resume_parser.extract_text_from_pdf(pdf):
+            raise AssertionError("PDF text extraction differs from the legacy implementation")
+    before = _throughput(legacy_extract, pdfs, repeat)
+    after = _throughput(resume_parser.extract_text_from_pdf, pdfs, repeat)
+    print(f"PDF extraction:  before {before:,.0f} docs/s  after {after:,.0f} docs/s  ({after / before:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=500, help="number of synthetic resumes")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per parser (best is reported)")
+    parser.add_argument("--pdf", action="store_true", help="also benchmark PDF text extraction")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.size)
+    _check_identical(corpus)
+    print(f"Output identical to the legacy parser on {len(corpus)} resumes")
+
+    before = _throughput(legacy_resume_parser.parse_resume_text, corpus, args.repeat)
+    after = _throughput(resume_parser.parse_resume_text, corpus, args.repeat)
+    print(f"Text parsing:    before {before:,.0f} docs/s  after {after:,.0f} docs/s  ({after / before:.2f}x)")
+
+    if args.pdf:
+        _bench_pdf(corpus, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
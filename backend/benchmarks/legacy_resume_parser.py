@@ -0,0 +1,118 @@
+"""
+The resume text parser as it was before the single-pass rewrite, kept as the reference
+implementation the benchmark checks app.utils.resume_parser against.
+"""
+import re
+from typing import Dict, List, Any
+
+
+def extract_email(text: str) -> str | None:
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    match = re.search(email_pattern, text)
+    return match.group(0) if match else None
+
+
+def extract_phone(text: str) -> str | None:
+    phone_patterns = [
+        r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
+        r'\(\d{3}\)\s?\d{3}[-.]?\d{4}',
+        r'\+\d{1,3}\s?\d{3}[-.]?\d{3}[-.]?\d{4}',
+    ]
+    for pattern in phone_patterns:
+        match = re.search(pattern, text)
+        if match:
+            return match.group(0)
+    return None
+
+
+def extract_name(text: str) -> str | None:
+    lines = text.split('\n')[:5]
+    for line in lines:
+        line = line.strip()
+        words = line.split()
+        if 2 <= len(words) <= 4:
+            if all(word[0].isupper() if word else False for word in words):
+                return line
+    return None
+
+
+def parse_resume_sections(text: str) -> Dict[str, Any]:
+    section_keywords = {
+        "education": ["EDUCATION", "ACADEMIC", "EDUCATIONAL BACKGROUND"],
+        "experience": ["EXPERIENCE", "WORK EXPERIENCE", "EMPLOYMENT", "PROFESSIONAL EXPERIENCE", "CAREER"],
+        "skills": ["SKILLS", "TECHNICAL SKILLS", "COMPETENCIES", "TECHNOLOGIES"],
+        "projects": ["PROJECTS", "PROJECT EXPERIENCE"],
+        "summary": ["SUMMARY", "PROFESSIONAL SUMMARY", "OBJECTIVE", "PROFILE"],
+        "certifications": ["CERTIFICATIONS", "CERTIFICATES", "LICENSES"],
+    }
+
+    sections = {}
+    lines = text.split('\n')
+    current_section = None
+    current_content = []
+
+    for line in lines:
+        line_stripped = line.strip()
+        if not line_stripped:
+            continue
+
+        is_header = False
+        for section_name, keywords in section_keywords.items():
+            if any(keyword in line.upper() for keyword in keywords):
+                if current_section:
+                    sections[current_section] = '\n'.join(current_content).strip()
+                current_section = section_name
+                current_content = []
+                is_header = True
+                break
+
+        if not is_header and current_section:
+            current_content.append(line_stripped)
+
+    if current_section:
+        sections[current_section] = '\n'.join(current_content).strip()
+
+    return sections
+
+
+def extract_experience_bullets(experience_text: str) -> List[str]:
+    if not experience_text:
+        return []
+
+    bullets = re.split(r'[•\-\*▪▫‣⁃]\s*', experience_text)
+    bullets = [b.strip() for b in bullets if b.strip() and len(b.strip()) > 10]
+
+    if len(bullets) <= 1:
+        lines = experience_text.split('\n')
+        bullets = [l.strip() for l in lines if l.strip() and len(l.strip()) > 10]
+
+    return bullets[:20]
+
+
+def parse_resume_text(text: str) -> Dict[str, Any]:
+    if not text or len(text.strip()) < 50:
+        raise ValueError("Resume appears to be empty or too short")
+
+    name = extract_name(text)
+    email = extract_email(text)
+    phone = extract_phone(text)
+
+    sections = parse_resume_sections(text)
+
+    experience_bullets = []
+    if "experience" in sections:
+        experience_bullets = extract_experience_bullets(sections["experience"])
+
+    education_count = len([s for s in sections.get("education", "").split('\n') if s.strip()]) if "education" in sections else 0
+    experience_count = len(experience_bullets) if experience_bullets else 0
+
+    return {
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "sections": sections,
+        "experience_bullets": experience_bullets,
+        "education_count": education_count,
+        "experience_count": experience_count,
+        "text_content": text,
+    }
@@ -0,0 +1,140 @@
+"""
+Labeled PDF resume fixtures for layout-aware extraction benchmarks (requires PyMuPDF).
+
+Synthetic resumes (see synthetic_resumes.py) are rendered in four layouts, and every body
+line is labeled with the section it really belongs to:
+
+- single:       one column, headers larger and bold
+- single_dates: as single, with job dates right-aligned on the title's line
+- two_column:   experience/projects/summary on the left, education/skills/certifications in
+                a sidebar; rows are drawn left-right so plain text extraction interleaves them
+- unstyled:     one column, headers in the body font (only keywords can find them)
+"""
+import re
+from typing import Dict, List, Tuple
+
+import fitz  # PyMuPDF
+
+from benchmarks.synthetic_resumes import synthetic_resume_structure
+
+LAYOUTS = ("single", "single_dates", "two_column", "unstyled")
+SIDEBAR_SECTIONS = ("education", "skills", "certifications")
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+_JOB_WITH_DATES = re.compile(r"^(.*) \((\d{4} - \d{4})\)$")
+# Base-14 fonts can't encode every bullet character the text corpus uses
+_BULLET_FALLBACKS = {"• ": "- ", "▪ ": "- ", "‣ ": "- "}
+
+
+def _render_line(line: str) -> str:
+    for bullet, fallback in _BULLET_FALLBACKS.items():
+        if line.startswith(bullet):
+            return fallback + line[len(bullet):]
+    return line
+
+
+class _Canvas:
+    def __init__(self, line_height: float):
+        self.document = fitz.open()
+        self.page = self.document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        self.line_height = line_height
+        self.y = 50.0
+
+    def next_row(self, rows: int = 1):
+        self.y += self.line_height * rows
+        if self.y > PAGE_HEIGHT - 40:
+            self.page = self.document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            self.y = 50.0
+
+    def put(self, x: float, text: str, size: float, bold: bool = False):
+        self.page.insert_text((x, self.y), text, fontsize=size, fontname="hebo" if bold else "helv")
+
+    def tobytes(self) -> bytes:
+        data = self.document.tobytes()
+        self.document.close()
+        return data
+
+
+def _render_single(resume, styled: bool, right_aligned_dates: bool, labels: Dict[str, List[str]]) -> bytes:
+    canvas = _Canvas(line_height=12)
+    canvas.put(50, resume.name, 16 if styled else 9, bold=styled)
+    canvas.next_row()
+    canvas.put(50, resume.contact, 9)
+    canvas.next_row(2)
+    for section, header, body in resume.sections:
+        canvas.put(50, header, 11 if styled else 9, bold=styled)
+        canvas.next_row()
+        for line in body:
+            line = _render_line(line)
+            job = _JOB_WITH_DATES.match(line) if right_aligned_dates else None
+            if job:
+                canvas.put(50, job.group(1), 9)
+                canvas.put(480, job.group(2), 9)
+                labels[section] += [job.group(1), job.group(2)]
+            else:
+                canvas.put(50, line, 9)
+                labels[section].append(line)
+            canvas.next_row()
+        canvas.next_row()
+    return canvas.tobytes()
+
+
+def _column_rows(sections, labels: Dict[str, List[str]], split_lists: bool) -> List[Tuple[str, bool]]:
+    rows = []
+    for section, header, body in sections:
+        rows.append((header, True))
+        for line in body:
+            parts = line.split(", ") if split_lists and section == "skills" else [_render_line(line)]
+            for part in parts:
+                rows.append((part, False))
+                labels[section].append(part)
+        rows.append(("", False))
+    return rows
+
+
+def _render_two_column(resume, labels: Dict[str, List[str]]) -> bytes:
+    canvas = _Canvas(line_height=10)
+    canvas.put(36, resume.name, 16, bold=True)
+    canvas.next_row(2)
+    canvas.put(36, resume.contact, 8)
+    canvas.next_row(2)
+    main = _column_rows([s for s in resume.sections if s[0] not in SIDEBAR_SECTIONS], labels, split_lists=False)
+    sidebar = _column_rows([s for s in resume.sections if s[0] in SIDEBAR_SECTIONS], labels, split_lists=True)
+    # Draw row by row across both columns, as many resume builders do
+    for index in range(max(len(main), len(sidebar))):
+        for x, rows in ((36, main), (395, sidebar)):
+            if index < len(rows) and rows[index][0]:
+                text, is_header = rows[index]
+                canvas.put(x, text, 9 if is_header else 7, bold=is_header)
+        canvas.next_row()
+    return canvas.tobytes()
+
+
+def labeled_fixture(seed: int) -> Tuple[str, bytes, Dict[str, List[str]]]:
+    """(layout, PDF bytes, {section: body lines}) for one synthetic resume."""
+    resume = synthetic_resume_structure(seed)
+    layout = LAYOUTS[seed % len(LAYOUTS)]
+    labels: Dict[str, List[str]] = {section: [] for section, _, _ in resume.sections}
+    if layout == "two_column":
+        pdf = _render_two_column(resume, labels)
+    else:
+        pdf = _render_single(resume, styled=layout != "unstyled", right_aligned_dates=layout == "single_dates", labels=labels)
+    return layout, pdf, labels
+
+
+def labeled_fixtures(size: int = 200, seed: int = 2024) -> List[Tuple[str, bytes, Dict[str, List[str]]]]:
+    return [labeled_fixture(seed + i) for i in range(size)]
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.split())
+
+
+def section_accuracy(sections: Dict[str, str], labels: Dict[str, List[str]]) -> Tuple[int, int]:
+    """(body lines found in their labeled section, labeled body lines)."""
+    correct = total = 0
+    for section, lines in labels.items():
+        found = {_normalize(line) for line in sections.get(section, "").split("\n")}
+        total += len(lines)
+        correct += sum(_normalize(line) in found for line in lines)
+    return correct, total
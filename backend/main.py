@@ -5,8 +5,9 @@ import os
 from dotenv import load_dotenv
 
 from app.database import get_db
-from app.routers import resume, job, message, user, auth, settings
+from app.routers import resume, job, message, user, auth, settings, metrics, events, storage
 from app.auth import verify_token
+from app.services.request_rate_limiter import RateLimitMiddleware
 
 load_dotenv()
 
@@ -32,6 +33,9 @@ frontend_url = os.getenv("FRONTEND_URL")
 if frontend_url and frontend_url not in origins:
     origins.append(frontend_url)
 
+# Added before CORS so that CORS wraps it and 429 responses carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -50,6 +54,9 @@ app.include_router(job.router, prefix="/api/job", tags=["job"])
 app.include_router(message.router, prefix="/api/message", tags=["message"])
 app.include_router(user.router, prefix="/api/user", tags=["user"])
 app.include_router(settings.router, prefix="/api/settings", tags=["settings"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
+app.include_router(storage.router, prefix="/api/storage", tags=["storage"])
 
 # Add match-score endpoint at /api/match-score (frontend expects this path)
 from app.routers.job import get_match_score
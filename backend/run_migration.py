@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
-Run migration to add application_status column to jobs table
+Run a SQL migration file from the repository root.
+Defaults to migration_add_job_status.sql; pass another file name to run it instead:
+    python run_migration.py migration_add_llm_fallback.sql
 """
 import os
 import sys
@@ -17,7 +19,8 @@ if not DATABASE_URL:
     sys.exit(1)
 
 # Read migration SQL
-migration_file = Path(__file__).parent.parent / "migration_add_job_status.sql"
+migration_name = sys.argv[1] if len(sys.argv) > 1 else "migration_add_job_status.sql"
+migration_file = Path(__file__).parent.parent / migration_name
 if not migration_file.exists():
     print(f"Error: Migration file not found at {migration_file}")
     sys.exit(1)
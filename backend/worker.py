@@ -0,0 +1,140 @@
+"""
+Background worker for the durable task queue.
+
+Run alongside the API:
+    python worker.py
+
+Claims tasks from `task_queue` with FOR UPDATE SKIP LOCKED, so any number of worker
+processes can run side by side. While a task runs, the worker heartbeats its visibility
+timeout; if the worker dies, the task is picked up again once the timeout passes.
+"""
+import asyncio
+import os
+import signal
+import socket
+import traceback
+import uuid
+from dotenv import load_dotenv
+
+from app.database import SessionLocal
+from app.services import task_queue
+# Importing handler modules registers them with the queue
+from app.services import recommendation_service, rescoring_service, storage_gc, storage_outbox  # noqa: F401
+
+load_dotenv()
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+WORKER_VISIBILITY_TIMEOUT = float(os.getenv("WORKER_VISIBILITY_TIMEOUT", "120"))
+WORKER_TASK_TIMEOUT = float(os.getenv("WORKER_TASK_TIMEOUT", "600"))
+
+
+def _with_session(func, *args):
+    """Run a task_queue operation in its own short-lived session."""
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
+class Worker:
+    def __init__(self, concurrency: int = WORKER_CONCURRENCY):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = concurrency
+        self.running: set[asyncio.Task] = set()
+        self.stopping = asyncio.Event()
+
+    async def _db(self, func, *args):
+        # Queue operations use the sync SQLAlchemy session; keep them off the event loop
+        return await asyncio.to_thread(_with_session, func, *args)
+
+    async def _heartbeat(self, task_id: int):
+        interval = WORKER_VISIBILITY_TIMEOUT / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                held = await self._db(task_queue.extend_visibility, task_id, self.worker_id, WORKER_VISIBILITY_TIMEOUT)
+                if not held:
+                    return
+            except Exception as e:
+                print(f"[worker] Heartbeat failed for task {task_id}: {str(e)}")
+
+    async def _on_dead(self, task: dict, error: str):
+        """Run the kind's dead-task handler once the task won't be retried."""
+        handler = task_queue.get_dead_handler(task["kind"])
+        if handler is None:
+            return
+        try:
+            await handler(task["payload"], error)
+        except Exception as e:
+            print(f"[worker] Dead-task handler failed for task {task['id']} ({task['kind']}): {str(e)}")
+
+    async def _run(self, task: dict):
+        handler = task_queue.get_handler(task["kind"])
+        heartbeat = asyncio.create_task(self._heartbeat(task["id"]))
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for task kind '{task['kind']}'")
+            await asyncio.wait_for(handler(task["payload"]), timeout=WORKER_TASK_TIMEOUT)
+            await self._db(task_queue.complete, task["id"], self.worker_id)
+        except asyncio.CancelledError:
+            # Shutting down mid-task: leave it claimed so it is retried after the visibility timeout
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            print(f"[worker] Task {task['id']} ({task['kind']}) attempt {task['attempts']}/{task['max_attempts']} failed: {error}")
+            traceback.print_exc()
+            try:
+                dead = await self._db(task_queue.fail, task["id"], self.worker_id, error)
+            except Exception as db_error:
+                print(f"[worker] Failed to record failure for task {task['id']}: {str(db_error)}")
+            else:
+                if dead:
+                    await self._on_dead(task, error)
+        finally:
+            heartbeat.cancel()
+
+    async def run(self):
+        print(f"[worker] {self.worker_id} started (concurrency={self.concurrency})")
+        while not self.stopping.is_set():
+            free = self.concurrency - len(self.running)
+            claimed = []
+            if free > 0:
+                try:
+                    for dead in await self._db(task_queue.reap_expired):
+                        await self._on_dead(dead, dead["error"])
+                    claimed = await self._db(task_queue.claim, self.worker_id, free, WORKER_VISIBILITY_TIMEOUT)
+                except Exception as e:
+                    print(f"[worker] Failed to claim tasks: {str(e)}")
+
+            for task in claimed:
+                running = asyncio.create_task(self._run(task))
+                self.running.add(running)
+                running.add_done_callback(self.running.discard)
+
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=WORKER_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+        if self.running:
+            print(f"[worker] Waiting for {len(self.running)} running task(s) to finish...")
+            await asyncio.gather(*self.running, return_exceptions=True)
+        print(f"[worker] {self.worker_id} stopped")
+
+    def stop(self):
+        self.stopping.set()
+
+
+async def main():
+    worker = Worker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
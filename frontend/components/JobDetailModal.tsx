@@ -3,6 +3,7 @@
 import { useState, useEffect } from "react"
 import { X, Briefcase, Building, FileText, MessageSquare, Mail, FileEdit, TrendingUp, Copy, Check, Sparkles, AlertCircle, ChevronDown } from "lucide-react"
 import axios from "axios"
+import { apiClient } from "@/lib/api"
 
 interface JobDetailModalProps {
   jobId: number
@@ -23,6 +24,8 @@ interface JobDetail {
   recruiter_message: string | null
   referral_message: string | null
   resume_suggestions: any | null
+  suggested_resume_id: number | null
+  suggested_resume_score: number | null
 }
 
 export default function JobDetailModal({ jobId, isOpen, onClose, onUpdate }: JobDetailModalProps) {
@@ -45,6 +48,38 @@ export default function JobDetailModal({ jobId, isOpen, onClose, onUpdate }: Job
     }
   }, [isOpen, jobId])
 
+  // Refresh when background work for this job finishes instead of polling
+  useEffect(() => {
+    if (!isOpen || !jobId) return
+
+    const controller = new AbortController()
+    const listen = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          const tokenResponse = await fetch("/api/auth/token")
+          if (!tokenResponse.ok) return
+          const { token } = await tokenResponse.json()
+
+          await apiClient.subscribeToJobEvents(
+            token || "",
+            (event) => {
+              if (event.job_id === jobId) fetchJobDetail()
+            },
+            controller.signal
+          )
+        } catch (error) {
+          if (controller.signal.aborted) return
+          console.error("Job event stream disconnected", error)
+        }
+        // Back off before reconnecting
+        await new Promise((resolve) => setTimeout(resolve, 5000))
+      }
+    }
+    listen()
+
+    return () => controller.abort()
+  }, [isOpen, jobId])
+
   const fetchJobDetail = async () => {
     try {
       const tokenResponse = await fetch("/api/auth/token")
@@ -139,6 +174,17 @@ export default function JobDetailModal({ jobId, isOpen, onClose, onUpdate }: Job
                       </span>
                     </div>
                   )}
+                  {jobDetail.suggested_resume_id !== null &&
+                    jobDetail.suggested_resume_id !== jobDetail.resume_id && (
+                      <div className="flex items-center gap-2">
+                        <div className="p-1.5 rounded-lg bg-emerald-500/10 text-emerald-400">
+                          <Sparkles className="h-4 w-4" />
+                        </div>
+                        <span className="font-bold text-emerald-400">
+                          Resume #{jobDetail.suggested_resume_id} fits best ({jobDetail.suggested_resume_score}%)
+                        </span>
+                      </div>
+                    )}
                   {/* Status Dropdown */}
                   <div className="relative">
                     <select
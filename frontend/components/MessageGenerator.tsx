@@ -40,9 +40,14 @@ export default function MessageGenerator({
       const tokenData = await tokenResponse.json()
       const token = tokenData.token || session.user?.id || ""
       
-      const response = await apiClient.generateRecruiterMessage(
+      // Render tokens as they stream in so the first words appear immediately
+      setMessage("")
+      const response = await apiClient.streamRecruiterMessage(
         resumeId,
         jobId,
+        {
+          onToken: (text) => setMessage((current) => (current || "") + text),
+        },
         recipientName || undefined,
         recipientEmail || undefined,
         token
@@ -50,7 +55,7 @@ export default function MessageGenerator({
       setMessage(response.message)
       setEmailSent(response.email_sent || false)
     } catch (err: any) {
-      setError(err.response?.data?.error || "Failed to generate message")
+      setError(err.response?.data?.error || err.message || "Failed to generate message")
     } finally {
       setLoading(false)
     }
@@ -18,6 +18,7 @@ export default function ResumeUpload({ onUploadSuccess }: ResumeUploadProps) {
   const [uploading, setUploading] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [parseSummary, setParseSummary] = useState<any>(null)
+  const [fromCache, setFromCache] = useState(false)
 
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     if (e.target.files && e.target.files[0]) {
@@ -52,6 +53,7 @@ export default function ResumeUpload({ onUploadSuccess }: ResumeUploadProps) {
       
       const response = await apiClient.uploadResume(file, token)
       setParseSummary(response.parse_summary)
+      setFromCache(Boolean(response.from_cache))
       onUploadSuccess(response.resume_id)
     } catch (err: any) {
       setError(err.response?.data?.error || "Failed to upload resume")
@@ -102,7 +104,7 @@ export default function ResumeUpload({ onUploadSuccess }: ResumeUploadProps) {
         {parseSummary && (
           <div className="p-4 border rounded-lg" style={{ backgroundColor: '#064e3b', borderColor: '#065f46' }}>
             <p className="text-sm font-semibold mb-2" style={{ color: '#6ee7b7' }}>
-              Resume parsed successfully!
+              {fromCache ? "This resume was already processed; reusing the saved results." : "Resume parsed successfully!"}
             </p>
             {parseSummary.name && (
               <p className="text-sm" style={{ color: '#6ee7b7' }}>
@@ -22,6 +22,7 @@ export interface ResumeUploadResponse {
     education_count: number
     experience_count: number
   }
+  from_cache?: boolean
 }
 
 export interface JobSubmitResponse {
@@ -57,6 +58,87 @@ export interface MessageResponse {
   email_sent?: boolean
 }
 
+export interface MessageStreamHandlers {
+  onToken: (text: string) => void
+}
+
+export interface JobEvent {
+  type:
+    | "embedding_stored"
+    | "score_computed"
+    | "recruiter_message_ready"
+    | "improvements_ready"
+    | "recommendations_failed"
+    | "rescore_progress"
+    | "rescore_complete"
+  job_id: number | null
+  resume_id?: number
+  match_score?: number
+  scored?: number
+  total?: number
+}
+
+// Reads SSE frames from a response body, calling onFrame(event, payload) for each.
+// Stops early when onFrame returns true.
+const readSSEFrames = async (
+  response: Response,
+  onFrame: (event: string, payload: any) => boolean | void
+): Promise<boolean> => {
+  const reader = response.body!.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) return false
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary = buffer.indexOf("\n\n")
+    while (boundary !== -1) {
+      const frame = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf("\n\n")
+
+      let event = "message"
+      let data = ""
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim()
+        else if (line.startsWith("data:")) data += line.slice(5).trim()
+      }
+      if (!data) continue
+
+      if (onFrame(event, JSON.parse(data))) {
+        await reader.cancel()
+        return true
+      }
+    }
+  }
+}
+
+// Reads an SSE response body from a streaming message endpoint.
+// Calls onToken for each `token` event and resolves with the final `done` payload.
+const readMessageStream = async (
+  response: Response,
+  handlers: MessageStreamHandlers
+): Promise<MessageResponse> => {
+  if (!response.ok || !response.body) {
+    const body = await response.json().catch(() => ({}))
+    throw new Error(body.detail || "Failed to generate message")
+  }
+
+  let result = null as MessageResponse | null
+  await readSSEFrames(response, (event, payload) => {
+    if (event === "token") handlers.onToken(payload.text)
+    else if (event === "done") {
+      result = payload
+      return true
+    } else if (event === "error") throw new Error(payload.detail)
+  })
+
+  if (result) return result
+  throw new Error("Message stream ended unexpectedly")
+}
+
 export const apiClient = {
   // Resume endpoints
   uploadResume: async (file: File, token: string): Promise<ResumeUploadResponse> => {
@@ -146,6 +228,54 @@ export const apiClient = {
     return response.data
   },
 
+  // Streams the recruiter message token by token via Server-Sent Events
+  streamRecruiterMessage: async (
+    resumeId: number,
+    jobId: number,
+    handlers: MessageStreamHandlers,
+    recipientName?: string,
+    recipientEmail?: string,
+    token?: string
+  ): Promise<MessageResponse> => {
+    const response = await fetch(`${API_URL}/api/message/recruiter/stream`, {
+      method: "POST",
+      headers: {
+        Authorization: `Bearer ${token}`,
+        "Content-Type": "application/json",
+        Accept: "text/event-stream",
+      },
+      body: JSON.stringify({
+        resume_id: resumeId,
+        job_id: jobId,
+        recipient_name: recipientName,
+        recipient_email: recipientEmail,
+      }),
+    })
+    return readMessageStream(response, handlers)
+  },
+
+  // Per-user job event stream (SSE). Resolves when the stream ends or `signal` aborts;
+  // callers reconnect as needed.
+  subscribeToJobEvents: async (
+    token: string,
+    onEvent: (event: JobEvent) => void,
+    signal?: AbortSignal
+  ): Promise<void> => {
+    const response = await fetch(`${API_URL}/api/events/stream`, {
+      headers: {
+        Authorization: `Bearer ${token}`,
+        Accept: "text/event-stream",
+      },
+      signal,
+    })
+    if (!response.ok || !response.body) {
+      throw new Error("Failed to subscribe to job events")
+    }
+    await readSSEFrames(response, (event, payload) => {
+      if (event !== "ready") onEvent(payload)
+    })
+  },
+
   // User history
   getUserHistory: async (token: string) => {
     const response = await api.get("/api/user/history", {
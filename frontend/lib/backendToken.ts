@@ -0,0 +1,33 @@
+import jwt from "jsonwebtoken"
+import type { JWT } from "next-auth/jwt"
+
+// Tokens are valid for an hour; hand out the same one until it has less than 5 minutes left,
+// so the backend's verified-token cache can skip re-verifying it on every request
+const TOKEN_LIFETIME_SECONDS = 60 * 60
+const REUSE_MARGIN_SECONDS = 5 * 60
+
+const tokens = new Map<string, { token: string; expiresAt: number }>()
+
+export function getBackendToken(tokenData: JWT): string {
+  const claims = {
+    sub: (tokenData.id as string | undefined) || tokenData.sub,
+    email: tokenData.email,
+    name: tokenData.name,
+  }
+  const key = JSON.stringify(claims)
+  const now = Date.now() / 1000
+  const cached = tokens.get(key)
+  if (cached && cached.expiresAt - now > REUSE_MARGIN_SECONDS) {
+    return cached.token
+  }
+
+  const token = jwt.sign(claims, process.env.NEXTAUTH_SECRET || "", { expiresIn: TOKEN_LIFETIME_SECONDS })
+  tokens.set(key, { token, expiresAt: now + TOKEN_LIFETIME_SECONDS })
+  // Drop expired entries so the map stays as small as the set of active users
+  if (tokens.size > 1000) {
+    tokens.forEach((entry, entryKey) => {
+      if (entry.expiresAt - now <= REUSE_MARGIN_SECONDS) tokens.delete(entryKey)
+    })
+  }
+  return token
+}
@@ -1,6 +1,6 @@
 import { getToken } from "next-auth/jwt"
 import { NextApiRequest, NextApiResponse } from "next"
-import jwt from "jsonwebtoken"
+import { getBackendToken } from "@/lib/backendToken"
 
 export default async function handler(
   req: NextApiRequest,
@@ -19,15 +19,7 @@ export default async function handler(
 
     // Create a JWT token that the backend can verify
     // The backend expects a JWT with user info
-    const jwtToken = jwt.sign(
-      {
-        sub: tokenData.id || tokenData.sub,
-        email: tokenData.email,
-        name: tokenData.name,
-      },
-      process.env.NEXTAUTH_SECRET || "",
-      { expiresIn: "1h" }
-    )
+    const jwtToken = getBackendToken(tokenData)
 
     return res.status(200).json({ token: jwtToken })
   } catch (error) {
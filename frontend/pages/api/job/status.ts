@@ -1,7 +1,7 @@
 import type { NextApiRequest, NextApiResponse } from "next"
 import { getToken } from "next-auth/jwt"
-import jwt from "jsonwebtoken"
 import axios from "axios"
+import { getBackendToken } from "@/lib/backendToken"
 
 export default async function handler(
     req: NextApiRequest,
@@ -19,15 +19,8 @@ export default async function handler(
             return res.status(401).json({ error: "Unauthorized" })
         }
 
-        // Create JWT for backend
-        const backendToken = jwt.sign(
-            {
-                email: tokenData.email,
-                sub: tokenData.sub,
-            },
-            process.env.JWT_SECRET || "your-secret-key",
-            { expiresIn: "1h" }
-        )
+        // JWT for the backend, signed with the secret it verifies against (reused while valid)
+        const backendToken = getBackendToken(tokenData)
 
         // Extract job_id from query
         const { job_id } = req.query
@@ -1,6 +1,7 @@
 import { NextApiRequest, NextApiResponse } from "next"
 import { getToken } from "next-auth/jwt"
 import axios from "axios"
+import { getBackendToken } from "@/lib/backendToken"
 
 export default async function handler(
   req: NextApiRequest,
@@ -18,17 +19,8 @@ export default async function handler(
       return res.status(401).json({ error: "Not authenticated" })
     }
 
-    // Create JWT token for backend
-    const jwt = require("jsonwebtoken")
-    const backendToken = jwt.sign(
-      {
-        sub: tokenData.id || tokenData.sub,
-        email: tokenData.email,
-        name: tokenData.name,
-      },
-      process.env.NEXTAUTH_SECRET || "",
-      { expiresIn: "1h" }
-    )
+    // JWT for the backend (reused while valid)
+    const backendToken = getBackendToken(tokenData)
 
     // Forward request to backend
     const apiUrl = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"
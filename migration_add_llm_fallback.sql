@@ -0,0 +1,16 @@
+-- Migration: Add secondary LLM provider settings for failover and hedged requests
+-- Run this to update existing database schema
+
+-- Secondary provider, key and model used when the primary fails or is slow
+ALTER TABLE user_settings
+ADD COLUMN IF NOT EXISTS fallback_provider VARCHAR(50);
+
+ALTER TABLE user_settings
+ADD COLUMN IF NOT EXISTS fallback_api_key VARCHAR;
+
+ALTER TABLE user_settings
+ADD COLUMN IF NOT EXISTS fallback_model VARCHAR;
+
+-- Opt-in hedging: race the secondary once the primary exceeds its p95 latency
+ALTER TABLE user_settings
+ADD COLUMN IF NOT EXISTS hedge_requests BOOLEAN DEFAULT FALSE;
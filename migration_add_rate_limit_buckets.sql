@@ -0,0 +1,12 @@
+-- Migration: Shared token buckets for request rate limiting (RATE_LIMIT_BACKEND=postgres)
+-- Run this to update existing database schema
+
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    bucket_key VARCHAR PRIMARY KEY,  -- "<METHOD> <route>|user:<id>" or "<METHOD> <route>|ip:<address>"
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Full buckets are equivalent to missing ones; prune idle rows with e.g.
+-- DELETE FROM rate_limit_buckets WHERE updated_at < NOW() - INTERVAL '1 day';
+CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_updated_at ON rate_limit_buckets(updated_at);
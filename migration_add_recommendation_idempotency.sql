@@ -0,0 +1,28 @@
+-- Migration: Idempotent, deduplicated recommendation generation
+-- Run this to update existing database schema (after migration_add_task_queue.sql)
+
+-- Idempotency key columns on recommendations
+ALTER TABLE recommendations
+ADD COLUMN IF NOT EXISTS kind VARCHAR NOT NULL DEFAULT 'initial';
+
+ALTER TABLE recommendations
+ADD COLUMN IF NOT EXISTS input_hash VARCHAR(64);
+
+ALTER TABLE recommendations
+ADD COLUMN IF NOT EXISTS status VARCHAR NOT NULL DEFAULT 'complete';
+
+-- One result per (job, resume, kind, inputs). Existing rows have a NULL hash and are unaffected.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_recommendations_idempotency') THEN
+        ALTER TABLE recommendations
+        ADD CONSTRAINT uq_recommendations_idempotency UNIQUE (job_id, resume_id, kind, input_hash);
+    END IF;
+END $$;
+
+-- Single-flight guard: at most one queued/running task per dedup key
+ALTER TABLE task_queue
+ADD COLUMN IF NOT EXISTS dedup_key VARCHAR;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_task_queue_active_dedup_key
+ON task_queue(dedup_key) WHERE status IN ('queued', 'running');
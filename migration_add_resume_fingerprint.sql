@@ -0,0 +1,15 @@
+-- Migration: Content-hash fingerprint on resumes (deduplicates repeated uploads)
+-- Run this to update existing database schema
+
+ALTER TABLE resumes ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64);
+
+-- Global parse cache lookups
+CREATE INDEX IF NOT EXISTS ix_resumes_content_sha256 ON resumes(content_sha256);
+
+-- One resume per file per user (NULL fingerprints on older rows don't conflict)
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_resumes_user_content_sha256') THEN
+        ALTER TABLE resumes ADD CONSTRAINT uq_resumes_user_content_sha256 UNIQUE (user_id, content_sha256);
+    END IF;
+END $$;
@@ -0,0 +1,15 @@
+-- Migration: Batch resume-vs-job scores (fan-out rescoring on resume upload)
+-- Run this to update existing database schema
+
+CREATE TABLE IF NOT EXISTS resume_job_scores (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    resume_id INTEGER NOT NULL REFERENCES resumes(resume_id) ON DELETE CASCADE,
+    job_id INTEGER NOT NULL REFERENCES jobs(job_id) ON DELETE CASCADE,
+    score FLOAT NOT NULL,  -- 0-100
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_resume_job_scores_resume_job UNIQUE (resume_id, job_id)
+);
+
+-- "Best resume per job" lookups
+CREATE INDEX IF NOT EXISTS idx_resume_job_scores_job_score ON resume_job_scores(job_id, score DESC);
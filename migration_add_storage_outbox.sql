@@ -0,0 +1,19 @@
+-- Migration: Storage outbox (resume files are uploaded to object storage by the worker)
+-- Run this to update existing database schema
+
+CREATE TABLE IF NOT EXISTS storage_outbox (
+    id SERIAL PRIMARY KEY,
+    resume_id INTEGER NOT NULL REFERENCES resumes(resume_id) ON DELETE CASCADE,
+    object_key VARCHAR NOT NULL,
+    staging_path VARCHAR NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_storage_outbox_resume_id ON storage_outbox(resume_id);
+
+-- Earlier versions of this table held the file bytes (content BYTEA). Let the worker drain
+-- those rows before running this: files are now staged on disk (STORAGE_STAGING_DIR).
+ALTER TABLE storage_outbox ADD COLUMN IF NOT EXISTS staging_path VARCHAR;
+DELETE FROM storage_outbox WHERE staging_path IS NULL;
+ALTER TABLE storage_outbox ALTER COLUMN staging_path SET NOT NULL;
+ALTER TABLE storage_outbox DROP COLUMN IF EXISTS content;
@@ -0,0 +1,20 @@
+-- Migration: Add durable task queue for background work (recommendation generation)
+-- Run this to update existing database schema
+
+CREATE TABLE IF NOT EXISTS task_queue (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR NOT NULL,
+    payload JSONB NOT NULL,
+    status VARCHAR NOT NULL DEFAULT 'queued',  -- queued, running, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    locked_by VARCHAR,
+    locked_until TIMESTAMP WITH TIME ZONE,  -- visibility timeout
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Workers poll by status and due time
+CREATE INDEX IF NOT EXISTS idx_task_queue_status_run_after ON task_queue(status, run_after);
@@ -75,6 +75,12 @@ uvicorn main:app --reload --host 0.0.0.0 --port 8000 > ../backend.log 2>&1 &
 BACKEND_PID=$!
 echo "   Backend PID: $BACKEND_PID"
 
+# Start background worker (durable task queue)
+echo "⚙️  Starting background worker"
+python worker.py > ../worker.log 2>&1 &
+WORKER_PID=$!
+echo "   Worker PID: $WORKER_PID"
+
 cd ..
 
 # Wait a bit for backend to start
@@ -109,18 +115,19 @@ echo "   API Docs: http://localhost:8000/docs"
 echo ""
 echo "📝 Logs:"
 echo "   Backend: tail -f backend.log"
+echo "   Worker: tail -f worker.log"
 echo "   Frontend: tail -f frontend.log"
 echo ""
 echo "🛑 To stop:"
-echo "   kill $BACKEND_PID $FRONTEND_PID"
+echo "   kill $BACKEND_PID $WORKER_PID $FRONTEND_PID"
 echo "   Or run: ./stop.sh"
 echo ""
 
 # Save PIDs to file for stop script
-echo "$BACKEND_PID $FRONTEND_PID" > .pids
+echo "$BACKEND_PID $WORKER_PID $FRONTEND_PID" > .pids
 
 # Wait for user interrupt
-trap "echo ''; echo '🛑 Stopping services...'; kill $BACKEND_PID $FRONTEND_PID 2>/dev/null; rm -f .pids; exit" INT TERM
+trap "echo ''; echo '🛑 Stopping services...'; kill $BACKEND_PID $WORKER_PID $FRONTEND_PID 2>/dev/null; rm -f .pids; exit" INT TERM
 
 echo "Press Ctrl+C to stop all services"
 wait